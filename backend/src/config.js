@@ -15,5 +15,6 @@ export function getConfig() {
     staffUser: process.env.STAFF_USER || 'staff',
     staffPass: process.env.STAFF_PASS || 'changeme',
     deviceSecret: process.env.DEVICE_SECRET || 'device-secret-changeme',
+    activeCacheTtlMs: parseInt(process.env.ACTIVE_CACHE_TTL_MS || '5000', 10),
   };
 }
@@ -9,6 +9,10 @@ const __dirname = dirname(fileURLToPath(import.meta.url));
  * Safe to call on every startup — uses CREATE IF NOT EXISTS.
  */
 export function migrate(db) {
+  const tableExists = (name) =>
+    !!db.prepare(`SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?`).get(name);
+  const hadCategoryStats = tableExists('session_category_stats');
+
   const sql = readFileSync(join(__dirname, 'schema.sql'), 'utf-8');
   db.exec(sql);
 
@@ -18,4 +22,34 @@ export function migrate(db) {
   };
   addCol('sessions', 'name', 'TEXT');
   addCol('sessions', 'meal_type', 'TEXT');
+
+  // First start on a database from before the rollup table existed
+  if (!hadCategoryStats) {
+    const sessions = backfillCategoryStats(db);
+    if (sessions > 0) console.log(`[TrashTrack] Backfilled category stats for ${sessions} sessions`);
+  }
+}
+
+/**
+ * Rebuild session_category_stats from detection_results.
+ * Pass a sessionId to rebuild one session, or omit it to rebuild all.
+ * Returns the number of sessions that have stats afterwards.
+ */
+export function backfillCategoryStats(db, sessionId = null) {
+  const where = sessionId ? 'WHERE session_id = ?' : '';
+  const params = sessionId ? [sessionId] : [];
+
+  const tx = db.transaction(() => {
+    db.prepare(`DELETE FROM session_category_stats ${where}`).run(...params);
+    db.prepare(
+      `INSERT INTO session_category_stats
+         (session_id, category, count, confidence_sum, confidence_n, amount_kg_sum)
+       SELECT session_id, category, COUNT(*), COALESCE(SUM(confidence), 0), COUNT(confidence), SUM(amount_kg)
+       FROM detection_results ${where}
+       GROUP BY session_id, category`
+    ).run(...params);
+    return db.prepare(`SELECT COUNT(DISTINCT session_id) AS n FROM session_category_stats ${where}`).get(...params).n;
+  });
+
+  return tx();
 }
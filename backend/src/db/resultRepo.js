@@ -1,4 +1,5 @@
 import { getDb } from './sqlite.js';
+import { backfillCategoryStats } from './migrate.js';
 
 /**
  * Replace all detection results for a session (delete + reinsert).
@@ -20,7 +21,64 @@ export function replaceResults(sessionId, results = []) {
       const extraJson = Object.keys(extra).length > 0 ? JSON.stringify(extra) : null;
       ins.run(sessionId, category, amount_kg ?? null, confidence ?? null, extraJson);
     }
+    backfillCategoryStats(db, sessionId);
   });
 
   tx();
 }
+
+/**
+ * Append detection results to a session and fold them into the
+ * per-category rollup, in one transaction.  Cost is O(batch size),
+ * independent of how many detections the session already has.
+ * Returns the number of rows inserted (results without a category are skipped).
+ */
+export function appendResults(sessionId, results = []) {
+  const db = getDb();
+
+  const ins = db.prepare(
+    `INSERT INTO detection_results (session_id, category, amount_kg, confidence, extra_json)
+     VALUES (?, ?, ?, ?, ?)`
+  );
+  const bump = db.prepare(
+    `INSERT INTO session_category_stats
+       (session_id, category, count, confidence_sum, confidence_n, amount_kg_sum)
+     VALUES (?, ?, 1, ?, ?, ?)
+     ON CONFLICT(session_id, category) DO UPDATE SET
+       count          = count + 1,
+       confidence_sum = confidence_sum + excluded.confidence_sum,
+       confidence_n   = confidence_n + excluded.confidence_n,
+       amount_kg_sum  = CASE
+                          WHEN excluded.amount_kg_sum IS NULL THEN amount_kg_sum
+                          ELSE COALESCE(amount_kg_sum, 0) + excluded.amount_kg_sum
+                        END`
+  );
+
+  const tx = db.transaction(() => {
+    let inserted = 0;
+    for (const r of results) {
+      if (!r.category) continue;
+      const { category, amount_kg, confidence, ...extra } = r;
+      const extraJson = Object.keys(extra).length > 0 ? JSON.stringify(extra) : null;
+      ins.run(sessionId, category, amount_kg ?? null, confidence ?? null, extraJson);
+      bump.run(sessionId, category, confidence ?? 0, confidence == null ? 0 : 1, amount_kg ?? null);
+      inserted++;
+    }
+    return inserted;
+  });
+
+  return tx();
+}
+
+/**
+ * Per-category rollup rows for a session (one row per category).
+ */
+export function getCategoryStats(sessionId) {
+  const db = getDb();
+  return db
+    .prepare(
+      `SELECT category, count, confidence_sum, confidence_n, amount_kg_sum
+       FROM session_category_stats WHERE session_id = ?`
+    )
+    .all(sessionId);
+}
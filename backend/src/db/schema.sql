@@ -25,7 +25,24 @@ CREATE TABLE IF NOT EXISTS detection_results (
   FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
 );
 
+-- Per-session, per-category rollup of detection_results, maintained on
+-- write so summaries never need to re-scan a session's detections.
+-- confidence_n / amount_kg_sum keep AVG / SUM semantics (NULLs ignored).
+CREATE TABLE IF NOT EXISTS session_category_stats (
+  session_id      TEXT    NOT NULL,
+  category        TEXT    NOT NULL,
+  count           INTEGER NOT NULL DEFAULT 0,
+  confidence_sum  REAL    NOT NULL DEFAULT 0,
+  confidence_n    INTEGER NOT NULL DEFAULT 0,
+  amount_kg_sum   REAL,
+  PRIMARY KEY (session_id, category),
+  FOREIGN KEY (session_id) REFERENCES sessions(session_id) ON DELETE CASCADE
+);
+
 -- Indices for common queries
 CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON sessions(start_time DESC);
 CREATE INDEX IF NOT EXISTS idx_sessions_session_id ON sessions(session_id);
-CREATE INDEX IF NOT EXISTS idx_results_session_id  ON detection_results(session_id);
+-- (session_id, category) serves per-session lookups and per-category rollups;
+-- it supersedes the old single-column idx_results_session_id.
+DROP INDEX IF EXISTS idx_results_session_id;
+CREATE INDEX IF NOT EXISTS idx_results_session_category ON detection_results(session_id, category);
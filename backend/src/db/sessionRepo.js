@@ -5,36 +5,50 @@ import { getDb } from './sqlite.js';
 /* ------------------------------------------------------------------ */
 export function listSessions({ limit = 20, offset = 0 } = {}) {
   const db = getDb();
+
+  // One query: the page of sessions joined to their precomputed
+  // per-category rollup (maintained on write), plus the total count.
   const rows = db
     .prepare(
-      `SELECT session_id, device_id, name, meal_type, start_time, end_time, duration_sec, summary_json, created_at
-       FROM sessions
-       ORDER BY start_time DESC
-       LIMIT ? OFFSET ?`
+      `WITH page AS (
+         SELECT session_id, device_id, name, meal_type, start_time, end_time, duration_sec, summary_json, created_at
+         FROM sessions
+         ORDER BY start_time DESC
+         LIMIT ? OFFSET ?
+       )
+       SELECT page.*,
+              c.category, c.amount_kg_sum AS total_kg, c.count,
+              (SELECT COUNT(*) FROM sessions) AS total
+       FROM page
+       LEFT JOIN session_category_stats c ON c.session_id = page.session_id
+       ORDER BY page.start_time DESC, page.session_id, total_kg DESC`
     )
     .all(limit, offset);
 
-  const countRow = db.prepare('SELECT COUNT(*) AS total FROM sessions').get();
-
-  // Attach per-category breakdown to each session
-  const catStmt = db.prepare(
-    `SELECT category, SUM(amount_kg) AS total_kg, COUNT(*) AS count
-     FROM detection_results WHERE session_id = ?
-     GROUP BY category ORDER BY total_kg DESC`
-  );
+  const sessions = [];
+  let current = null;
+  for (const row of rows) {
+    if (!current || current.session_id !== row.session_id) {
+      current = { ...formatSession(row), categories: [] };
+      sessions.push(current);
+    }
+    if (row.count !== null) {
+      current.categories.push({
+        category: row.category,
+        total_kg: row.total_kg,
+        count: row.count,
+      });
+    }
+  }
 
-  const sessions = rows.map((row) => {
-    const categories = catStmt.all(row.session_id).map((c) => ({
-      category: c.category,
-      total_kg: c.total_kg,
-      count: c.count,
-    }));
-    return { ...formatSession(row), categories };
-  });
+  // An empty page (offset past the end) carries no total; count separately
+  const total = rows.length > 0
+    ? rows[0].total
+    : db.prepare('SELECT COUNT(*) AS total FROM sessions').get().total;
 
   return {
     sessions,
-    total: countRow.total,
+    total,
     limit,
     offset,
   };
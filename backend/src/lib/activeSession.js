@@ -0,0 +1,106 @@
+import { createHash } from 'crypto';
+import { getDb } from '../db/sqlite.js';
+import { getConfig } from '../config.js';
+
+/**
+ * In-memory cache of the GET /api/sessions/active response.
+ *
+ * Devices poll the active session every second or so, so the response is
+ * built once, kept serialized with a content-hash ETag, and only rebuilt
+ * after a handler that changes session state calls
+ * invalidateActiveSession() (start, stop, ingest, detections).  A short
+ * TTL (ACTIVE_CACHE_TTL_MS) also picks up writes made outside this process,
+ * e.g. by the seed scripts.
+ *
+ * Long-poll requests park a waiter here and are released as soon as the
+ * ETag changes.
+ */
+
+let _cached = null; // { json, etag, loadedAt }
+const _waiters = new Set();
+
+function load() {
+  const row = getDb().prepare(
+    `SELECT session_id, device_id, start_time, end_time, duration_sec, summary_json, created_at
+     FROM sessions
+     WHERE end_time IS NULL
+     ORDER BY created_at DESC
+     LIMIT 1`
+  ).get();
+
+  const body = row
+    ? {
+        active: true,
+        session: {
+          session_id: row.session_id,
+          device_id: row.device_id,
+          start_time: row.start_time,
+          summary: row.summary_json ? JSON.parse(row.summary_json) : null,
+          created_at: row.created_at,
+        },
+      }
+    : { active: false, session: null };
+
+  const json = JSON.stringify(body);
+  const etag = `"${createHash('sha1').update(json).digest('hex').slice(0, 16)}"`;
+  return { json, etag, loadedAt: Date.now() };
+}
+
+/**
+ * Current active-session state: { json, etag }.  Served from memory unless
+ * invalidated or older than the TTL.
+ */
+export function getActiveSession() {
+  const { activeCacheTtlMs } = getConfig();
+  if (_cached && Date.now() - _cached.loadedAt <= activeCacheTtlMs) return _cached;
+
+  const previous = _cached;
+  _cached = load();
+  if (!previous || previous.etag !== _cached.etag) {
+    for (const wake of [..._waiters]) wake(_cached);
+  }
+  return _cached;
+}
+
+/**
+ * Expire the cached state after a write.  Rebuilt immediately if any
+ * long-poll request is waiting, otherwise on the next read.
+ */
+export function invalidateActiveSession() {
+  // Expire rather than drop it, so the rebuild can compare ETags
+  if (_cached) _cached.loadedAt = -Infinity;
+  if (_waiters.size > 0) getActiveSession();
+}
+
+/**
+ * Resolve with the new state once its ETag differs from `etag`, or with
+ * null after `timeoutMs` or when `signal` aborts (client went away).
+ */
+export function waitForChange(etag, timeoutMs, signal) {
+  return new Promise((resolve) => {
+    let timer = null;
+    const finish = (state) => {
+      clearTimeout(timer);
+      _waiters.delete(wake);
+      resolve(state);
+    };
+    const wake = (state) => {
+      if (state.etag !== etag) finish(state);
+    };
+
+    timer = setTimeout(() => finish(null), timeoutMs);
+    signal?.addEventListener('abort', () => finish(null), { once: true });
+    _waiters.add(wake);
+  });
+}
+
+/**
+ * True if an If-None-Match header matches `etag` (handles lists, W/ and *).
+ */
+export function etagMatches(header, etag) {
+  if (!header) return false;
+  return header.split(',').some((tag) => {
+    const t = tag.trim().replace(/^W\//, '');
+    return t === '*' || t === etag;
+  });
+}
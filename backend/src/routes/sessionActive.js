@@ -1,35 +1,41 @@
-import { sendJson } from '../lib/http.js';
-import { getDb } from '../db/sqlite.js';
+import { getActiveSession, waitForChange, etagMatches } from '../lib/activeSession.js';
+
+// Upper bound for ?wait=, kept below common proxy idle timeouts
+const MAX_WAIT_SEC = 30;
 
 /**
  * GET /api/sessions/active
  * Returns the currently active session (end_time IS NULL), or null if none.
  * The RPi polls this endpoint to know when to start/stop capturing.
+ *
+ * Served from an in-memory cache with an ETag: a poll that sends the last
+ * ETag in If-None-Match gets 304 with no body while nothing has changed.
+ * With ?wait=<seconds> (max 30) such a poll is held open until the state
+ * changes (200 with the new state) or the wait runs out (304).
  */
-export function handleSessionActive(req, res) {
-  const db = getDb();
+export async function handleSessionActive(req, res, query = {}) {
+  let state = getActiveSession();
+  const ifNoneMatch = req.headers['if-none-match'];
 
-  const row = db.prepare(
-    `SELECT session_id, device_id, start_time, end_time, duration_sec, summary_json, created_at
-     FROM sessions
-     WHERE end_time IS NULL
-     ORDER BY created_at DESC
-     LIMIT 1`
-  ).get();
+  const waitSec = Math.min(Math.max(Number(query.wait) || 0, 0), MAX_WAIT_SEC);
+  if (waitSec > 0 && etagMatches(ifNoneMatch, state.etag)) {
+    const aborted = new AbortController();
+    res.on('close', () => aborted.abort());
+    state = (await waitForChange(state.etag, waitSec * 1000, aborted.signal)) ?? getActiveSession();
+    if (res.destroyed) return;
+  }
 
-  if (!row) {
-    sendJson(res, 200, { active: false, session: null });
+  const headers = { ETag: state.etag, 'Cache-Control': 'no-cache' };
+  if (etagMatches(ifNoneMatch, state.etag)) {
+    res.writeHead(304, headers);
+    res.end();
     return;
   }
 
-  sendJson(res, 200, {
-    active: true,
-    session: {
-      session_id: row.session_id,
-      device_id: row.device_id,
-      start_time: row.start_time,
-      summary: row.summary_json ? JSON.parse(row.summary_json) : null,
-      created_at: row.created_at,
-    },
+  res.writeHead(200, {
+    ...headers,
+    'Content-Type': 'application/json',
+    'Content-Length': Buffer.byteLength(state.json),
   });
+  res.end(state.json);
 }
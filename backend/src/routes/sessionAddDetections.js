@@ -1,10 +1,13 @@
 import { parseBody, sendJson, sendError } from '../lib/http.js';
 import { getDb } from '../db/sqlite.js';
+import { appendResults, getCategoryStats } from '../db/resultRepo.js';
+import { invalidateActiveSession } from '../lib/activeSession.js';
 
 /**
  * POST /api/sessions/:session_id/detections
  * Adds detection results to an active session (appends, does not replace).
- * Also updates the session summary_json with cumulative counts.
+ * Also updates the session summary_json with cumulative counts, read from
+ * the session_category_stats rollup rather than re-aggregating every row.
  *
  * Expected body: { results: [{ category, confidence, amount_kg?, ... }] }
  */
@@ -29,44 +32,33 @@ export async function handleAddDetections(req, res, sessionId) {
     return;
   }
 
-  // Insert new detection results
-  const ins = db.prepare(
-    `INSERT INTO detection_results (session_id, category, amount_kg, confidence, extra_json)
-     VALUES (?, ?, ?, ?, ?)`
-  );
-
+  // Append results and refresh the summary from the per-category rollup.
+  // Both are O(batch size + categories), not O(session length).
   const tx = db.transaction(() => {
-    for (const r of body.results) {
-      if (!r.category) continue;
-      const { category, amount_kg, confidence, ...extra } = r;
-      const extraJson = Object.keys(extra).length > 0 ? JSON.stringify(extra) : null;
-      ins.run(sessionId, category, amount_kg ?? null, confidence ?? null, extraJson);
-    }
-  });
-  tx();
+    appendResults(sessionId, body.results);
 
-  // Recompute summary from all detection_results for this session
-  const allResults = db.prepare(
-    `SELECT category, COUNT(*) AS cnt, AVG(confidence) AS avg_conf
-     FROM detection_results WHERE session_id = ?
-     GROUP BY category`
-  ).all(sessionId);
+    const stats = getCategoryStats(sessionId);
+    const totalItems = stats.reduce((s, r) => s + r.count, 0);
+    const categoryBreakdown = {};
+    for (const r of stats) {
+      categoryBreakdown[r.category] = r.count;
+    }
 
-  const totalItems = allResults.reduce((s, r) => s + r.cnt, 0);
-  const categoryBreakdown = {};
-  for (const r of allResults) {
-    categoryBreakdown[r.category] = r.cnt;
-  }
+    const summary = {
+      total_items: totalItems,
+      categories_detected: stats.length,
+      category_breakdown: categoryBreakdown,
+    };
 
-  const summary = {
-    total_items: totalItems,
-    categories_detected: allResults.length,
-    category_breakdown: categoryBreakdown,
-  };
+    db.prepare(
+      `UPDATE sessions SET summary_json = ?, updated_at = datetime('now') WHERE session_id = ?`
+    ).run(JSON.stringify(summary), sessionId);
 
-  db.prepare(
-    `UPDATE sessions SET summary_json = ?, updated_at = datetime('now') WHERE session_id = ?`
-  ).run(JSON.stringify(summary), sessionId);
+    return totalItems;
+  });
+  const totalItems = tx();
+  // The active-session response carries the summary
+  invalidateActiveSession();
 
   sendJson(res, 201, {
     status: 'accepted',
@@ -2,6 +2,7 @@ import { parseBody, sendJson, sendError } from '../lib/http.js';
 import { validateSessionPayload } from '../validation/sessionPayload.js';
 import { upsertSession } from '../db/sessionRepo.js';
 import { replaceResults } from '../db/resultRepo.js';
+import { invalidateActiveSession } from '../lib/activeSession.js';
 
 /**
  * POST /api/sessions
@@ -42,6 +43,7 @@ export async function handleSessionIngest(req, res) {
   if (Array.isArray(results) && results.length > 0) {
     replaceResults(session_id, results);
   }
+  invalidateActiveSession();
 
   sendJson(res, 201, { status: 'accepted', session_id });
 }
@@ -1,6 +1,7 @@
 import { randomUUID } from 'crypto';
 import { parseBody, sendJson } from '../lib/http.js';
 import { upsertSession } from '../db/sessionRepo.js';
+import { invalidateActiveSession } from '../lib/activeSession.js';
 
 /**
  * POST /api/sessions/start
@@ -25,6 +26,7 @@ export async function handleSessionStart(req, res) {
     duration_sec: null,
     summary: { total_items: 0, categories_detected: 0, category_breakdown: {} },
   });
+  invalidateActiveSession();
 
   sendJson(res, 201, { status: 'started', session_id, start_time: now, name, meal_type });
 }
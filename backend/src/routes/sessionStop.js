@@ -1,5 +1,6 @@
 import { sendJson, sendError } from '../lib/http.js';
 import { getDb } from '../db/sqlite.js';
+import { invalidateActiveSession } from '../lib/activeSession.js';
 
 /**
  * POST /api/sessions/:session_id/stop
@@ -24,6 +25,7 @@ export function handleSessionStop(req, res, sessionId) {
   db.prepare(
     `UPDATE sessions SET end_time = ?, duration_sec = ?, updated_at = datetime('now') WHERE session_id = ?`
   ).run(now, durationSec, sessionId);
+  invalidateActiveSession();
 
   sendJson(res, 200, { status: 'stopped', session_id: sessionId, end_time: now, duration_sec: durationSec });
 }
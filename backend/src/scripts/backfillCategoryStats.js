@@ -0,0 +1,15 @@
+/**
+ * Rebuild the session_category_stats rollup from detection_results.
+ * Runs automatically the first time a pre-rollup database is opened;
+ * use this to re-run it by hand (e.g. after editing rows directly).
+ * Usage: cd backend && npm run backfill-stats [-- <session_id>]
+ */
+import { getDb } from '../db/sqlite.js';
+import { backfillCategoryStats } from '../db/migrate.js';
+
+const db = getDb();
+const sessionId = process.argv[2] || null;
+
+const t0 = Date.now();
+const sessions = backfillCategoryStats(db, sessionId);
+console.log(`Rebuilt category stats for ${sessions} session(s) in ${Date.now() - t0}ms.`);
@@ -0,0 +1,129 @@
+/**
+ * Benchmark the session list query against a year of multi-station data.
+ * Seeds a separate database (never the live one) with DAYS x STATIONS x 3
+ * meal sessions, then times listSessions() pages next to the old
+ * per-session GROUP BY over detection_results.
+ * Usage: cd backend && npm run bench-list [-- --days 365 --stations 4 --results 400 --rounds 50]
+ * Re-running reuses the seeded database; pass --reseed to rebuild it.
+ */
+import { existsSync, rmSync } from 'fs';
+import { getConfig } from '../config.js';
+import { getDb } from '../db/sqlite.js';
+import { upsertSession, listSessions } from '../db/sessionRepo.js';
+import { replaceResults } from '../db/resultRepo.js';
+
+// getConfig() reads the environment at call time, so this redirects getDb()
+process.env.DB_PATH = process.env.BENCH_DB_PATH || './data/bench.sqlite';
+
+const args = process.argv.slice(2);
+function arg(name, fallback) {
+  const i = args.indexOf(`--${name}`);
+  return i >= 0 && args[i + 1] !== undefined ? Number(args[i + 1]) : fallback;
+}
+
+const DAYS = arg('days', 365);
+const STATIONS = arg('stations', 4);
+const RESULTS = arg('results', 400); // average detections per session
+const ROUNDS = arg('rounds', 50);
+const LIMIT = 20;
+const MEALS = [['breakfast', 7], ['lunch', 12], ['dinner', 18]];
+const CATEGORIES = ['pizza', 'muffin', 'croissant'];
+
+const { dbPath } = getConfig();
+if (args.includes('--reseed')) {
+  for (const suffix of ['', '-wal', '-shm']) rmSync(dbPath + suffix, { force: true });
+}
+const fresh = !existsSync(dbPath);
+
+const db = getDb();
+
+/* ------------------------------------------------------------------ */
+/*  Seed                                                              */
+/* ------------------------------------------------------------------ */
+if (fresh) {
+  console.log(`Seeding ${DAYS} days x ${STATIONS} stations x ${MEALS.length} meals into ${dbPath}...`);
+  const t0 = Date.now();
+  const day0 = Date.now() - DAYS * 86400_000;
+  let rows = 0;
+
+  const seedDay = db.transaction((d) => {
+    for (let s = 1; s <= STATIONS; s++) {
+      for (const [meal, hour] of MEALS) {
+        const start = new Date(day0 + d * 86400_000 + hour * 3600_000 + s * 60_000);
+        const end = new Date(start.getTime() + 3600_000);
+        const session_id = `bench-${d}-${s}-${meal}`;
+
+        const n = Math.floor(RESULTS * (0.5 + Math.random()));
+        const results = [];
+        for (let j = 0; j < n; j++) {
+          const category = CATEGORIES[Math.floor(Math.random() * CATEGORIES.length)];
+          results.push({
+            category,
+            amount_kg: Math.round(Math.random() * 120) / 1000,
+            confidence: Math.round((0.7 + Math.random() * 0.3) * 100) / 100,
+            device_id: `bin-${s}`,
+          });
+        }
+
+        upsertSession({
+          session_id,
+          device_id: `bin-${s}`,
+          meal_type: meal,
+          start_time: start.toISOString(),
+          end_time: end.toISOString(),
+          duration_sec: 3600,
+          summary: { total_detections: n },
+        });
+        replaceResults(session_id, results);
+        rows += n;
+      }
+    }
+  });
+
+  for (let d = 0; d < DAYS; d++) {
+    seedDay(d);
+    if ((d + 1) % 30 === 0) console.log(`  ${d + 1}/${DAYS} days...`);
+  }
+  console.log(`Seeded ${rows} detection rows in ${Date.now() - t0}ms.`);
+}
+
+/* ------------------------------------------------------------------ */
+/*  Old list query: one GROUP BY over detection_results per session   */
+/* ------------------------------------------------------------------ */
+function listSessionsPerSession({ limit, offset }) {
+  const rows = db
+    .prepare('SELECT * FROM sessions ORDER BY start_time DESC LIMIT ? OFFSET ?')
+    .all(limit, offset);
+  db.prepare('SELECT COUNT(*) AS total FROM sessions').get();
+  const catStmt = db.prepare(
+    `SELECT category, SUM(amount_kg) AS total_kg, COUNT(*) AS count
+     FROM detection_results WHERE session_id = ?
+     GROUP BY category ORDER BY total_kg DESC`
+  );
+  return rows.map((row) => ({ ...row, categories: catStmt.all(row.session_id) }));
+}
+
+function time(fn, offset) {
+  const samples = [];
+  for (let i = 0; i < ROUNDS; i++) {
+    const t0 = process.hrtime.bigint();
+    fn({ limit: LIMIT, offset });
+    samples.push(Number(process.hrtime.bigint() - t0) / 1e6);
+  }
+  samples.sort((a, b) => a - b);
+  return { p50: samples[Math.floor(samples.length / 2)], p95: samples[Math.floor(samples.length * 0.95)] };
+}
+
+const total = db.prepare('SELECT COUNT(*) AS n FROM sessions').get().n;
+const results = db.prepare('SELECT COUNT(*) AS n FROM detection_results').get().n;
+console.log(`\n${total} sessions, ${results} detection rows; ${ROUNDS} rounds per page, limit ${LIMIT}\n`);
+console.log('page offset    rollup p50/p95 (ms)    per-session p50/p95 (ms)');
+
+for (const offset of [0, Math.floor(total / 2), Math.max(0, total - LIMIT)]) {
+  const a = time(listSessions, offset);
+  const b = time(listSessionsPerSession, offset);
+  console.log(
+    `${String(offset).padStart(11)}    ${a.p50.toFixed(2).padStart(7)} / ${a.p95.toFixed(2).padEnd(10)}` +
+    `  ${b.p50.toFixed(2).padStart(7)} / ${b.p95.toFixed(2)}`
+  );
+}
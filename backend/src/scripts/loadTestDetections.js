@@ -0,0 +1,76 @@
+/**
+ * Load test for POST /api/sessions/:id/detections using the payload the
+ * Python session daemon (run_session.py) sends once per captured frame.
+ * Starts a session, appends --posts batches to it, stops it, and prints
+ * latency per slice of the run.  With the incremental rollup, the last
+ * slice should be as fast as the first one.
+ *
+ * Usage: cd backend && npm run load-test -- [--url http://localhost:3001] [--posts 5000] [--batch 1]
+ */
+const args = Object.fromEntries(
+  process.argv.slice(2).reduce((pairs, arg, i, all) => {
+    if (arg.startsWith('--')) pairs.push([arg.slice(2), all[i + 1]]);
+    return pairs;
+  }, [])
+);
+
+const BASE_URL = args.url || process.env.BACKEND_URL || 'http://localhost:3001';
+const POSTS = parseInt(args.posts || '5000', 10);
+const BATCH = parseInt(args.batch || '1', 10);
+const SLICES = 10;
+const DEVICE_SECRET = process.env.DEVICE_SECRET || 'device-secret-changeme';
+
+const CATEGORIES = ['pizza', 'muffin', 'croissant'];
+const FIXED_WEIGHT_KG = { pizza: 0.12, muffin: 0.09, croissant: 0.069 };
+
+/** Same shape as run_session.build_results_payload() */
+function daemonResult() {
+  const category = CATEGORIES[Math.floor(Math.random() * CATEGORIES.length)];
+  return {
+    category,
+    confidence: Math.round((0.6 + Math.random() * 0.4) * 10000) / 10000,
+    amount_kg: FIXED_WEIGHT_KG[category],
+    count: 1,
+    total_area_px: Math.floor(Math.random() * 20000),
+  };
+}
+
+async function post(path, body) {
+  const res = await fetch(`${BASE_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', 'X-Device-Secret': DEVICE_SECRET },
+    body: JSON.stringify(body),
+  });
+  const json = await res.json();
+  if (!res.ok) throw new Error(`POST ${path} → ${res.status}: ${json.error}`);
+  return json;
+}
+
+function pct(sorted, p) {
+  return sorted[Math.min(sorted.length - 1, Math.floor((p / 100) * sorted.length))];
+}
+
+const { session_id } = await post('/api/sessions/start', { name: 'load-test' });
+console.log(`Session ${session_id}: ${POSTS} posts × ${BATCH} result(s) → ${BASE_URL}`);
+
+const latencies = [];
+const t0 = performance.now();
+for (let i = 0; i < POSTS; i++) {
+  const results = Array.from({ length: BATCH }, daemonResult);
+  const start = performance.now();
+  await post(`/api/sessions/${session_id}/detections`, { results });
+  latencies.push(performance.now() - start);
+}
+const elapsed = (performance.now() - t0) / 1000;
+
+await post(`/api/sessions/${session_id}/stop`, {});
+
+const sliceSize = Math.ceil(POSTS / SLICES);
+console.log('\n  rows before slice   p50 ms   p95 ms');
+for (let s = 0; s < SLICES; s++) {
+  const slice = latencies.slice(s * sliceSize, (s + 1) * sliceSize).sort((a, b) => a - b);
+  if (slice.length === 0) break;
+  const rows = String(s * sliceSize * BATCH).padStart(17);
+  console.log(`${rows}   ${pct(slice, 50).toFixed(2).padStart(6)}   ${pct(slice, 95).toFixed(2).padStart(6)}`);
+}
+console.log(`\n${POSTS} posts in ${elapsed.toFixed(1)}s (${(POSTS / elapsed).toFixed(0)} req/s)`);
@@ -29,7 +29,8 @@ function log(req, status) {
 function setCorsHeaders(res) {
   res.setHeader('Access-Control-Allow-Origin', '*');
   res.setHeader('Access-Control-Allow-Methods', 'GET, POST, OPTIONS');
-  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Device-Secret');
+  res.setHeader('Access-Control-Allow-Headers', 'Content-Type, Authorization, X-Device-Secret, If-None-Match');
+  res.setHeader('Access-Control-Expose-Headers', 'ETag');
   res.setHeader('X-Content-Type-Options', 'nosniff');
 }
 
@@ -64,10 +65,10 @@ async function router(req, res) {
       return;
     }
 
-    // GET /api/sessions/active — currently active session
+    // GET /api/sessions/active — currently active session (cached, ETag, ?wait= long-poll)
     // (must be matched BEFORE the generic /api/sessions route)
     if (req.method === 'GET' && pathname === '/api/sessions/active') {
-      handleSessionActive(req, res);
+      await handleSessionActive(req, res, query);
       log(req, res.statusCode);
       return;
     }
@@ -0,0 +1,177 @@
+"""
+Benchmark cascade mode (gate → full classifier) against the full
+classifier alone on a labelled sample set.
+
+The sample set is a directory with one sub-directory per label:
+
+    samples/
+      nothing/    empty-bin frames
+      pizza/
+      muffin/
+      croissant/
+
+Reports mean per-frame latency (resize + invokes) for both modes, the
+gate's skip rate per true label (skipped food frames are lost detections),
+top-1 accuracy of both modes and every frame whose answer changed.
+
+A second, batched pass (--batch frames per predict_batch call) shows what
+the cascade's varying pass count costs the interpreter: how often it was
+resized (each one an allocate_tensors) and how many padding frames were
+invoked to keep the allocated batch instead.
+
+Usage:
+    python bench_cascade.py --data ./samples
+    python bench_cascade.py --data ./samples --mode model --gate-size 96 --threshold 0.95
+    python bench_cascade.py --data ./samples --batch 8
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_samples(root: str, labels: list[str]) -> list[tuple[str, str]]:
+    samples = []
+    for label in labels:
+        for path in sorted(glob.glob(os.path.join(root, label, "*"))):
+            samples.append((label, path))
+    return samples
+
+
+def run(model, frames: list, repeat: int) -> tuple[list[float], list[str], list[bool]]:
+    """Per-frame median latency (ms), predicted label and whether the gate skipped it."""
+    from server.yolo.yolo import LABELS
+
+    latencies, predictions, skipped = [], [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.predict(frames[0])  # warm-up (allocations, XNNPACK packing)
+        for frame in frames:
+            before = model.gate.skipped if model.gate else 0
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                _, probs = model.predict(frame)
+                times.append((time.perf_counter() - t0) * 1000)
+            latencies.append(statistics.median(times))
+            predictions.append(LABELS[int(np.argmax(probs))])
+            skipped.append(bool(model.gate) and model.gate.skipped > before)
+    return latencies, predictions, skipped
+
+
+def run_batched(model, frames: list, batch: int, repeat: int) -> float:
+    """Mean per-frame latency (ms) with ``batch`` frames per predict_batch call."""
+    chunks = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for chunk in chunks:
+                model.predict_batch(chunk)
+    return (time.perf_counter() - t0) * 1000 / (len(frames) * repeat)
+
+
+def reallocation_ms(model, batch: int, repeat: int = 10) -> float:
+    """Median extra cost (ms) of a resize + allocate_tensors and the first invoke after it."""
+    h, w = model.input_size
+    sizes = (batch, batch + 1)
+    before = model.reallocations
+    costs = []
+    for i in range(2 * repeat):
+        rgb = np.zeros((sizes[i % 2], h, w, 3), np.uint8)
+        t0 = time.perf_counter()
+        with model._lock:
+            model._allocate(len(rgb))
+        model._invoke(rgb)
+        first = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        model._invoke(rgb)
+        costs.append((first - (time.perf_counter() - t0)) * 1000)
+    model.reallocations = before
+    return statistics.median(costs[2:])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--data", required=True, help="Directory with one sub-directory of images per label")
+    p.add_argument("--repeat", type=int, default=5, help="Timed runs per frame (median is kept)")
+    p.add_argument("--mode", choices=("background", "model"), default=None, help="Override GATE_MODE")
+    p.add_argument("--gate-size", type=int, default=None, help="Override GATE_SIZE (model gate)")
+    p.add_argument("--threshold", type=float, default=None, help="Override GATE_NOTHING_THRESHOLD")
+    p.add_argument("--batch", type=int, default=4, help="Frames per call in the batched pass")
+    args = p.parse_args(argv)
+
+    # gate.py reads its configuration at import time
+    if args.mode is not None:
+        os.environ["GATE_MODE"] = args.mode
+    if args.gate_size is not None:
+        os.environ["GATE_SIZE"] = str(args.gate_size)
+    if args.threshold is not None:
+        os.environ["GATE_NOTHING_THRESHOLD"] = str(args.threshold)
+
+    from server.yolo.decode import read_image
+    from server.yolo.yolo import LABELS, FoodClassifier
+
+    samples = load_samples(args.data, LABELS)
+    if not samples:
+        sys.exit(f"No images under {args.data}/<label>/ for labels {LABELS}")
+    frames = [read_image(path) for _, path in samples]
+    truth = [label for label, _ in samples]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        full_model = FoodClassifier(cascade=False)
+        cascade_model = FoodClassifier(cascade=True)
+    if full_model.model is None or cascade_model.gate is None:
+        sys.exit("Model or cascade gate failed to load")
+
+    full_ms, full_pred, _ = run(full_model, frames, args.repeat)
+    cascade_ms, cascade_pred, skipped = run(cascade_model, frames, args.repeat)
+    gate = cascade_model.gate.stats()
+
+    def accuracy(pred):
+        return sum(p == t for p, t in zip(pred, truth)) / len(truth)
+
+    print(f"{len(samples)} frames: " + ", ".join(f"{l} {truth.count(l)}" for l in LABELS if l in truth))
+    print(f"Gate: {gate['gate']}, skip if P(nothing) ≥ {gate['threshold']:.0%}")
+    if "learned" in gate:
+        print(f"Reference learned from {gate['learned']} classifier-confirmed empty frame(s)")
+    print()
+    print(f"{'mode':<10}{'mean ms/frame':>15}{'p95 ms':>10}{'accuracy':>10}")
+    for name, ms, pred in (("full", full_ms, full_pred), ("cascade", cascade_ms, cascade_pred)):
+        p95 = sorted(ms)[min(len(ms) - 1, round(0.95 * (len(ms) - 1)))]
+        print(f"{name:<10}{statistics.mean(ms):>15.2f}{p95:>10.2f}{accuracy(pred):>10.1%}")
+    print(f"\nLatency reduction: {1 - statistics.mean(cascade_ms) / statistics.mean(full_ms):.1%}")
+
+    print(f"Skip rate: {sum(skipped) / len(skipped):.1%} of frames never reached the full classifier")
+    for label in LABELS:
+        idx = [i for i, t in enumerate(truth) if t == label]
+        if idx:
+            print(f"  {label:<10} {sum(skipped[i] for i in idx)}/{len(idx)} skipped")
+
+    full_batch_ms = run_batched(full_model, frames, args.batch, args.repeat)
+    before = (cascade_model.reallocations, cascade_model.padded_frames)
+    cascade_batch_ms = run_batched(cascade_model, frames, args.batch, args.repeat)
+    reallocations = cascade_model.reallocations - before[0]
+    padded = cascade_model.padded_frames - before[1]
+    print(f"\nBatches of {args.batch}: full {full_batch_ms:.2f} ms/frame, cascade {cascade_batch_ms:.2f} ms/frame")
+    print(f"  cascade interpreter: {reallocations} reallocation(s), {padded} padding frame(s) invoked")
+    print(f"  one reallocation (resize, allocate_tensors, first invoke) adds "
+          f"{reallocation_ms(cascade_model, args.batch):.2f} ms, "
+          f"a padding frame about {full_batch_ms:.2f} ms (INVOKE_SHRINK_CALLS=1 resizes to every batch instead)")
+
+    changed = [i for i in range(len(samples)) if full_pred[i] != cascade_pred[i]]
+    print(f"\nChanged answers: {len(changed)}")
+    for i in changed:
+        print(f"  {samples[i][1]}: {truth[i]} — full {full_pred[i]}, cascade {cascade_pred[i]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark full-size vs reduced-resolution decoding of still images.
+
+For each image, times:
+  cv2.imread   full decode, as run_session / run_detect used to do
+  PIL full     full decode, as /api/detect used to do
+  reduced      server/yolo/decode.read_image (JPEG DCT scaling + EXIF)
+each followed by the resize to the model input, and reports the decoded
+frame size, the peak traced allocation per decode and — when the model is
+available — whether the classifier's answer changes.
+
+Usage:
+    python bench_decode.py                      # the sample images next to this script
+    python bench_decode.py --repeat 50 ./frames/*.jpg
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.yolo.decode import read_image
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_SIZE = (224, 224)
+
+
+def decode_cv2(path: str) -> np.ndarray:
+    return cv2.imread(path)
+
+
+def decode_pil_full(path: str) -> np.ndarray:
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))[:, :, ::-1]
+
+
+DECODERS = {
+    "cv2.imread": decode_cv2,
+    "PIL full": decode_pil_full,
+    "reduced": read_image,
+}
+
+
+def measure(decode, path: str, repeat: int) -> dict:
+    frame = decode(path)  # warm-up (file cache, codec init)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cv2.resize(decode(path), MODEL_SIZE)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    tracemalloc.start()
+    cv2.resize(decode(path), MODEL_SIZE)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ms": statistics.median(times),
+        "shape": frame.shape,
+        "frame_kib": frame.nbytes / 1024,
+        "peak_kib": peak / 1024,
+        "frame": frame,
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("images", nargs="*", help="Images to decode (default: sample *.jpg next to this script)")
+    p.add_argument("--repeat", type=int, default=20, help="Timed decodes per image and decoder")
+    p.add_argument("--no-model", action="store_true", help="Skip the classifier agreement check")
+    args = p.parse_args(argv)
+
+    images = args.images or sorted(glob.glob(os.path.join(SCRIPT_DIR, "*.jpg")))
+    if not images:
+        sys.exit("No images to decode")
+
+    model = None
+    if not args.no_model:
+        from server.yolo.yolo import FoodClassifier
+        model = FoodClassifier()
+        if model.model is None:
+            model = None
+
+    speedups = {"cv2.imread": [], "PIL full": []}
+    for path in images:
+        print(f"\n{os.path.basename(path)}")
+        print(f"  {'decoder':<12}{'median ms':>10}{'decoded':>14}{'frame KiB':>11}{'peak KiB':>10}  prediction")
+        rows = {name: measure(fn, path, args.repeat) for name, fn in DECODERS.items()}
+        for name, r in rows.items():
+            pred = ""
+            if model is not None:
+                objects, probs = model.predict(r["frame"])
+                label = objects[0]["label_name"] if objects else "nothing"
+                pred = f"{label} ({float(np.max(probs)):.3f})"
+            h, w = r["shape"][:2]
+            print(f"  {name:<12}{r['ms']:>10.2f}{f'{w}x{h}':>14}{r['frame_kib']:>11.0f}{r['peak_kib']:>10.0f}  {pred}")
+        for name, ratios in speedups.items():
+            ratios.append(rows[name]["ms"] / rows["reduced"]["ms"])
+
+    print()
+    for name, ratios in speedups.items():
+        print(f"Reduced decode is {statistics.median(ratios):.1f}x faster than {name} (median over images)")
+
+
+if __name__ == "__main__":
+    main()
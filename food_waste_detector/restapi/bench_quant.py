@@ -0,0 +1,127 @@
+"""
+Compare a quantized model against the float model on the same frames.
+
+Both models are loaded through FoodClassifier, so each one uses the
+preprocessing it selects from its own input tensor (float normalisation for
+model_unquant.tflite, uint8 passthrough or a lookup table for the int8
+model).  Reports:
+
+  size       model file size
+  latency    median / p95 ms per frame through predict_tensors() on the
+             model-sized RGB frame: preprocessing, invoke and the same
+             bookkeeping the server does (decode and resize are the same
+             for both, and the cascade is off)
+  agreement  top-1 agreement with the float model, and the mean absolute
+             difference of the probabilities
+  accuracy   per model, when the images sit in <label>/ sub-directories
+
+Usage:
+    python bench_quant.py --data ./frames
+    python bench_quant.py --data ./samples --candidate ../model_int8.tflite --repeat 50
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.yolo.decode import read_image
+from server.yolo.model_store import find_model_path
+from server.yolo.yolo import LABELS, FoodClassifier
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load(path: str) -> FoodClassifier:
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = FoodClassifier(cascade=False, model_path=path)
+    if model.model is None:
+        sys.exit(f"Could not load {path}")
+    return model
+
+
+def run(model: FoodClassifier, frames: list[np.ndarray], repeat: int) -> tuple[list[float], np.ndarray]:
+    """Per-frame median latency (ms) and the (n, classes) probabilities."""
+    latencies, probs = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        model.predict_tensors(frames[0][np.newaxis])  # warm-up (allocations, XNNPACK packing)
+        for rgb in frames:
+            batch = rgb[np.newaxis]
+            times = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                _, p = model.predict_tensors(batch)[0]
+                times.append((time.perf_counter() - t0) * 1000)
+            if p is None:
+                sys.exit(f"{model.model_path} failed to classify a frame")
+            latencies.append(statistics.median(times))
+            probs.append(p)
+    return latencies, np.array(probs)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--data", required=True, help="Directory of images (label sub-directories optional)")
+    p.add_argument("--reference", default=None, help="Float model (default: MODEL_PATH / model_unquant.tflite)")
+    p.add_argument("--candidate", default=os.path.join(SCRIPT_DIR, "..", "model_int8.tflite"))
+    p.add_argument("--repeat", type=int, default=20, help="Timed invokes per frame (median is kept)")
+    args = p.parse_args(argv)
+
+    reference_path = args.reference or find_model_path()
+    if reference_path is None:
+        sys.exit("Float model not found; pass --reference")
+    models = {"float": load(reference_path), "quantized": load(args.candidate)}
+
+    paths = sorted(p for p in glob.glob(os.path.join(args.data, "**", "*"), recursive=True) if os.path.isfile(p))
+    if not paths:
+        sys.exit(f"No images under {args.data}")
+    h, w = models["float"].input_size
+    frames, truth, kept = [], [], []
+    for path in paths:
+        frame = read_image(path)
+        if frame is None:
+            continue
+        kept.append(path)
+        frames.append(cv2.cvtColor(cv2.resize(frame, (w, h)), cv2.COLOR_BGR2RGB))
+        label = os.path.basename(os.path.dirname(path))
+        truth.append(label if label in LABELS else None)
+
+    results = {name: run(model, frames, args.repeat) for name, model in models.items()}
+    top1 = {name: probs.argmax(axis=1) for name, (_, probs) in results.items()}
+    labelled = [i for i, t in enumerate(truth) if t is not None]
+
+    print(f"{len(frames)} frames from {args.data}\n")
+    print(f"{'model':<11}{'input':<42}{'size KiB':>10}{'median ms':>11}{'p95 ms':>9}{'accuracy':>10}")
+    for name, model in models.items():
+        ms, _ = results[name]
+        p95 = sorted(ms)[min(len(ms) - 1, round(0.95 * (len(ms) - 1)))]
+        acc = ""
+        if labelled:
+            acc = f"{sum(LABELS[top1[name][i]] == truth[i] for i in labelled) / len(labelled):.1%}"
+        size = os.path.getsize(model.model_path) / 1024
+        print(f"{name:<11}{model.input_format:<42}{size:>10.0f}{statistics.median(ms):>11.2f}{p95:>9.2f}{acc:>10}")
+
+    float_ms, float_probs = results["float"]
+    quant_ms, quant_probs = results["quantized"]
+    agree = top1["float"] == top1["quantized"]
+    print(f"\nSpeed-up:        {statistics.median(float_ms) / statistics.median(quant_ms):.2f}x (median)")
+    print(f"Size:            {os.path.getsize(models['quantized'].model_path) / os.path.getsize(models['float'].model_path):.0%} of float")
+    print(f"Top-1 agreement: {agree.mean():.1%} ({int(agree.sum())}/{len(agree)})")
+    print(f"Mean |Δp|:       {np.abs(float_probs - quant_probs).mean():.4f}")
+    for i in np.flatnonzero(~agree):
+        print(f"  {kept[i]}: float {LABELS[top1['float'][i]]} ({float_probs[i].max():.2f}), "
+              f"quantized {LABELS[top1['quantized'][i]]} ({quant_probs[i].max():.2f})")
+
+
+if __name__ == "__main__":
+    main()
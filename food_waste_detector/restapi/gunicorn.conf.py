@@ -0,0 +1,26 @@
+"""
+Gunicorn settings for multi-worker deployments.
+
+    gunicorn main:app -c gunicorn.conf.py
+
+With PRELOAD_MODEL=1 the app (and the model file mapping) is loaded once in
+the master before forking, so workers share the model's page-cache pages.
+The interpreter itself is still created lazily inside each worker.
+"""
+
+import os
+
+from server.memory import format_memory
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.environ.get("PRELOAD_MODEL", "0") == "1"
+
+
+def when_ready(server):
+    server.log.info(f"[memory] master {format_memory()}")
+
+
+def post_fork(server, worker):
+    server.log.info(f"[memory] worker {format_memory()}")
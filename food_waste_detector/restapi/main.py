@@ -1,3 +1,4 @@
+import os
 from typing import Union
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,6 +6,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from routes import index
 from routes.api import detect
 from routes.api import camera
+from routes.api import system
+from routes.api import tensor
+from routes.api import predictions
+from server.yolo.model_store import preload_model
+from server.profiling import install_fastapi
+
+# Map the model file before workers fork (gunicorn --preload) so every
+# worker shares the same page-cache pages.
+if os.environ.get("PRELOAD_MODEL", "0") == "1":
+    preload_model()
 
 app = FastAPI()
 
@@ -19,6 +30,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request stage attribution when profiling is on (PROFILE=1 or
+# POST /api/system/profile); a single flag check per request otherwise.
+install_fastapi(app)
+
 app.include_router(index.router)
 app.include_router(detect.router, prefix="/api")
 app.include_router(camera.router, prefix="/api")
+app.include_router(system.router, prefix="/api")
+app.include_router(tensor.router, prefix="/api")
+app.include_router(predictions.router, prefix="/api")
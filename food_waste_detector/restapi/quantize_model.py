@@ -0,0 +1,119 @@
+"""
+Build a full-integer (int8 weights, uint8 input/output) variant of the
+classifier from a calibration image set.
+
+TFLite can only quantize from the original model, not from the float
+.tflite, so the source is the Teachable Machine "Tensorflow → Keras" export
+(keras_model.h5) or a SavedModel directory.  Calibration images are run
+through the same preprocessing as the server (reduced decode, resize to the
+model input, RGB, x / 127.5 - 1) to pick the activation ranges, so use
+frames from the real camera: empty bins and every food class.
+
+Needs TensorFlow, which the device itself does not — run it on a
+workstation and copy the result next to model_unquant.tflite:
+
+    pip install tensorflow
+    python quantize_model.py --source keras_model.h5 --calibration ./frames
+    python bench_quant.py --data ./frames       # size / latency / agreement
+    MODEL_FILENAME=model_int8.tflite python run_session.py
+
+Usage:
+    python quantize_model.py --source keras_model.h5 --calibration ./frames
+    python quantize_model.py --source ./saved_model --calibration ./frames --samples 300 --output model_int8.tflite
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+
+import cv2
+import numpy as np
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.yolo.decode import read_image
+from server.yolo.quantization import normalise_float
+
+try:
+    import tensorflow as tf
+    TF_AVAILABLE = True
+except ImportError:
+    TF_AVAILABLE = False
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def find_images(root: str) -> list[str]:
+    """Every image under ``root``, recursively, in a stable order."""
+    paths = glob.glob(os.path.join(root, "**", "*"), recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def load_source(source: str):
+    """A tf.lite converter for a Keras file or a SavedModel directory."""
+    if os.path.isdir(source):
+        return tf.lite.TFLiteConverter.from_saved_model(source)
+    model = tf.keras.models.load_model(source, compile=False)
+    return tf.lite.TFLiteConverter.from_keras_model(model)
+
+
+def representative_dataset(paths: list[str], size: tuple[int, int]):
+    """Yield calibration inputs preprocessed exactly like FoodClassifier's float path."""
+    h, w = size
+
+    def gen():
+        for path in paths:
+            frame = read_image(path, min_size=max(h, w))
+            if frame is None:
+                print(f"  skipping unreadable {path}")
+                continue
+            rgb = cv2.cvtColor(cv2.resize(frame, (w, h)), cv2.COLOR_BGR2RGB)
+            yield [normalise_float(rgb[np.newaxis])]
+
+    return gen
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--source", required=True, help="Keras model file (keras_model.h5) or SavedModel directory")
+    p.add_argument("--calibration", required=True, help="Directory of calibration images (searched recursively)")
+    p.add_argument("--samples", type=int, default=200, help="Calibration images to use (random subset)")
+    p.add_argument("--size", type=int, default=224, help="Model input side in px")
+    p.add_argument("--output", default=os.path.join(SCRIPT_DIR, "..", "model_int8.tflite"))
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    if not TF_AVAILABLE:
+        sys.exit("quantize_model.py needs TensorFlow: pip install tensorflow")
+
+    paths = find_images(args.calibration)
+    if not paths:
+        sys.exit(f"No images under {args.calibration}")
+    if len(paths) > args.samples:
+        paths = sorted(random.Random(args.seed).sample(paths, args.samples))
+    if len(paths) < 50:
+        print(f"WARNING: only {len(paths)} calibration images — ranges may not cover real frames")
+
+    converter = load_source(args.source)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(paths, (args.size, args.size))
+    # Full-integer: fail instead of silently keeping float ops
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+
+    print(f"Calibrating on {len(paths)} images from {args.calibration} …")
+    flatbuffer = converter.convert()
+
+    output = os.path.realpath(args.output)
+    with open(output, "wb") as f:
+        f.write(flatbuffer)
+    print(f"Wrote {output} ({len(flatbuffer) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
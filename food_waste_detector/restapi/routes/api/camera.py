@@ -1,21 +1,21 @@
 """
 Camera capture + detection endpoint.
 Captures an image from the Pi Camera and runs food waste detection.
+
+Captures run on the camera service's own thread and are shared: requests
+within CAMERA_FRESHNESS_MS of the last capture (or while one is running)
+get the same frame, and its JPEG and classification are computed once.
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-from server.yolo.yolo import YOLOModel
-from server.camera.camera import get_camera_service
-from PIL import Image
+from server.yolo.yolo import LABELS, get_classifier
+from server.camera.camera import CAMERA_FRESHNESS_MS, CapturedFrame, get_camera_service
+import asyncio
 import base64
-import io
 
 router = APIRouter()
 
-# Reuse the same YOLO model instance
-yolo_model = YOLOModel()
-
 
 @router.get("/camera/status")
 async def camera_status():
@@ -25,13 +25,12 @@ async def camera_status():
         content={
             "available": camera.is_available(),
             "resolution": list(camera.resolution),
+            **camera.stats(),
         }
     )
 
 
-@router.post("/camera/capture")
-async def capture_image():
-    """Capture an image from the Pi Camera and return it as base64."""
+async def _fresh_frame(max_age_ms: float | None) -> CapturedFrame | JSONResponse:
     camera = get_camera_service()
 
     if not camera.is_available():
@@ -40,113 +39,86 @@ async def capture_image():
             status_code=503,
         )
 
-    image = camera.capture_image()
-    if image is None:
+    frame = await camera.capture_frame(CAMERA_FRESHNESS_MS if max_age_ms is None else max_age_ms)
+    if frame is None:
         return JSONResponse(
             content={"error": "Failed to capture image from camera."},
             status_code=500,
         )
+    return frame
+
 
-    # Convert to base64
-    buffer = io.BytesIO()
-    image.save(buffer, format="JPEG", quality=90)
-    base64_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
+def _frame_info(frame: CapturedFrame) -> dict:
+    height, width = frame.array.shape[:2]
+    return {
+        "width": width,
+        "height": height,
+        "frame_seq": frame.seq,
+        "frame_age_ms": round(frame.age_ms, 1),
+    }
 
+
+@router.post("/camera/capture")
+async def capture_image(max_age_ms: float | None = None):
+    """
+    Capture an image from the Pi Camera and return it as base64.
+    ``max_age_ms`` overrides CAMERA_FRESHNESS_MS (0 forces a new capture).
+    """
+    frame = await _fresh_frame(max_age_ms)
+    if isinstance(frame, JSONResponse):
+        return frame
+
+    jpeg = await asyncio.to_thread(frame.jpeg)
     return JSONResponse(
         content={
-            "image_base64": base64_image,
-            "width": image.width,
-            "height": image.height,
+            "image_base64": base64.b64encode(jpeg).decode("utf-8"),
+            **_frame_info(frame),
         }
     )
 
 
+def _classify(frame: CapturedFrame) -> dict | None:
+    model = get_classifier()
+    # RGB888 frames are laid out [B, G, R], which is what predict() expects
+    detected_objects, probs = model.predict(frame.array)
+    if probs is None:
+        return None
+    return {
+        "objects": detected_objects,
+        "probabilities": {LABELS[i]: float(p) for i, p in enumerate(probs)},
+        "model_version": model.model_version,
+    }
+
+
 @router.post("/camera/detect")
-async def capture_and_detect():
+async def capture_and_detect(max_age_ms: float | None = None):
     """
     Capture an image from the Pi Camera and run food waste detection on it.
     This is the main endpoint for the RPi5 + PiCam workflow.
     """
-    camera = get_camera_service()
-
-    if not camera.is_available():
+    if get_classifier().model is None:
         return JSONResponse(
-            content={"error": "Pi Camera is not available. Check connection."},
-            status_code=503,
+            content={"error": "Model is not loaded"}, status_code=503
         )
 
-    # Capture image
-    image = camera.capture_image()
-    if image is None:
-        return JSONResponse(
-            content={"error": "Failed to capture image from camera."},
-            status_code=500,
-        )
-
-    # Run YOLO detection
-    detected_objects, results = yolo_model.predict(image)
+    frame = await _fresh_frame(max_age_ms)
+    if isinstance(frame, JSONResponse):
+        return frame
 
-    if results is None:
+    result, jpeg = await asyncio.gather(
+        asyncio.to_thread(frame.derive, "detect", _classify),
+        asyncio.to_thread(frame.jpeg),
+    )
+    if result is None:
         return JSONResponse(
             content={"error": "Error in object detection"},
             status_code=500,
         )
 
-    # Save annotated image
-    output_image_path = "output_image.jpg"
-    results[0].save(output_image_path)
-
-    # Generate clustering image
-    clustering_image_array = results[0].plot(
-        boxes=False, labels=True, color_mode="class"
-    )
-    clustering_image = Image.fromarray(clustering_image_array)
-    clustering_image_path = "clustering_image.jpg"
-    clustering_image.save(clustering_image_path)
-
-    # Convert images to base64
-    with open(output_image_path, "rb") as f:
-        base64_image = base64.b64encode(f.read()).decode("utf-8")
-
-    with open(clustering_image_path, "rb") as f:
-        base64_clustering_image = base64.b64encode(f.read()).decode("utf-8")
-
-    # Calculate waste percentage
-    garbage_classes = {35.0}
-    ignore_classes = {58.0, 31.0, 42.0, 70.0, 83.0, 25.0, 27.0, 22.0, 11.0, 8.0}
-    plate_area = 0
-    garbage_area = 0
-    food_area = 0
-
-    for obj in detected_objects:
-        if obj["label"] == 58.0:
-            plate_area += obj["area"]
-        if obj["label"] in garbage_classes:
-            garbage_area += obj["area"]
-        if obj["label"] not in garbage_classes and obj["label"] not in ignore_classes:
-            food_area += obj["area"]
-
-    if plate_area == 0:
-        return JSONResponse(
-            content={"error": "No plate detected in the image"},
-            status_code=400,
-        )
-
-    if plate_area > garbage_area:
-        waste_percentage = (food_area / (plate_area - garbage_area)) * 100
-    else:
-        waste_percentage = 0
-
-    waste_percentage = min(max(waste_percentage, 0), 100)
-
     return JSONResponse(
         content={
-            "objects": detected_objects,
-            "image_base64": base64_image,
-            "clustering_image_base64": base64_clustering_image,
-            "waste_percentage": waste_percentage,
-            "food_area": food_area,
-            "garbage_area": garbage_area,
-            "plate_area": plate_area,
+            **result,
+            "image_base64": base64.b64encode(jpeg).decode("utf-8"),
+            **_frame_info(frame),
         }
     )
@@ -1,87 +1,80 @@
 from fastapi import APIRouter, File, UploadFile
 from fastapi.responses import JSONResponse
-from server.yolo.yolo import YOLOModel
-from PIL import Image
-import torch
-import io
-import base64
-import numpy as np
+from server.yolo.yolo import LABELS, get_classifier
+from server.yolo.result_cache import ResultCache, content_key, perceptual_hash
+from server.yolo.decode import decode_image
 
 router = APIRouter()
-yolo_model = YOLOModel()
+
+# Repeat uploads of the same photo are answered from here
+result_cache = ResultCache()
 
 
 @router.post("/detect")
 async def detect_objects(file: UploadFile = File(...)):
     image_bytes = await file.read()
-    image = Image.open(io.BytesIO(image_bytes))
-    detected_objects, results = yolo_model.predict(image)
+    model = get_classifier()
 
-    if results is None:
+    if model.model is None:
         return JSONResponse(
-            content={"error": "Error in object detection"}, status_code=500
+            content={"error": "Model is not loaded"}, status_code=503
         )
 
-    # Save temporary image with detections
-    output_image_path = "output_image.jpg"
-    results[0].save(output_image_path)
-
-    # Save temporary clustering image
-    clustering_image_path = "clustering_image.jpg"
-    clustering_image = generate_clustering_image(results[0])
-    clustering_image.save(clustering_image_path)
-
-    # Convert images to base64
-    with open(output_image_path, "rb") as image_file:
-        base64_image = base64.b64encode(image_file.read()).decode("utf-8")
+    # 1. Exact repeat — no decode, no inference
+    key = content_key(image_bytes, model.model_version)
+    cached = result_cache.get(key, model.model_version)
+    if cached is not None:
+        return _classification_response(cached, "hit")
 
-    with open(clustering_image_path, "rb") as image_file:
-        base64_clustering_image = base64.b64encode(image_file.read()).decode("utf-8")
+    # Decoded at reduced resolution (JPEG DCT scaling), upright per EXIF
+    try:
+        frame = decode_image(image_bytes)
+    except Exception:
+        return JSONResponse(
+            content={"error": "Uploaded file is not a readable image"}, status_code=400
+        )
 
-    # Calculate waste percentage
-    # fork, garbage, knife, spoon,             [cup, cup, cup], chips, bread, board
-    garbage_classes = {35.0}
-    ignore_classes = {58.0, 31.0, 42.0, 70.0, 83.0, 25.0, 27.0, 22.0, 11.0, 8.0}
-    plate_area = 0
-    garbage_area = 0
-    food_area = 0
+    # 2. Optional near-duplicate match (re-encoded copy of the same photo)
+    phash = None
+    if result_cache.near_duplicates_enabled:
+        phash = perceptual_hash(frame)
+        cached = result_cache.get_similar(phash, model.model_version)
+        if cached is not None:
+            return _classification_response(cached, "near")
+
+    # 3. Miss — run the classifier
+    detected_objects, probs = model.predict(frame)
+    if probs is None:
+        return JSONResponse(
+            content={"error": "Error in object detection"}, status_code=500
+        )
 
-    for obj in detected_objects:
-        if obj["label"] == 58.0:
-            plate_area += obj["area"]
+    result = {
+        "objects": detected_objects,
+        "probabilities": {LABELS[i]: float(p) for i, p in enumerate(probs)},
+        "model_version": model.model_version,
+    }
+    result_cache.put(key, model.model_version, result, phash=phash)
+    return _classification_response(result, "miss")
 
-        if obj["label"] in garbage_classes:
-            garbage_area += obj["area"]
 
-        if obj["label"] not in garbage_classes and obj["label"] not in ignore_classes:
-            food_area += obj["area"]
+@router.get("/detect/cache")
+async def detect_cache_stats():
+    """Hit/miss counters and occupancy of the /detect result cache."""
+    return JSONResponse(content=result_cache.stats())
 
-    if plate_area == 0:
-        return JSONResponse(
-            content={"error": "No plate detected in the image"}, status_code=400
-        )
 
-    if plate_area > garbage_area:
-        waste_percentage = (food_area / (plate_area - garbage_area)) * 100
-    else:
-        waste_percentage = 0
+@router.get("/detect/cascade")
+async def detect_cascade_stats():
+    """Frames seen / skipped by the cascade gate in this worker (CASCADE=1)."""
+    gate = get_classifier().gate
+    if gate is None:
+        return JSONResponse(content={"enabled": False})
+    return JSONResponse(content={"enabled": True, **gate.stats()})
 
-    waste_percentage = min(max(waste_percentage, 0), 100)
 
+def _classification_response(result: dict, cache_status: str) -> JSONResponse:
     return JSONResponse(
-        content={
-            "objects": detected_objects,
-            "image_base64": base64_image,
-            "clustering_image_base64": base64_clustering_image,
-            "waste_percentage": waste_percentage,
-            "food_area": food_area,
-            "garbage_area": garbage_area,
-            "plate_area": plate_area,
-        }
+        content={**result, "cache": cache_status},
+        headers={"X-Cache": cache_status.upper()},
     )
-
-
-def generate_clustering_image(result):
-    clustering_image_array = result.plot(boxes=False, labels=True, color_mode="class")
-    clustering_image = Image.fromarray(clustering_image_array)
-    return clustering_image
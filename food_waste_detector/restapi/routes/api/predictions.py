@@ -0,0 +1,76 @@
+"""
+Query and export the on-device prediction log (server/yolo/prediction_log.py).
+
+    GET /api/predictions?start=2026-10-01&end=2026-10-08&label=pizza&min_conf=0.4&max_conf=0.7
+    GET /api/predictions?session_id=…&format=csv
+    GET /api/predictions/status
+
+``start`` / ``end`` take unix seconds or ISO 8601 (local time); the range
+is ``start ≤ t < end``.  The confidence band applies to the top-1 class.
+
+The routes are plain ``def``s: reading the memory-mapped files blocks, so
+they run in the threadpool, and a CSV export streams file by file.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
+from server.yolo.prediction_log import iter_csv, query
+from server.yolo.yolo import LABELS, get_classifier
+
+router = APIRouter()
+
+MAX_JSON_ROWS = 10000
+
+
+def _filters(start, end, label, min_conf, max_conf, session_id) -> dict:
+    def when(value):
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return value  # ISO 8601, parsed by the log
+
+    if label is not None and label not in LABELS:
+        raise ValueError(f"Unknown label {label!r}; use one of {LABELS}")
+    return {
+        "start": when(start),
+        "end": when(end),
+        "label": LABELS.index(label) if label is not None else None,
+        "min_conf": min_conf,
+        "max_conf": max_conf,
+        "session_id": session_id,
+    }
+
+
+@router.get("/predictions")
+def list_predictions(
+    start: str | None = None,
+    end: str | None = None,
+    label: str | None = None,
+    min_conf: float = 0.0,
+    max_conf: float = 1.0,
+    session_id: str | None = None,
+    limit: int = 1000,
+    format: str = "json",
+):
+    try:
+        filters = _filters(start, end, label, min_conf, max_conf, session_id)
+        if format == "csv":
+            return StreamingResponse(
+                iter_csv(LABELS, **filters),
+                media_type="text/csv",
+                headers={"Content-Disposition": "attachment; filename=predictions.csv"},
+            )
+        if format != "json":
+            return JSONResponse(content={"error": "format must be json or csv"}, status_code=400)
+        rows = query(LABELS, limit=max(1, min(limit, MAX_JSON_ROWS)), **filters)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    return JSONResponse(content={"count": len(rows), "predictions": rows})
+
+
+@router.get("/predictions/status")
+def prediction_log_status():
+    """Whether this worker is writing the log, and how big it is on disk."""
+    return JSONResponse(content=get_classifier().prediction_log.stats())
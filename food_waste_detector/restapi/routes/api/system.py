@@ -0,0 +1,36 @@
+"""
+Worker diagnostics.
+Reports the memory footprint of the worker that served the request and
+switches its sampling profiler (server/profiling.py) on or off.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from server.memory import process_memory
+from server.profiling import get_profiler
+
+router = APIRouter()
+
+
+@router.get("/system/memory")
+async def memory_usage():
+    """Return RSS / PSS of the worker process handling this request."""
+    return JSONResponse(content=process_memory())
+
+
+@router.get("/system/profile")
+async def profile_status():
+    """Profiler state of the worker handling this request."""
+    return JSONResponse(content=get_profiler().status())
+
+
+@router.post("/system/profile")
+async def profile_toggle(enabled: bool):
+    """
+    Turn the sampling profiler on or off in this worker
+    (``POST /api/system/profile?enabled=true``).  With several workers,
+    repeat until each pid reports the wanted state.
+    """
+    prof = get_profiler()
+    prof.start() if enabled else prof.stop()
+    return JSONResponse(content={**prof.status(), "pid": process_memory()["pid"]})
@@ -0,0 +1,68 @@
+"""
+Classification of frames a device has already preprocessed.
+
+Devices that resize on their side send the model-sized 224×224 RGB uint8
+buffer (about 150 KB raw, less compressed) instead of a full JPEG, and the
+server feeds it to the classifier with no decode or resize.  See
+server/yolo/tensor_codec.py for the wire format.
+
+The shape header is checked before the body is read, and the body is read
+only up to the size that shape allows, so an oversized upload is refused
+with 413 without being buffered.
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from server.yolo.yolo import LABELS, get_classifier
+from server.yolo.tensor_codec import TensorDecodeError, decode_tensor, expected_size, max_body_size
+
+router = APIRouter()
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """The request body, or TensorDecodeError (413) once it passes ``limit`` bytes."""
+    declared = request.headers.get("Content-Length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise TensorDecodeError(f"Body of {declared} bytes exceeds {limit} for this shape", status=413)
+    chunks, total = [], 0
+    async for chunk in request.stream():
+        total += len(chunk)
+        if total > limit:
+            raise TensorDecodeError(f"Body exceeds {limit} bytes for this shape", status=413)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post("/detect/tensor")
+async def detect_tensor(request: Request):
+    model = get_classifier()
+    if model.model is None:
+        return JSONResponse(
+            content={"error": "Model is not loaded"}, status_code=503
+        )
+
+    shape_header = request.headers.get("X-Tensor-Shape")
+    encoding = request.headers.get("Content-Encoding")
+    try:
+        _, _, size = expected_size(shape_header, model.input_size)
+        body = await _read_body(request, max_body_size(size, encoding))
+        batch, batched = decode_tensor(body, shape_header, encoding, model.input_size)
+    except TensorDecodeError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=e.status)
+
+    outputs = model.predict_tensors(batch)
+    if outputs[0][1] is None:
+        return JSONResponse(
+            content={"error": "Error in object detection"}, status_code=500
+        )
+
+    results = [
+        {
+            "objects": detected_objects,
+            "probabilities": {LABELS[i]: float(p) for i, p in enumerate(probs)},
+        }
+        for detected_objects, probs in outputs
+    ]
+    if batched:
+        return JSONResponse(content={"results": results, "model_version": model.model_version})
+    return JSONResponse(content={**results[0], "model_version": model.model_version})
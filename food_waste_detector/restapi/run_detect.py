@@ -3,7 +3,6 @@ Capture a frame from the RPi camera, run TFLite classification, save the output,
 and send detection results to the TrashTrack backend.
 """
 
-import cv2
 import json
 import subprocess
 import sys
@@ -18,6 +17,7 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from server.yolo.yolo import FoodClassifier
 from server.yolo.weight_estimator import estimate_weight, is_food, get_weight_kg
+from server.yolo.decode import read_image
 
 # ── Configuration ──────────────────────────────────────────────────
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:3001")
@@ -54,10 +54,11 @@ def send_to_backend(session_payload: dict) -> bool:
         return False
 
 
-def build_session_payload(detected_objects: list, start_time: str, end_time: str) -> dict:
+def build_session_payload(detected_objects: list, start_time: str, end_time: str,
+                          frame=None) -> dict:
     """Build a session payload matching the backend's expected schema."""
-    # Assign fixed weights
-    estimate_weight(detected_objects)
+    # Area-based weights when the model-sized frame is available, else fixed
+    estimate_weight(detected_objects, frame=frame)
 
     # Group detections by category and compute summary
     category_counts: dict[str, list] = {}
@@ -75,7 +76,7 @@ def build_session_payload(detected_objects: list, start_time: str, end_time: str
             "confidence": round(avg_confidence, 4),
             "amount_kg": round(total_weight, 4) if is_food(category) else None,
             "count": len(items),
-            "total_area_px": 0,
+            "total_area_px": sum(o.get("area_px", 0) for o in items),
         })
 
     # Summary metrics
@@ -113,8 +114,8 @@ def main():
         print(f"ERROR: rpicam-still failed: {result.stderr}")
         sys.exit(1)
 
-    # Load the captured image
-    frame = cv2.imread(input_path)
+    # Load the captured image (reduced-resolution JPEG decode)
+    frame = read_image(input_path)
     if frame is None:
         print("ERROR: Failed to read captured image")
         sys.exit(1)
@@ -138,7 +139,7 @@ def main():
 
     # 3. Print detections
     if detected_objects:
-        estimate_weight(detected_objects)
+        estimate_weight(detected_objects, frame=model.last_input)
         print(f"\nDetected {len(detected_objects)} item(s):")
         for obj in detected_objects:
             w = obj.get('weight_kg', 0)
@@ -149,7 +150,8 @@ def main():
 
     # 4. Send results to the backend
     print("\n--- Sending to backend ---")
-    payload = build_session_payload(detected_objects or [], start_time, end_time)
+    payload = build_session_payload(detected_objects or [], start_time, end_time,
+                                    frame=model.last_input)
     print(f"Session ID: {payload['session_id']}")
     print(f"Results: {len(payload['results'])} categories, {payload['summary']['total_items']} items")
 
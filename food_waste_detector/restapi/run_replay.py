@@ -0,0 +1,276 @@
+"""
+Offline replay harness for the session daemon.
+
+Runs the real run_session.main() loop end-to-end on any Linux box:
+  - frames come from a directory of images or a video file instead of rpicam-still
+  - the GPIO / LCD layer is stubbed out
+  - the backend is a local stand-in (server/replay/fake_backend.py) that can
+    inject latency and failures
+  - the camera, uploader and display stand-ins can hang, to exercise the
+    daemon's supervisor (server/daemon/supervisor.py)
+
+and reports end-to-end frames/s, upload latency, dropped work and stalls.
+
+Usage:
+    python run_replay.py --source ./frames --frames 200 --latency-ms 80 --failure-rate 0.05
+    python run_replay.py --source clip.mp4 --duration 60 --capture-interval 0.5
+    python run_replay.py --source ./frames --frames 50 --hang-camera 0.1 --hang-upload 0.1 --deadline 2
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.camera.sources import open_frame_source
+from server.replay.fake_backend import FakeBackend
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+class ReplayStats:
+    """Counters collected by wrapping the daemon's capture/detect/upload steps."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = None
+        self.finished_at = None
+        self.captures = 0
+        self.capture_failures = 0
+        self.quality_rejects = 0
+        self.classified = 0
+        self.detect_ms: list[float] = []
+        self.upload_ms: list[float] = []
+        self.uploads_ok = 0
+        self.uploads_failed = 0
+        self.results_sent = 0
+        self.results_dropped = 0
+        self.gate_stats = None  # cascade gate counters, when CASCADE=1
+        self.hangs = {"camera": 0, "uploader": 0, "poll": 0, "display": 0}  # injected
+        self.supervisor_report = None
+
+    def report(self, backend_stats: dict) -> str:
+        elapsed = (self.finished_at or time.monotonic()) - (self.started_at or time.monotonic())
+        fps = self.classified / elapsed if elapsed > 0 else 0.0
+        lines = [
+            "",
+            "=" * 60,
+            "  Replay report",
+            "=" * 60,
+            f"  Wall time:          {elapsed:.2f}s",
+            f"  Frames captured:    {self.captures}  (capture failures: {self.capture_failures})",
+            f"  Frames classified:  {self.classified}  → {fps:.2f} frames/s end-to-end",
+            f"  Quality rejects:    {self.quality_rejects}",
+            f"  Cascade skips:      "
+            + (f"{self.gate_stats['skipped']}/{self.gate_stats['frames']} "
+               f"({self.gate_stats['skip_rate']:.0%})" if self.gate_stats else "off"),
+            f"  Inference:          p50 {percentile(self.detect_ms, 50):.1f}ms  "
+            f"p95 {percentile(self.detect_ms, 95):.1f}ms",
+            f"  Uploads:            {self.uploads_ok} ok, {self.uploads_failed} failed",
+            f"  Upload latency:     p50 {percentile(self.upload_ms, 50):.1f}ms  "
+            f"p95 {percentile(self.upload_ms, 95):.1f}ms  max {max(self.upload_ms, default=0):.1f}ms",
+            f"  Dropped work:       {self.capture_failures + self.hangs['camera']} frames, {self.results_dropped} results",
+            f"  Injected hangs:     " + ", ".join(f"{k} {v}" for k, v in self.hangs.items()),
+            f"  Supervisor:         {self.supervisor_report or 'off'}",
+            f"  Backend:            {backend_stats}",
+            "=" * 60,
+        ]
+        return "\n".join(lines)
+
+
+def install_stand_ins(run_session, source, stats: ReplayStats, args):
+    """Swap the daemon's hardware-facing functions for replay stand-ins."""
+    rng = random.Random(args.seed)
+    max_frames = args.frames
+    hang_rates = {"camera": args.hang_camera, "uploader": args.hang_upload,
+                  "poll": args.hang_poll, "display": args.hang_display}
+
+    def maybe_hang(component: str) -> bool:
+        """Block like a wedged device until --hang-seconds pass or the replay stops."""
+        rate = hang_rates[component]
+        if not rate or rng.random() >= rate:
+            return False
+        stats.hangs[component] += 1
+        run_session._stop_event.wait(args.hang_seconds)
+        return True  # the hung call then fails, as a killed rpicam-still would
+
+    def capture_image(output_path: str) -> bool:
+        if stats.started_at is None:
+            stats.started_at = time.monotonic()
+        if max_frames is not None and stats.captures >= max_frames:
+            run_session.stop()
+            return False
+        frame = source.read()
+        if frame is None:
+            run_session.stop()
+            return False
+        if args.capture_ms:
+            time.sleep(args.capture_ms / 1000)
+        stats.captures += 1
+        if maybe_hang("camera"):
+            return False
+        if args.capture_failure_rate and rng.random() < args.capture_failure_rate:
+            stats.capture_failures += 1
+            return False
+        return cv2.imwrite(output_path, frame)
+
+    def capture_burst(output_path: str, count: int) -> list[str]:
+        base, ext = os.path.splitext(output_path)
+        paths = [f"{base}_burst{i:02d}{ext}" for i in range(count)]
+        return [p for p in paths if capture_image(p)]
+
+    real_run_detection = run_session.run_detection
+
+    def run_detection(model, frame) -> list:
+        t0 = time.perf_counter()
+        detected = real_run_detection(model, frame)
+        stats.detect_ms.append((time.perf_counter() - t0) * 1000)
+        stats.classified += 1
+        if model.gate is not None:
+            stats.gate_stats = model.gate.stats()
+        return detected
+
+    real_api_post = run_session.api_post
+
+    def api_post(path: str, payload: dict):
+        t0 = time.perf_counter()
+        body, status = (None, 0) if maybe_hang("uploader") else real_api_post(path, payload)
+        stats.upload_ms.append((time.perf_counter() - t0) * 1000)
+        n = len(payload.get("results") or [])
+        if body:
+            stats.uploads_ok += 1
+            stats.results_sent += n
+        else:
+            stats.uploads_failed += 1
+            stats.results_dropped += n
+        return body, status
+
+    real_api_get = run_session.api_get
+
+    def api_get(path: str, timeout: float = 5):
+        return None if maybe_hang("poll") else real_api_get(path, timeout=timeout)
+
+    real_grab_frame = run_session.grab_frame
+
+    def grab_frame(image_path: str):
+        frame, quality = real_grab_frame(image_path)
+        if quality is not None and not quality.ok:
+            stats.quality_rejects += 1
+        return frame, quality
+
+    run_session.capture_image = capture_image
+    run_session.grab_frame = grab_frame
+    run_session.capture_burst = capture_burst
+    run_session.reset_camera = lambda: None  # no rpicam-still to kill
+    run_session.run_detection = run_detection
+    run_session.api_post = api_post
+    run_session.api_get = api_get
+    run_session.init_lcd = lambda: None
+    run_session.lcd_update = lambda lcd, category: maybe_hang("display")
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--source", required=True, help="Directory of images, single image or video file")
+    p.add_argument("--loop", action="store_true", help="Loop the source until --frames/--duration is reached")
+    p.add_argument("--frames", type=int, default=None, help="Stop after this many captures")
+    p.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    p.add_argument("--capture-interval", type=float, default=0.0, help="Daemon CAPTURE_INTERVAL (s)")
+    p.add_argument("--adaptive", action="store_true", help="Use the adaptive capture scheduler")
+    p.add_argument("--capture-ms", type=float, default=0.0, help="Emulated camera capture time per frame")
+    p.add_argument("--capture-failure-rate", type=float, default=0.0, help="Fraction of captures that fail")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Injected latency on /detections")
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random latency (0..N ms)")
+    p.add_argument("--poll-latency-ms", type=float, default=0.0, help="Injected latency on /sessions/active")
+    p.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of /detections posts answered 503")
+    p.add_argument("--backend-url", default=None, help="Use a real backend instead of the local stand-in")
+    p.add_argument("--hang-camera", type=float, default=0.0, help="Fraction of captures that hang")
+    p.add_argument("--hang-upload", type=float, default=0.0, help="Fraction of /detections posts that hang")
+    p.add_argument("--hang-poll", type=float, default=0.0, help="Fraction of /sessions/active polls that hang")
+    p.add_argument("--hang-display", type=float, default=0.0, help="Fraction of LCD updates that hang")
+    p.add_argument("--hang-seconds", type=float, default=30.0, help="How long an injected hang lasts")
+    p.add_argument("--deadline", type=float, default=None, help="Supervisor deadline for every component (s)")
+    p.add_argument("--seed", type=int, default=None, help="Seed for injected latency / failures / hangs")
+    p.add_argument("--verbose", action="store_true", help="Show the daemon's own per-frame output")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.frames is None and args.duration is None and args.loop:
+        sys.exit("--loop needs --frames or --duration")
+
+    source = open_frame_source(args.source, loop=args.loop)
+    backend = None
+    if args.backend_url:
+        backend_url = args.backend_url
+    else:
+        backend = FakeBackend(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            failure_rate=args.failure_rate,
+            poll_latency_ms=args.poll_latency_ms,
+            seed=args.seed,
+        ).start()
+        backend_url = backend.url
+
+    # run_session reads its configuration at import time
+    os.environ["BACKEND_URL"] = backend_url
+    os.environ.setdefault("DEVICE_ID", "replay-001")
+    if args.deadline is not None:
+        for name in ("CAMERA_DEADLINE", "UPLOAD_DEADLINE", "DISPLAY_DEADLINE"):
+            os.environ[name] = str(args.deadline)
+    import run_session
+
+    run_session.CAPTURE_INTERVAL = args.capture_interval
+    run_session.ADAPTIVE_CAPTURE = args.adaptive
+    run_session.POLL_INTERVAL = min(run_session.POLL_INTERVAL, 0.5)
+    # Keep replayed frames away from the sample images in the repo
+    workdir = tempfile.TemporaryDirectory(prefix="replay_", ignore_cleanup_errors=True)
+    run_session.IMAGE_PATH = os.path.join(workdir.name, "input_image.jpg")
+
+    stats = ReplayStats()
+    install_stand_ins(run_session, source, stats, args)
+
+    if args.duration is not None:
+        timer = threading.Timer(args.duration, run_session.stop)
+        timer.daemon = True
+        timer.start()
+
+    print(f"Replaying {source} against {backend_url}")
+    out = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with out:
+            run_session.main()
+    finally:
+        stats.finished_at = time.monotonic()
+        supervisor = run_session.get_supervisor()
+        if supervisor.enabled:
+            stats.supervisor_report = supervisor.report()
+        source.close()
+        workdir.cleanup()
+        backend_stats = backend.stats() if backend else {}
+        if backend:
+            backend.stop()
+
+    print(stats.report(backend_stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,33 +5,48 @@ runs TFLite image classification, and POSTs detection results to the session.
 """
 
 import atexit
-import cv2
+import glob
 import json
 import signal
 import subprocess
 import sys
 import os
+import threading
 import time
 import urllib.request
 import urllib.error
 from datetime import datetime, timezone
 
-import RPi.GPIO as GPIO
-from RPLCD.gpio import CharLCD
+try:
+    import RPi.GPIO as GPIO
+    from RPLCD.gpio import CharLCD
+    GPIO_AVAILABLE = True
+except ImportError:
+    GPIO_AVAILABLE = False
+    print("WARNING: RPi.GPIO / RPLCD not available. LCD output will be disabled.")
 
 # Add the restapi directory to path so we can import server modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from server.yolo.yolo import FoodClassifier
 from server.yolo.weight_estimator import estimate_weight, is_food, get_weight_kg
+from server.yolo.decode import read_image
+from server.daemon.scheduler import ADAPTIVE_CAPTURE, AdaptiveScheduler
+from server.daemon.supervisor import CAMERA_DEADLINE, DISPLAY_DEADLINE, UPLOAD_DEADLINE, get_supervisor
+from server.camera.quality import QUALITY_GATE, select_best
+from server.profiling import get_profiler
 
 # ── Configuration ──────────────────────────────────────────────────
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:3001")
 DEVICE_ID = os.environ.get("DEVICE_ID", "rpi5-001")
 DEVICE_SECRET = os.environ.get("DEVICE_SECRET", "device-secret-changeme")
-CAPTURE_INTERVAL = int(os.environ.get("CAPTURE_INTERVAL", "1"))  # seconds
-POLL_INTERVAL = int(os.environ.get("POLL_INTERVAL", "3"))  # seconds when idle
+CAPTURE_INTERVAL = float(os.environ.get("CAPTURE_INTERVAL", "1"))  # seconds
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", "3"))  # seconds when idle
+BURST_FRAMES = int(os.environ.get("BURST_FRAMES", "1"))  # >1: classify the sharpest of N
+BURST_GAP_MS = int(os.environ.get("BURST_GAP_MS", "150"))  # ms between burst frames
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_PATH = os.environ.get("IMAGE_PATH", os.path.join(SCRIPT_DIR, "input_image.jpg"))
+LONG_POLL_WAIT = float(os.environ.get("LONG_POLL_WAIT", "0"))  # >0: idle polls block on the backend (s)
 
 # ── LCD bar counts per food category ───────────────────────────────
 LCD_BARS = {"muffin": 4, "croissant": 7, "pizza": 12}
@@ -39,10 +54,23 @@ LCD_BARS = {"muffin": 4, "croissant": 7, "pizza": 12}
 # ── Global LCD reference for cleanup ──────────────────────────────
 _lcd_ref = None
 
+# ── Set to make main() return at the next loop boundary ───────────
+_stop_event = threading.Event()
+
+# ── Session check that missed its deadline or hit a cool-down ─────
+_NO_ANSWER = object()
+
+
+def stop():
+    """Ask a running main() loop to exit cleanly."""
+    _stop_event.set()
+
 
 def _cleanup_gpio():
     """Clean up GPIO on exit to avoid stale pin state."""
     global _lcd_ref
+    if not GPIO_AVAILABLE:
+        return
     try:
         if _lcd_ref is not None:
             _lcd_ref.close(clear=True)
@@ -107,6 +135,8 @@ def _force_free_lcd_pins():
 def init_lcd():
     """Initialise the 16×2 character LCD."""
     global _lcd_ref
+    if not GPIO_AVAILABLE:
+        return None
     try:
         # Suppress "channel already in use" warnings from previous runs
         GPIO.setwarnings(False)
@@ -187,13 +217,37 @@ def lcd_clear(lcd):
         pass
 
 
-def api_get(path: str):
-    """GET a JSON endpoint from the backend."""
+def reset_display():
+    """Release the LCD pins and initialise the display again (supervisor reset hook)."""
+    _cleanup_gpio()
+    lcd_update(init_lcd(), None)
+
+
+# path → (ETag, body) of the last 200, replayed when the backend answers 304
+_etag_cache: dict[str, tuple[str, dict]] = {}
+
+
+def api_get(path: str, timeout: float = 5):
+    """GET a JSON endpoint from the backend, revalidating with If-None-Match."""
     url = f"{BACKEND_URL}{path}"
-    req = urllib.request.Request(url, headers={"X-Device-Secret": DEVICE_SECRET})
+    key = path.split("?", 1)[0]
+    headers = {"X-Device-Secret": DEVICE_SECRET}
+    cached = _etag_cache.get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    req = urllib.request.Request(url, headers=headers)
     try:
-        with urllib.request.urlopen(req, timeout=5) as resp:
-            return json.loads(resp.read().decode())
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            body = json.loads(resp.read().decode())
+            etag = resp.headers.get("ETag")
+            if etag:
+                _etag_cache[key] = (etag, body)
+            return body
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached[1]
+        print(f"  [api] GET {path} failed: HTTP {e.code}")
+        return None
     except Exception as e:
         print(f"  [api] GET {path} failed: {e}")
         return None
@@ -220,27 +274,95 @@ def api_post(path: str, payload: dict):
         return None, 0
 
 
+# The rpicam-still this daemon is running, so a reset kills only our own capture
+_capture_proc: subprocess.Popen | None = None
+_capture_lock = threading.Lock()
+
+
+def _run_rpicam(args: list[str], timeout: float) -> bool:
+    """Run rpicam-still with ``args``; True if it exited cleanly within ``timeout``."""
+    global _capture_proc
+    proc = subprocess.Popen(["rpicam-still", *args], stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    with _capture_lock:
+        _capture_proc = proc
+    try:
+        proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+    finally:
+        with _capture_lock:
+            if _capture_proc is proc:
+                _capture_proc = None
+    return proc.returncode == 0
+
+
 def capture_image(output_path: str) -> bool:
     """Capture an image using rpicam-still."""
     try:
-        result = subprocess.run(
-            ["rpicam-still", "-o", output_path, "--width", "1920", "--height", "1080",
-             "-t", "1500", "--nopreview"],
-            capture_output=True, text=True, timeout=10,
-        )
-        return result.returncode == 0
+        return _run_rpicam(["-o", output_path, "--width", "1920", "--height", "1080",
+                            "-t", "1500", "--nopreview"], timeout=10)
     except Exception as e:
         print(f"  [camera] Capture failed: {e}")
         return False
 
 
-def run_detection(model: FoodClassifier, image_path: str) -> list:
-    """Run TFLite classification on the captured image and return detected objects."""
-    frame = cv2.imread(image_path)
-    if frame is None:
-        print("  [model] Failed to read image")
+def reset_camera():
+    """Kill our wedged rpicam-still so the next capture starts clean (supervisor reset hook)."""
+    with _capture_lock:
+        proc = _capture_proc
+    if proc is not None and proc.poll() is None:
+        print(f"  [camera] Killing wedged rpicam-still (PID {proc.pid})")
+        proc.kill()
+
+
+def capture_burst(output_path: str, count: int) -> list[str]:
+    """Capture a short burst with rpicam-still's timelapse mode; returns the file paths."""
+    base, ext = os.path.splitext(output_path)
+    for old in glob.glob(f"{base}_burst*{ext}"):
+        os.remove(old)
+    try:
+        ok = _run_rpicam(
+            ["-o", f"{base}_burst%02d{ext}", "--width", "1920", "--height", "1080",
+             "-t", str(1500 + count * BURST_GAP_MS), "--timelapse", str(BURST_GAP_MS), "--nopreview"],
+            timeout=10 + count * BURST_GAP_MS / 1000,
+        )
+        if not ok:
+            return []
+    except Exception as e:
+        print(f"  [camera] Burst capture failed: {e}")
         return []
+    # Early frames fall inside the auto-exposure warm-up; keep the last N
+    return sorted(glob.glob(f"{base}_burst*{ext}"))[-count:]
+
 
+def grab_frame(image_path: str):
+    """
+    Capture a frame (or a burst) and score its quality.
+
+    Returns ``(frame, quality)`` for the best frame, or ``(None, None)`` if
+    nothing could be captured / read.
+    """
+    if BURST_FRAMES > 1:
+        paths = capture_burst(image_path, BURST_FRAMES)
+    else:
+        paths = [image_path] if capture_image(image_path) else []
+
+    # Decoded straight to ~1/4 scale; the model only needs 224×224
+    frames = [f for f in (read_image(p) for p in paths) if f is not None]
+    if not frames:
+        return None, None
+
+    idx, quality = select_best(frames)
+    if len(frames) > 1:
+        print(f"  [quality] Best of {len(frames)}: frame {idx + 1}")
+    print(f"  [quality] {quality}")
+    return frames[idx], quality
+
+
+def run_detection(model: FoodClassifier, frame) -> list:
+    """Run TFLite classification on a captured frame and return detected objects."""
     detected_objects, raw_probs = model.predict(frame)
     if detected_objects is None:
         return []
@@ -248,10 +370,14 @@ def run_detection(model: FoodClassifier, image_path: str) -> list:
     return detected_objects or []
 
 
-def build_results_payload(detected_objects: list) -> list:
-    """Build the results array for the /detections endpoint."""
-    # Assign fixed weights
-    estimate_weight(detected_objects)
+def build_results_payload(detected_objects: list, frame=None) -> list:
+    """
+    Build the results array for the /detections endpoint.
+
+    ``frame`` is the classifier's model-sized RGB input; when given, weights
+    come from the segmented food area instead of the fixed table.
+    """
+    estimate_weight(detected_objects, frame=frame)
 
     results = []
     for obj in detected_objects:
@@ -261,7 +387,7 @@ def build_results_payload(detected_objects: list) -> list:
             "confidence": round(obj["confidence"], 4),
             "amount_kg": round(obj.get("weight_kg", get_weight_kg(cat)), 4),
             "count": 1,
-            "total_area_px": 0,
+            "total_area_px": obj.get("area_px", 0),
         })
 
     return results
@@ -273,6 +399,8 @@ def main():
     print(f"  Backend:  {BACKEND_URL}")
     print(f"  Device:   {DEVICE_ID}")
     print(f"  Interval: {CAPTURE_INTERVAL}s captures, {POLL_INTERVAL}s polling")
+    if ADAPTIVE_CAPTURE:
+        print("  Capture:  adaptive (activity / thermal aware)")
     print("=" * 60)
 
     # Pre-load TFLite classifier
@@ -283,71 +411,129 @@ def main():
         sys.exit(1)
     print("Model ready!\n")
 
+    # Camera, backend and LCD calls run under deadlines; a component that
+    # hangs is restarted on its own while the loaded model stays in place.
+    sup = get_supervisor()
+    sup.register("camera", CAMERA_DEADLINE + max(0, BURST_FRAMES - 1) * BURST_GAP_MS / 1000,
+                 reset=reset_camera)
+    sup.register("uploader", UPLOAD_DEADLINE)
+    sup.register("display", DISPLAY_DEADLINE, reset=reset_display, reset_deadline=3 * DISPLAY_DEADLINE)
+
+    # The display reset swaps the LCD object, so always go through _lcd_ref
+    def show(category):
+        sup.call("display", lcd_update, _lcd_ref, category)
+
+    def blank():
+        sup.call("display", lcd_clear, _lcd_ref)
+
     # Initialise LCD
-    lcd = init_lcd()
-    lcd_update(lcd, None)
+    sup.call("display", init_lcd, deadline=3 * DISPLAY_DEADLINE)
+    show(None)
 
     # Register signal handlers so GPIO is cleaned up even on kill / Ctrl+C
     def _sig_handler(sig, frame):
         print("\n\nDaemon stopped by signal.")
-        lcd_clear(lcd)
+        print(f"  [supervisor] {sup.report()}")
+        blank()
         _cleanup_gpio()
         sys.exit(0)
 
     signal.signal(signal.SIGINT, _sig_handler)
     signal.signal(signal.SIGTERM, _sig_handler)
 
-    image_path = os.path.join(SCRIPT_DIR, "input_image.jpg")
+    # PROFILE=1 or `kill -USR1 <pid>` turns on stage profiling / heap diffs
+    prof = get_profiler()
+    prof.install_signal_handler()
+
+    image_path = IMAGE_PATH
     capture_count = 0
+    scheduler = AdaptiveScheduler(CAPTURE_INTERVAL) if ADAPTIVE_CAPTURE else None
 
-    while True:
+    while not _stop_event.is_set():
         try:
             # 1. Poll for an active session
-            data = api_get("/api/sessions/active")
+            # With LONG_POLL_WAIT the backend holds the poll until the state
+            # changes, so the local wait below is mostly used up already.
+            t0 = time.monotonic()
+            with prof.stage("poll"):
+                if LONG_POLL_WAIT > 0:
+                    data = sup.call("uploader", api_get, f"/api/sessions/active?wait={LONG_POLL_WAIT:g}",
+                                    timeout=LONG_POLL_WAIT + 5, deadline=LONG_POLL_WAIT + UPLOAD_DEADLINE)
+                else:
+                    data = sup.call("uploader", api_get, "/api/sessions/active")
             if data is None or not data.get("active"):
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] No active session. Waiting {POLL_INTERVAL}s...")
-                time.sleep(POLL_INTERVAL)
+                _stop_event.wait(max(0.0, POLL_INTERVAL - (time.monotonic() - t0)))
                 continue
 
             session_id = data["session"]["session_id"]
             print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Active session: {session_id}")
+            model.prediction_log.set_session(session_id)
+            if scheduler:
+                scheduler.reset()
+            last_had_food = False
 
             # 2. Capture + detect loop while session is active
-            while True:
-                # Check session is still active before capturing
-                check = api_get("/api/sessions/active")
-                if check is None or not check.get("active") or check["session"]["session_id"] != session_id:
+            while not _stop_event.is_set():
+                # Check session is still active before capturing.  Only a real
+                # answer ends it: a stalled or failed check keeps capturing.
+                with prof.stage("poll"):
+                    check = sup.call("uploader", api_get, "/api/sessions/active", default=_NO_ANSWER)
+                if check is _NO_ANSWER or check is None:
+                    print(f"  [api] Session check got no answer — continuing session {session_id}")
+                elif not check.get("active") or check["session"]["session_id"] != session_id:
                     print(f"  Session {session_id} ended — stopping camera.")
-                    lcd_clear(lcd)
+                    print(f"  [supervisor] {sup.report()}")
+                    model.prediction_log.set_session(None)
+                    blank()
                     break
 
                 capture_count += 1
+                prof.tick()
                 ts = datetime.now().strftime('%H:%M:%S')
                 print(f"\n  [{ts}] Capture #{capture_count}")
 
                 # Capture
-                if not capture_image(image_path):
+                with prof.stage("capture"):
+                    frame, quality = sup.call("camera", grab_frame, image_path, default=(None, None))
+                if frame is None:
                     print("  [camera] Capture failed, retrying next interval")
-                    time.sleep(CAPTURE_INTERVAL)
+                    _stop_event.wait(scheduler.interval if scheduler else CAPTURE_INTERVAL)
+                    continue
+
+                # Drop blurred / badly exposed frames before paying for an invoke.
+                # Blur right after a food frame usually means a tray is moving,
+                # which counts as activity; otherwise it is just a quiet frame.
+                if QUALITY_GATE and not quality.ok:
+                    print("  [quality] Frame dropped before inference")
+                    active = quality.blurred and last_had_food
+                    interval = scheduler.record(active) if scheduler else CAPTURE_INTERVAL
+                    _stop_event.wait(interval)
                     continue
 
                 # Detect
-                detected_objects = run_detection(model, image_path)
+                with prof.stage("inference"):
+                    detected_objects = run_detection(model, frame)
                 n = len(detected_objects)
                 print(f"  [model] {n} item(s) classified")
 
                 # Build and send results
-                results = build_results_payload(detected_objects)
+                with prof.stage("weight"):
+                    results = build_results_payload(detected_objects, frame=model.last_input)
                 food_results = [r for r in results if is_food(r["category"])]
+                last_had_food = bool(food_results)
                 if food_results:
                     total_kg = sum(r.get("amount_kg") or 0 for r in food_results)
-                    body, status = api_post(
-                        f"/api/sessions/{session_id}/detections",
-                        {"results": food_results},
-                    )
+                    with prof.stage("upload"):
+                        body, status = sup.call(
+                            "uploader", api_post,
+                            f"/api/sessions/{session_id}/detections",
+                            {"results": food_results},
+                            default=(None, 0),
+                        )
                     if body:
                         print(f"  [api] Sent {len(food_results)} categories (~{total_kg*1000:.0f}g) → total: {body.get('total_detections', '?')}")
-                        lcd_update(lcd, food_results[0]["category"])
+                        show(food_results[0]["category"])
                     else:
                         print(f"  [api] Failed to send detections (status {status})")
                         # If session was stopped (400), break out
@@ -356,20 +542,26 @@ def main():
                             break
                 else:
                     print("  [model] No food detected — skipping upload")
-                    lcd_update(lcd, None)
+                    show(None)
 
                 # Wait for next capture
-                print(f"  Waiting {CAPTURE_INTERVAL}s for next capture...")
-                time.sleep(CAPTURE_INTERVAL)
+                interval = scheduler.record(bool(food_results)) if scheduler else CAPTURE_INTERVAL
+                print(f"  Waiting {interval:.2f}s for next capture...")
+                _stop_event.wait(interval)
 
         except KeyboardInterrupt:
             print("\n\nDaemon stopped by user.")
-            lcd_clear(lcd)
+            print(f"  [supervisor] {sup.report()}")
+            blank()
             _cleanup_gpio()
             sys.exit(0)
         except Exception as e:
             print(f"ERROR: {e}")
-            time.sleep(POLL_INTERVAL)
+            _stop_event.wait(POLL_INTERVAL)
+
+    blank()
+    print(f"  [supervisor] {sup.report()}")
+    print("Daemon stopped.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+"""
+Multi-camera station daemon — one process, one interpreter, N bins.
+
+Each camera source is tagged with its own DEVICE_ID.  While a session is
+active every source captures on its own thread into a single-frame slot;
+the inference loop takes at most one pending frame per source per tick
+(round-robin, so no bin can starve the others), classifies them with one
+batched invoke of a shared FoodClassifier, and hands each station's
+results to that station's own upload thread so a slow post for one bin
+never delays another.
+
+Stations are given as DEVICE_ID=SOURCE pairs, where SOURCE is ``cam:N``
+for CSI camera N, or a directory / image / video file for testing:
+
+    python run_stations.py --station bin-a=cam:0 --station bin-b=cam:1
+    STATIONS="bin-a=./frames_a,bin-b=clip.mp4" python run_stations.py --loop
+"""
+
+import argparse
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Add the restapi directory to path so we can import server modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server.camera.sources import open_frame_source
+from server.yolo.yolo import FoodClassifier
+from server.yolo.weight_estimator import is_food
+from run_session import api_get, api_post, build_results_payload
+
+# ── Configuration ──────────────────────────────────────────────────
+STATIONS = os.environ.get("STATIONS", "")
+CAPTURE_INTERVAL = float(os.environ.get("CAPTURE_INTERVAL", "1"))  # seconds, per source
+POLL_INTERVAL = float(os.environ.get("POLL_INTERVAL", "3"))  # seconds
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "4"))  # frames per invoke
+UPLOAD_QUEUE_SIZE = int(os.environ.get("UPLOAD_QUEUE_SIZE", "32"))  # per station
+
+
+class Station:
+    """One camera source with its own device id, frame slot and uploader."""
+
+    def __init__(self, device_id: str, source):
+        self.device_id = device_id
+        self.source = source
+        self.finished = False
+
+        self._pending = None  # (session_id, frame) — newest capture wins
+        self._lock = threading.Lock()
+        self._uploads: queue.Queue = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+
+        self.captured = 0
+        self.classified = 0
+        self.frames_replaced = 0
+        self.uploads_ok = 0
+        self.uploads_failed = 0
+        self.uploads_dropped = 0
+
+    # ── frame slot ──────────────────────────────────────────────────
+    def offer(self, session_id: str, frame):
+        with self._lock:
+            if self._pending is not None:
+                self.frames_replaced += 1
+            self._pending = (session_id, frame)
+            self.captured += 1
+
+    def take(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            return pending
+
+    # ── uploads ─────────────────────────────────────────────────────
+    def enqueue(self, session_id: str, results: list):
+        try:
+            self._uploads.put_nowait((session_id, results))
+        except queue.Full:
+            self.uploads_dropped += 1
+            print(f"  [{self.device_id}] Upload queue full — dropping {len(results)} result(s)")
+
+    def upload_loop(self, stop: threading.Event):
+        while not stop.is_set() or not self._uploads.empty():
+            try:
+                session_id, results = self._uploads.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            body, status = api_post(f"/api/sessions/{session_id}/detections", {"results": results})
+            if body:
+                self.uploads_ok += 1
+                print(f"  [{self.device_id}] Sent {len(results)} → total: {body.get('total_detections', '?')}")
+            else:
+                self.uploads_failed += 1
+                print(f"  [{self.device_id}] Failed to send detections (status {status})")
+
+    def stats(self) -> dict:
+        return {
+            "captured": self.captured,
+            "classified": self.classified,
+            "frames_replaced": self.frames_replaced,
+            "uploads_ok": self.uploads_ok,
+            "uploads_failed": self.uploads_failed,
+            "uploads_dropped": self.uploads_dropped,
+        }
+
+
+class StationDaemon:
+    """Polls the active session and schedules all stations onto one model."""
+
+    def __init__(self, model: FoodClassifier, stations: list[Station],
+                 capture_interval: float = CAPTURE_INTERVAL, max_batch: int = MAX_BATCH):
+        self.model = model
+        self.stations = stations
+        self.capture_interval = capture_interval
+        self.max_batch = max(1, max_batch)
+        self.session_id: str | None = None
+        self.stop_event = threading.Event()
+        self._rr = 0  # round-robin start index
+        self._threads: list[threading.Thread] = []
+
+    def stop(self):
+        self.stop_event.set()
+
+    # ── background threads ──────────────────────────────────────────
+    def _poll_loop(self):
+        while not self.stop_event.is_set():
+            data = api_get("/api/sessions/active")
+            session_id = data["session"]["session_id"] if data and data.get("active") else None
+            if session_id != self.session_id:
+                ts = datetime.now().strftime('%H:%M:%S')
+                print(f"[{ts}] Active session: {session_id or 'none'}")
+                self.session_id = session_id
+            self.stop_event.wait(POLL_INTERVAL)
+
+    def _capture_loop(self, station: Station):
+        while not self.stop_event.is_set() and not station.finished:
+            session_id = self.session_id
+            if session_id is None:
+                self.stop_event.wait(0.2)
+                continue
+            frame = station.source.read()
+            if frame is None:
+                if not station.source.live:
+                    print(f"  [{station.device_id}] Source exhausted")
+                    station.finished = True
+                    break
+                print(f"  [{station.device_id}] Capture failed, retrying next interval")
+            else:
+                station.offer(session_id, frame)
+            self.stop_event.wait(self.capture_interval)
+
+    # ── scheduling ──────────────────────────────────────────────────
+    def _next_batch(self) -> list[tuple[Station, str, object]]:
+        """At most one pending frame per station, starting at a rotating index."""
+        n = len(self.stations)
+        batch = []
+        for i in range(n):
+            station = self.stations[(self._rr + i) % n]
+            pending = station.take()
+            if pending is not None:
+                batch.append((station, *pending))
+                if len(batch) == self.max_batch:
+                    break
+        self._rr = (self._rr + 1) % n
+        return batch
+
+    def _classify(self, batch):
+        outputs = self.model.predict_batch([frame for _, _, frame in batch])
+        inputs = self.model.last_inputs
+        for i, ((station, session_id, _), (detected_objects, _probs)) in enumerate(zip(batch, outputs)):
+            station.classified += 1
+            frame = inputs[i] if i < len(inputs) else None
+            results = build_results_payload(detected_objects or [], frame=frame)
+            food_results = [{**r, "device_id": station.device_id}
+                            for r in results if is_food(r["category"])]
+            if food_results:
+                station.enqueue(session_id, food_results)
+
+    def run(self):
+        self._threads = [threading.Thread(target=self._poll_loop, daemon=True)]
+        for station in self.stations:
+            self._threads.append(threading.Thread(target=self._capture_loop, args=(station,), daemon=True))
+            self._threads.append(threading.Thread(target=station.upload_loop, args=(self.stop_event,), daemon=True))
+        for t in self._threads:
+            t.start()
+
+        while not self.stop_event.is_set():
+            # Checked before taking frames: a source offers its last frame
+            # before it is marked finished, so nothing is left behind.
+            finished = all(s.finished for s in self.stations)
+            batch = self._next_batch()
+            if batch:
+                self._classify(batch)
+                continue
+            if finished:
+                print("All sources exhausted.")
+                self.stop()
+                break
+            self.stop_event.wait(0.05)
+
+        for t in self._threads:
+            t.join(timeout=5)
+        for station in self.stations:
+            station.source.close()
+
+    def stats(self) -> dict:
+        return {s.device_id: s.stats() for s in self.stations}
+
+
+def parse_stations(specs: list[str], loop: bool) -> list[Station]:
+    stations = []
+    for spec in specs:
+        device_id, sep, source = spec.partition("=")
+        if not sep or not device_id or not source:
+            raise ValueError(f"Station spec must be DEVICE_ID=SOURCE, got {spec!r}")
+        stations.append(Station(device_id.strip(), open_frame_source(source.strip(), loop=loop)))
+    return stations
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--station", action="append", default=[], help="DEVICE_ID=SOURCE (repeatable)")
+    p.add_argument("--loop", action="store_true", help="Loop file/video sources")
+    args = p.parse_args(argv)
+
+    specs = args.station or [s for s in STATIONS.split(",") if s.strip()]
+    if not specs:
+        sys.exit("No stations configured (use --station or STATIONS)")
+    stations = parse_stations(specs, args.loop)
+
+    print("=" * 60)
+    print("  TrashTrack Multi-Station Daemon")
+    for s in stations:
+        print(f"  {s.device_id:<12} {s.source}")
+    print(f"  Interval: {CAPTURE_INTERVAL}s per source, batches of ≤{MAX_BATCH}")
+    print("=" * 60)
+
+    print("\nLoading TFLite model (one-time, shared by all stations)...")
+    model = FoodClassifier()
+    if model.model is None:
+        print("ERROR: Model failed to load. Exiting.")
+        sys.exit(1)
+
+    daemon = StationDaemon(model, stations)
+
+    def _sig_handler(sig, frame):
+        print("\n\nDaemon stopped by signal.")
+        daemon.stop()
+
+    signal.signal(signal.SIGINT, _sig_handler)
+    signal.signal(signal.SIGTERM, _sig_handler)
+
+    t0 = time.monotonic()
+    daemon.run()
+    elapsed = time.monotonic() - t0
+    for device_id, st in daemon.stats().items():
+        print(f"  {device_id:<12} {st}  ({st['classified'] / elapsed:.2f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,30 @@
 """
 Pi Camera service for Raspberry Pi 5 using picamera2.
 Provides capture functionality for the food waste detection pipeline.
+
+picamera2 is not safe to drive from several threads, and a capture blocks
+for tens of milliseconds, so the REST routes never call it directly:
+
+  - every capture runs on the service's single camera thread, which keeps
+    the event loop free and serialises access to the device
+  - ``capture_frame()`` is single-flight: requests that arrive while a
+    capture is running wait for that capture instead of queueing their own,
+    and requests within ``CAMERA_FRESHNESS_MS`` of the last capture get the
+    same frame back
+  - work derived from a frame (JPEG encoding, classification) is done once
+    per frame through ``CapturedFrame.derive`` and shared as well
+
+so a dashboard and an automation polling at once cost one capture.
 """
 
+import asyncio
 import io
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
 import numpy as np
 from PIL import Image
 
@@ -15,6 +36,49 @@ except ImportError:
     print("WARNING: picamera2 not available. Camera capture will be disabled.")
     print("Install with: sudo apt install python3-picamera2")
 
+CAMERA_FRESHNESS_MS = float(os.environ.get("CAMERA_FRESHNESS_MS", "500"))  # 0 = always capture
+
+
+def bgr_to_rgb(array: np.ndarray) -> np.ndarray:
+    """RGB888 frames are laid out [B, G, R]; PIL wants [R, G, B]."""
+    return np.ascontiguousarray(array[..., ::-1])
+
+
+@dataclass
+class CapturedFrame:
+    """A frame shared by every request that asked for it."""
+
+    array: np.ndarray          # as captured (RGB888 → [B, G, R] per pixel)
+    captured_at: float         # time.monotonic() when the capture finished
+    seq: int                   # capture number, increases by one per capture
+    _derived: dict = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def age_ms(self) -> float:
+        return (time.monotonic() - self.captured_at) * 1000
+
+    def derive(self, key: str, fn):
+        """Compute ``fn(self)`` once per frame and key; concurrent callers share it."""
+        with self._lock:
+            future = self._derived.get(key)
+            owner = future is None
+            if owner:
+                future = self._derived[key] = Future()
+        if owner:
+            try:
+                future.set_result(fn(self))
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def jpeg(self, quality: int = 90) -> bytes:
+        def encode(frame):
+            buffer = io.BytesIO()
+            Image.fromarray(bgr_to_rgb(frame.array)).save(buffer, format="JPEG", quality=quality)
+            return buffer.getvalue()
+        return self.derive(f"jpeg:{quality}", encode)
+
 
 class CameraService:
     """Manages the Pi Camera for capturing images."""
@@ -23,6 +87,14 @@ class CameraService:
         self.resolution = resolution
         self.camera = None
         self._started = False
+        self._lock = threading.Lock()  # picamera2 calls, from any thread
+        # One thread owns the device for capture_frame(); single-flight state below
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+        self._state_lock = threading.Lock()
+        self._inflight: Future | None = None
+        self._last: CapturedFrame | None = None
+        self.captures = 0
+        self.shared = 0  # capture_frame() calls answered without a new capture
 
         if not PICAMERA_AVAILABLE:
             print("CameraService: picamera2 not available, running in mock mode")
@@ -41,25 +113,26 @@ class CameraService:
 
     def start(self):
         """Start the camera if not already started."""
-        if self.camera and not self._started:
-            self.camera.start()
-            self._started = True
-            # Let the camera warm up / auto-expose
-            import time
-            time.sleep(1)
-            print("CameraService: camera started")
+        with self._lock:
+            if self.camera and not self._started:
+                self.camera.start()
+                self._started = True
+                # Let the camera warm up / auto-expose
+                time.sleep(1)
+                print("CameraService: camera started")
 
     def stop(self):
         """Stop the camera."""
-        if self.camera and self._started:
-            self.camera.stop()
-            self._started = False
-            print("CameraService: camera stopped")
+        with self._lock:
+            if self.camera and self._started:
+                self.camera.stop()
+                self._started = False
+                print("CameraService: camera stopped")
 
-    def capture_image(self) -> Image.Image | None:
+    def capture_array(self) -> np.ndarray | None:
         """
-        Capture a single image from the Pi Camera.
-        Returns a PIL Image or None if capture fails.
+        Capture a single frame (blocking).
+        Returns the camera's array or None if capture fails.
         """
         if not self.camera:
             print("CameraService: no camera available")
@@ -68,17 +141,68 @@ class CameraService:
         try:
             if not self._started:
                 self.start()
-
-            # Capture as numpy array (RGB)
-            array = self.camera.capture_array()
-            image = Image.fromarray(array)
-            print(f"CameraService: captured image {image.size}")
-            return image
+            with self._lock:
+                array = self.camera.capture_array()
+            print(f"CameraService: captured image {array.shape[1]}x{array.shape[0]}")
+            return array
 
         except Exception as e:
             print(f"CameraService: capture failed: {e}")
             return None
 
+    def capture_image(self) -> Image.Image | None:
+        """
+        Capture a single image from the Pi Camera.
+        Returns a PIL Image or None if capture fails.
+        """
+        array = self.capture_array()
+        return Image.fromarray(bgr_to_rgb(array)) if array is not None else None
+
+    # ── shared, off-loop capture ────────────────────────────────────
+    async def capture_frame(self, max_age_ms: float = CAMERA_FRESHNESS_MS) -> CapturedFrame | None:
+        """
+        A frame at most ``max_age_ms`` old, capturing on the camera thread
+        only when there is none and no capture is already running.
+        """
+        return await asyncio.wrap_future(self._shared_capture(max_age_ms))
+
+    def _shared_capture(self, max_age_ms: float) -> Future:
+        with self._state_lock:
+            last = self._last
+            if last is not None and last.age_ms <= max_age_ms:
+                self.shared += 1
+                done = Future()
+                done.set_result(last)
+                return done
+            if self._inflight is not None:
+                self.shared += 1
+                return self._inflight
+            self._inflight = self._executor.submit(self._capture_shared)
+            return self._inflight
+
+    def _capture_shared(self) -> CapturedFrame | None:
+        try:
+            array = self.capture_array()
+        except BaseException:
+            array = None
+            raise
+        finally:
+            with self._state_lock:
+                self._inflight = None
+                if array is not None:
+                    self.captures += 1
+                    self._last = CapturedFrame(array, time.monotonic(), self.captures)
+        return self._last if array is not None else None
+
+    def stats(self) -> dict:
+        with self._state_lock:
+            return {
+                "captures": self.captures,
+                "shared": self.shared,
+                "freshness_ms": CAMERA_FRESHNESS_MS,
+                "last_frame_age_ms": round(self._last.age_ms, 1) if self._last else None,
+            }
+
     def capture_bytes(self, format: str = "JPEG", quality: int = 90) -> bytes | None:
         """
         Capture an image and return as bytes.
@@ -0,0 +1,93 @@
+"""
+Cheap frame-quality scoring for the capture path.
+
+Frames grabbed while a tray slides in are often motion-blurred or badly
+exposed, and classifying them costs a full invoke for a low-confidence (or
+wrong) answer.  The score is computed on a small grayscale copy of the
+frame, so it costs well under a millisecond on the Pi:
+
+  sharpness   variance of the Laplacian (low = blurred)
+  texture     standard deviation of the gray levels
+  brightness  mean gray level, 0–255
+  clipped     fraction of pixels crushed to black or blown to white
+
+Laplacian variance also collapses on a frame with nothing to focus on (an
+empty bin, a plain tray), so the blur check only applies once the frame has
+at least ``QUALITY_MIN_TEXTURE`` gray levels of spread; flatter frames are
+judged on exposure alone.
+"""
+
+import os
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+QUALITY_GATE = os.environ.get("QUALITY_GATE", "1") == "1"
+QUALITY_WIDTH = int(os.environ.get("QUALITY_WIDTH", "320"))  # px, downscaled width
+QUALITY_MIN_SHARPNESS = float(os.environ.get("QUALITY_MIN_SHARPNESS", "15"))
+QUALITY_MIN_TEXTURE = float(os.environ.get("QUALITY_MIN_TEXTURE", "8"))  # gray stddev
+QUALITY_MIN_BRIGHTNESS = float(os.environ.get("QUALITY_MIN_BRIGHTNESS", "20"))
+QUALITY_MAX_BRIGHTNESS = float(os.environ.get("QUALITY_MAX_BRIGHTNESS", "220"))
+QUALITY_MAX_CLIPPED = float(os.environ.get("QUALITY_MAX_CLIPPED", "0.40"))
+
+
+@dataclass
+class FrameQuality:
+    sharpness: float
+    brightness: float
+    clipped: float
+    ok: bool
+    reason: str = ""
+    texture: float = 0.0
+
+    @property
+    def blurred(self) -> bool:
+        return self.texture >= QUALITY_MIN_TEXTURE and self.sharpness < QUALITY_MIN_SHARPNESS
+
+    def __str__(self):
+        verdict = "ok" if self.ok else f"rejected: {self.reason}"
+        return (f"sharpness {self.sharpness:.0f}, brightness {self.brightness:.0f}, "
+                f"clipped {self.clipped:.1%} — {verdict}")
+
+
+def score_frame(frame: np.ndarray, width: int = QUALITY_WIDTH) -> FrameQuality:
+    """Score a BGR frame for sharpness and exposure."""
+    h, w = frame.shape[:2]
+    if w > width:
+        frame = cv2.resize(frame, (width, max(1, round(h * width / w))),
+                           interpolation=cv2.INTER_AREA)
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+    brightness = float(gray.mean())
+    texture = float(gray.std())
+    clipped = float(np.count_nonzero((gray < 16) | (gray > 239))) / gray.size
+
+    reason = ""
+    if texture >= QUALITY_MIN_TEXTURE and sharpness < QUALITY_MIN_SHARPNESS:
+        reason = f"blurred ({sharpness:.0f} < {QUALITY_MIN_SHARPNESS:.0f})"
+    elif brightness < QUALITY_MIN_BRIGHTNESS:
+        reason = f"underexposed ({brightness:.0f} < {QUALITY_MIN_BRIGHTNESS:.0f})"
+    elif brightness > QUALITY_MAX_BRIGHTNESS:
+        reason = f"overexposed ({brightness:.0f} > {QUALITY_MAX_BRIGHTNESS:.0f})"
+    elif clipped > QUALITY_MAX_CLIPPED:
+        reason = f"clipped ({clipped:.0%} > {QUALITY_MAX_CLIPPED:.0%})"
+
+    return FrameQuality(sharpness, brightness, clipped, ok=not reason, reason=reason, texture=texture)
+
+
+def select_best(frames: list[np.ndarray]) -> tuple[int, FrameQuality] | tuple[None, None]:
+    """
+    Pick the best frame of a burst.
+
+    Frames that pass the gate win over frames that do not; among those,
+    the sharpest wins.  Returns ``(index, quality)`` or ``(None, None)`` for
+    an empty burst.
+    """
+    best_idx, best_q = None, None
+    for i, frame in enumerate(frames):
+        q = score_frame(frame)
+        if best_q is None or (q.ok, q.sharpness) > (best_q.ok, best_q.sharpness):
+            best_idx, best_q = i, q
+    return best_idx, best_q
@@ -0,0 +1,148 @@
+"""
+Frame sources.
+
+RpicamFrameSource drives a CSI camera through rpicam-still.  The file-backed
+sources are stand-ins for it that yield BGR frames from a directory of
+images or from a video file, so the capture pipeline can run on any Linux
+box (replay harness, multi-source testing).
+
+Stills are decoded at reduced resolution (server/yolo/decode.py); video
+frames come out of the decoder at full size.
+"""
+
+import os
+import subprocess
+import tempfile
+
+import cv2
+import numpy as np
+
+from server.yolo.decode import read_image
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+class DirectoryFrameSource:
+    """Yields the images in a directory (or a single image), in filename order."""
+
+    live = False  # read() returning None means the source is exhausted
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+            )
+        else:
+            self.files = [path]
+        if not self.files:
+            raise ValueError(f"No images found in {path}")
+        self._index = 0
+
+    def read(self) -> np.ndarray | None:
+        """Return the next frame, or None when the source is exhausted."""
+        for _ in range(len(self.files)):
+            if self._index >= len(self.files):
+                if not self.loop:
+                    return None
+                self._index = 0
+            file_path = self.files[self._index]
+            self._index += 1
+            frame = read_image(file_path)
+            if frame is not None:
+                return frame
+            print(f"  [source] Skipping unreadable image {file_path}")
+        return None
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"DirectoryFrameSource({self.path!r}, {len(self.files)} images)"
+
+
+class VideoFrameSource:
+    """Yields the frames of a video file, optionally skipping frames."""
+
+    live = False
+
+    def __init__(self, path: str, loop: bool = False, stride: int = 1):
+        self.path = path
+        self.loop = loop
+        self.stride = max(1, stride)
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise ValueError(f"Cannot open video {path}")
+
+    def read(self) -> np.ndarray | None:
+        """Return the next frame, or None when the source is exhausted."""
+        for _ in range(self.stride - 1):
+            self._cap.grab()
+        ok, frame = self._cap.read()
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._cap.read()
+        return frame if ok else None
+
+    def close(self):
+        self._cap.release()
+
+    def __repr__(self):
+        return f"VideoFrameSource({self.path!r})"
+
+
+class RpicamFrameSource:
+    """Captures stills from one CSI camera (``rpicam-still --camera N``)."""
+
+    live = True  # read() returning None is a failed capture; try again
+
+    def __init__(self, camera: int = 0, width: int = 1920, height: int = 1080,
+                 timeout_ms: int = 1500):
+        self.camera = camera
+        self.width = width
+        self.height = height
+        self.timeout_ms = timeout_ms
+        fd, self._path = tempfile.mkstemp(prefix=f"cam{camera}_", suffix=".jpg")
+        os.close(fd)
+
+    def read(self) -> np.ndarray | None:
+        """Capture a frame; returns None if the capture failed."""
+        try:
+            result = subprocess.run(
+                ["rpicam-still", "--camera", str(self.camera), "-o", self._path,
+                 "--width", str(self.width), "--height", str(self.height),
+                 "-t", str(self.timeout_ms), "--nopreview"],
+                capture_output=True, text=True, timeout=10,
+            )
+            if result.returncode != 0:
+                return None
+        except Exception as e:
+            print(f"  [camera {self.camera}] Capture failed: {e}")
+            return None
+        return read_image(self._path)
+
+    def close(self):
+        try:
+            os.remove(self._path)
+        except OSError:
+            pass
+
+    def __repr__(self):
+        return f"RpicamFrameSource(camera={self.camera})"
+
+
+def open_frame_source(path: str, loop: bool = False):
+    """
+    Open a frame source from a spec string.
+
+    ``cam:N`` opens CSI camera N; anything else is treated as a directory,
+    single image or video file.
+    """
+    if path.startswith("cam:"):
+        return RpicamFrameSource(int(path[4:]))
+    if os.path.isdir(path) or os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS:
+        return DirectoryFrameSource(path, loop=loop)
+    return VideoFrameSource(path, loop=loop)
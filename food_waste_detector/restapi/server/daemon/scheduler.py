@@ -0,0 +1,137 @@
+"""
+Adaptive, thermal-aware capture scheduler for the session daemon.
+
+The capture interval reacts to what the camera sees and to the state of
+the Pi:
+
+  - activity (food detected)  → drop straight to the minimum interval
+  - quiet frames in a row     → back off exponentially toward the maximum
+  - SoC too hot / CPU loaded  → throttle (at least double the interval)
+
+Temperature and load are read from /sys and /proc; both paths can be
+pointed at ordinary files so the scheduler can be exercised off-Pi.
+
+Off unless ``ADAPTIVE_CAPTURE=1``.  Every posted frame adds to the session
+total, so the minimum interval defaults to the daemon's CAPTURE_INTERVAL:
+the scheduler only ever captures less often than the fixed rate, unless
+``CAPTURE_MIN_INTERVAL`` is set lower on purpose.
+"""
+
+import os
+import time
+from datetime import datetime
+
+ADAPTIVE_CAPTURE = os.environ.get("ADAPTIVE_CAPTURE", "0") == "1"
+# seconds; unset = the base interval passed in (run_session's CAPTURE_INTERVAL)
+CAPTURE_MIN_INTERVAL = float(os.environ["CAPTURE_MIN_INTERVAL"]) if os.environ.get("CAPTURE_MIN_INTERVAL") else None
+CAPTURE_MAX_INTERVAL = float(os.environ.get("CAPTURE_MAX_INTERVAL", "10"))  # seconds
+CAPTURE_BACKOFF = float(os.environ.get("CAPTURE_BACKOFF", "2.0"))
+QUIET_FRAMES = int(os.environ.get("QUIET_FRAMES", "3"))  # quiet frames before backing off
+TEMP_LIMIT_C = float(os.environ.get("TEMP_LIMIT_C", "75"))
+LOAD_LIMIT = float(os.environ.get("LOAD_LIMIT", "1.0"))  # 1-min load average per core
+THERMAL_PATH = os.environ.get("THERMAL_PATH", "/sys/class/thermal/thermal_zone0/temp")
+LOADAVG_PATH = os.environ.get("LOADAVG_PATH", "/proc/loadavg")
+SENSOR_REFRESH = 5.0  # seconds between /sys reads
+
+
+def read_soc_temp(path: str = THERMAL_PATH) -> float | None:
+    """SoC temperature in °C, or None if the sensor is unavailable."""
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def read_load_per_core(path: str = LOADAVG_PATH) -> float | None:
+    """1-minute load average divided by the number of CPUs."""
+    try:
+        with open(path) as f:
+            load1 = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return load1 / (os.cpu_count() or 1)
+
+
+class AdaptiveScheduler:
+    """Chooses the wait before the next capture."""
+
+    def __init__(
+        self,
+        base_interval: float,
+        min_interval: float | None = CAPTURE_MIN_INTERVAL,
+        max_interval: float = CAPTURE_MAX_INTERVAL,
+        backoff: float = CAPTURE_BACKOFF,
+        quiet_frames: int = QUIET_FRAMES,
+        temp_limit_c: float = TEMP_LIMIT_C,
+        load_limit: float = LOAD_LIMIT,
+        thermal_path: str = THERMAL_PATH,
+        loadavg_path: str = LOADAVG_PATH,
+        clock=time.monotonic,
+    ):
+        self.min_interval = base_interval if min_interval is None else min_interval
+        self.max_interval = max(max_interval, self.min_interval)
+        self.base_interval = self._clamp(base_interval)
+        self.backoff = max(backoff, 1.0)
+        self.quiet_frames = quiet_frames
+        self.temp_limit_c = temp_limit_c
+        self.load_limit = load_limit
+        self.thermal_path = thermal_path
+        self.loadavg_path = loadavg_path
+        self._clock = clock
+
+        self.interval = self.base_interval
+        self.quiet_streak = 0
+        self.throttled = False
+        self.temp_c: float | None = None
+        self.load: float | None = None
+        self._sensors_read_at: float | None = None
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _refresh_sensors(self):
+        now = self._clock()
+        if self._sensors_read_at is not None and now - self._sensors_read_at < SENSOR_REFRESH:
+            return
+        self._sensors_read_at = now
+        self.temp_c = read_soc_temp(self.thermal_path)
+        self.load = read_load_per_core(self.loadavg_path)
+
+    def _throttle_reason(self) -> str | None:
+        if self.temp_c is not None and self.temp_c >= self.temp_limit_c:
+            return f"SoC {self.temp_c:.1f}°C ≥ {self.temp_limit_c:.0f}°C"
+        if self.load is not None and self.load >= self.load_limit:
+            return f"load {self.load:.2f}/core ≥ {self.load_limit:.2f}"
+        return None
+
+    def record(self, active: bool) -> float:
+        """Record the outcome of the last frame and return the next interval."""
+        self._refresh_sensors()
+
+        if active:
+            self.quiet_streak = 0
+            interval, reason = self.min_interval, "activity"
+        else:
+            self.quiet_streak += 1
+            if self.quiet_streak >= self.quiet_frames:
+                interval = self.interval * self.backoff
+                reason = f"quiet x{self.quiet_streak}"
+            else:
+                interval, reason = self.interval, f"quiet x{self.quiet_streak}, holding"
+
+        throttle = self._throttle_reason()
+        self.throttled = throttle is not None
+        if throttle:
+            interval = max(interval, self.base_interval, self.interval) * 2
+            reason = f"{reason}, throttled: {throttle}"
+
+        self.interval = self._clamp(interval)
+        ts = datetime.now().strftime('%H:%M:%S')
+        print(f"  [{ts}] [sched] next capture in {self.interval:.2f}s ({reason})")
+        return self.interval
+
+    def reset(self):
+        """Return to the base rate, e.g. when a new session starts."""
+        self.interval = self.base_interval
+        self.quiet_streak = 0
@@ -0,0 +1,215 @@
+"""
+Per-stage deadlines for the session daemon's hardware- and network-facing
+components, with in-process recovery.
+
+Each supervised component (``camera``, ``uploader`` — every backend call —
+and ``display``) runs its calls on its own worker thread.  The daemon's
+loop waits for a call at most the component's deadline:
+
+    sup = get_supervisor()
+    sup.register("camera", CAMERA_DEADLINE, reset=reset_camera)
+    frame, quality = sup.call("camera", grab_frame, path, default=(None, None))
+
+When a call misses its deadline the loop gets ``default`` back straight
+away and only that component is restarted: the stuck worker is abandoned
+(Python cannot kill a thread; it exits once its call returns, and its
+result is discarded), a fresh worker takes over and the component's
+``reset`` hook runs on it — e.g. killing a wedged rpicam-still or
+re-initialising the LCD.  The model, the other components and the loop
+itself are left alone.
+
+A component that stalls again before it has recovered is skipped for a
+cool-down (its deadline, doubling per consecutive stall, up to
+``SUPERVISOR_MAX_COOLDOWN``) so a dead device cannot leak a thread per
+frame.  Stall counts and recovery times — from the stalled call's start to
+the next call that completes in time — are kept per component.
+
+``SUPERVISE=0`` runs every call inline, as before.
+"""
+
+import os
+import queue
+import statistics
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+SUPERVISE = os.environ.get("SUPERVISE", "1") == "1"
+CAMERA_DEADLINE = float(os.environ.get("CAMERA_DEADLINE", "20"))  # seconds per capture
+UPLOAD_DEADLINE = float(os.environ.get("UPLOAD_DEADLINE", "15"))  # seconds per backend call
+DISPLAY_DEADLINE = float(os.environ.get("DISPLAY_DEADLINE", "5"))  # seconds per LCD update
+SUPERVISOR_MAX_COOLDOWN = float(os.environ.get("SUPERVISOR_MAX_COOLDOWN", "60"))  # seconds
+
+
+class _Worker:
+    """A daemon thread running one component's calls in order."""
+
+    def __init__(self, name: str):
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"supervised-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, args, kwargs) -> Future:
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def retire(self):
+        """Exit once the current call (if any) returns."""
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+class Component:
+    """One supervised component: its worker, deadline, reset hook and counters."""
+
+    def __init__(self, name: str, deadline: float, reset=None, reset_deadline: float | None = None):
+        self.name = name
+        self.deadline = deadline
+        self.reset = reset
+        self.reset_deadline = reset_deadline or deadline
+        self.worker = _Worker(name)
+        self.calls = 0
+        self.stalls = 0
+        self.skipped = 0          # calls answered with the default during a cool-down
+        self.reset_failures = 0
+        self.recoveries: list[float] = []  # seconds from stall to the next on-time call
+        self.stalled_since: float | None = None
+        self.consecutive = 0
+        self.cooldown_until = 0.0
+
+    def restart(self):
+        self.worker.retire()
+        self.worker = _Worker(self.name)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "stalls": self.stalls,
+            "skipped": self.skipped,
+            "reset_failures": self.reset_failures,
+            "recoveries": len(self.recoveries),
+            "recovery_s_p50": round(statistics.median(self.recoveries), 2) if self.recoveries else None,
+            "recovery_s_max": round(max(self.recoveries), 2) if self.recoveries else None,
+            "stalled": self.stalled_since is not None,
+        }
+
+
+class Supervisor:
+    """Runs component calls under deadlines and restarts components that miss them."""
+
+    def __init__(self, enabled: bool = SUPERVISE):
+        self.enabled = enabled
+        self.components: dict[str, Component] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, deadline: float, reset=None, reset_deadline: float | None = None) -> Component:
+        """Add a component (re-registering keeps the counters and replaces the hook)."""
+        with self._lock:
+            component = self.components.get(name)
+            if component is None:
+                component = self.components[name] = Component(name, deadline, reset, reset_deadline)
+            else:
+                component.deadline = deadline
+                component.reset = reset
+                component.reset_deadline = reset_deadline or deadline
+            return component
+
+    def call(self, name: str, fn, *args, default=None, deadline: float | None = None, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` as component ``name`` and return its
+        result, or ``default`` if it misses the deadline or the component is
+        cooling down.  Exceptions raised by ``fn`` propagate as usual.
+        """
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        component = self.components[name]
+        started = time.monotonic()
+        if started < component.cooldown_until:
+            component.skipped += 1
+            return default
+
+        component.calls += 1
+        limit = deadline or component.deadline
+        future = component.worker.submit(fn, args, kwargs)
+        try:
+            result = future.result(timeout=limit)
+        except FutureTimeout:
+            self._stall(component, started, limit)
+            return default
+
+        if component.stalled_since is not None:
+            recovery = time.monotonic() - component.stalled_since
+            component.recoveries.append(recovery)
+            component.stalled_since = None
+            component.consecutive = 0
+            print(f"  [supervisor] {name} recovered {recovery:.1f}s after stalling")
+        return result
+
+    def _stall(self, component: Component, started: float, limit: float):
+        component.stalls += 1
+        component.consecutive += 1
+        if component.stalled_since is None:
+            component.stalled_since = started
+        print(f"  [supervisor] {component.name} missed its {limit:g}s deadline "
+              f"(stall #{component.stalls}) — restarting {component.name}")
+        component.restart()
+
+        if component.reset is not None:
+            future = component.worker.submit(component.reset, (), {})
+            try:
+                future.result(timeout=component.reset_deadline)
+            except FutureTimeout:
+                component.reset_failures += 1
+                print(f"  [supervisor] {component.name} reset hung too — starting another worker")
+                component.restart()
+            except Exception as e:
+                component.reset_failures += 1
+                print(f"  [supervisor] {component.name} reset failed: {e}")
+
+        if component.consecutive > 1:
+            cooldown = min(SUPERVISOR_MAX_COOLDOWN, component.deadline * 2 ** (component.consecutive - 2))
+            component.cooldown_until = time.monotonic() + cooldown
+            print(f"  [supervisor] {component.name} stalled {component.consecutive}× in a row — "
+                  f"skipping it for {cooldown:g}s")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: c.stats() for name, c in self.components.items()}
+
+    def report(self) -> str:
+        """One line per component, for logs."""
+        parts = []
+        for name, s in self.stats().items():
+            part = f"{name} {s['stalls']} stall(s)/{s['calls']} call(s)"
+            if s["recoveries"]:
+                part += f", recovery p50 {s['recovery_s_p50']:.1f}s max {s['recovery_s_max']:.1f}s"
+            if s["stalled"]:
+                part += ", still stalled"
+            parts.append(part)
+        return "; ".join(parts) if parts else "no components"
+
+
+# ── Singleton ─────────────────────────────────────────────────────
+_supervisor: Supervisor | None = None
+
+
+def get_supervisor() -> Supervisor:
+    """Return the process-wide supervisor."""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = Supervisor()
+    return _supervisor
@@ -0,0 +1,65 @@
+"""
+Per-process memory reporting.
+
+Reads /proc so that each gunicorn/uvicorn worker can report how much of its
+resident set is private versus shared with its siblings (e.g. the model file
+mapped from the page cache).
+"""
+
+import os
+
+
+def _read_kb_fields(path: str, fields: set[str]) -> dict[str, int]:
+    values: dict[str, int] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    values[key] = int(rest.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    return values
+
+
+def process_memory() -> dict:
+    """
+    Return memory usage of the current process in KiB.
+
+    ``rss_kb`` is the full resident set; ``pss_kb`` divides shared pages
+    between the processes mapping them, so summing ``pss_kb`` over all
+    workers gives the real footprint.  Fields are None where /proc is not
+    available (e.g. macOS during development).
+    """
+    status = _read_kb_fields(
+        "/proc/self/status", {"VmRSS", "RssAnon", "RssFile", "RssShmem"}
+    )
+    rollup = _read_kb_fields(
+        "/proc/self/smaps_rollup", {"Pss", "Shared_Clean", "Shared_Dirty"}
+    )
+
+    shared = None
+    if "Shared_Clean" in rollup or "Shared_Dirty" in rollup:
+        shared = rollup.get("Shared_Clean", 0) + rollup.get("Shared_Dirty", 0)
+
+    return {
+        "pid": os.getpid(),
+        "rss_kb": status.get("VmRSS"),
+        "rss_anon_kb": status.get("RssAnon"),
+        "rss_file_kb": status.get("RssFile"),
+        "pss_kb": rollup.get("Pss"),
+        "shared_kb": shared,
+    }
+
+
+def format_memory(mem: dict | None = None) -> str:
+    """One-line summary suitable for startup logs."""
+    mem = mem or process_memory()
+    if mem["rss_kb"] is None:
+        return f"pid {mem['pid']}: RSS unavailable"
+    parts = [f"pid {mem['pid']}: RSS {mem['rss_kb'] / 1024:.1f} MiB"]
+    if mem["pss_kb"] is not None:
+        parts.append(f"PSS {mem['pss_kb'] / 1024:.1f} MiB")
+    if mem["shared_kb"] is not None:
+        parts.append(f"shared {mem['shared_kb'] / 1024:.1f} MiB")
+    return ", ".join(parts)
@@ -0,0 +1,392 @@
+"""
+Opt-in sampling profiler and heap-growth tracker for long-running processes.
+
+Off by default.  Turn it on with ``PROFILE=1``, or send the process
+``SIGUSR1`` to toggle it while it runs.  Code marks its work with stages:
+
+    prof = get_profiler()
+    with prof.stage("inference"):
+        ...
+    prof.tick()          # once per frame / request
+
+While enabled:
+  - a background thread samples every thread's Python stack each
+    ``PROFILE_INTERVAL_MS`` and folds the samples under the stage that
+    thread — or, on an event loop, the running task — was in, e.g.
+    ``stage:inference;run_session.py:run_detection;...``
+    (flamegraph.pl / speedscope "collapsed" format)
+  - each stage's call count, mean / max wall time and net traced allocation
+    are recorded
+  - every ``TRACEMALLOC_EVERY`` ticks a tracemalloc snapshot is diffed
+    against the previous one, alongside RSS
+
+Every ``PROFILE_WINDOW`` seconds the samples and stage table are written to
+``PROFILE_DIR`` as ``profile-<pid>-<time>.folded`` / ``.txt``; heap diffs go
+to ``heap-<pid>-<time>.txt``.  Only the newest ``PROFILE_KEEP`` files of
+each kind are kept.
+
+When disabled, ``stage()`` returns a shared no-op context manager and
+``tick()`` returns after one attribute check; no thread runs and tracemalloc
+is off.
+"""
+
+import asyncio
+import atexit
+import linecache
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+
+from server.memory import process_memory
+
+PROFILE = os.environ.get("PROFILE", "0") == "1"
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "profiles"),
+)
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "10"))
+PROFILE_WINDOW = float(os.environ.get("PROFILE_WINDOW", "60"))  # seconds per dump
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20"))  # files kept per kind
+PROFILE_MAX_DEPTH = int(os.environ.get("PROFILE_MAX_DEPTH", "48"))
+TRACEMALLOC_EVERY = int(os.environ.get("TRACEMALLOC_EVERY", "500"))  # ticks; 0 = off
+TRACEMALLOC_DEPTH = int(os.environ.get("TRACEMALLOC_DEPTH", "8"))
+TRACEMALLOC_TOP = int(os.environ.get("TRACEMALLOC_TOP", "25"))
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+# The stage the current thread or asyncio task is in.  Tasks get their own
+# copy of the context, so overlapping requests on one event loop nest and
+# unwind their stages independently.
+_stage_var: ContextVar[str | None] = ContextVar("profile_stage", default=None)
+
+
+def _running_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:  # no event loop in this thread
+        return None
+
+
+class _Stage:
+    __slots__ = ("prof", "name", "key", "token", "t0", "m0")
+
+    def __init__(self, prof: "Profiler", name: str):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        task = _running_task()
+        tid = threading.get_ident()
+        if task is not None:
+            self.prof._loops[tid] = task.get_loop()
+        self.key = task if task is not None else tid
+        self.token = _stage_var.set(self.name)
+        self.prof._current[self.key] = self.name
+        self.m0 = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        mem = None
+        if self.m0 is not None and tracemalloc.is_tracing():
+            mem = tracemalloc.get_traced_memory()[0] - self.m0
+        _stage_var.reset(self.token)
+        prev = _stage_var.get()
+        if prev is None:
+            self.prof._current.pop(self.key, None)
+        else:
+            self.prof._current[self.key] = prev
+        self.prof._record(self.name, elapsed, mem)
+        return False
+
+
+class Profiler:
+    """Process-wide profiler; use get_profiler()."""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        # What the sampler sees: thread id or asyncio task → stage name,
+        # mirrored from _stage_var, which other threads cannot read
+        self._current: dict = {}
+        self._loops: dict[int, asyncio.AbstractEventLoop] = {}  # thread id → its event loop
+        self._samples: Counter = Counter()
+        self._stages: dict[str, list] = {}  # name → [count, total_s, max_s, mem_bytes]
+        self._ticks = 0
+        self._heap_prev = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._window_start = time.monotonic()
+        self._atexit = False
+
+    # ── switching ───────────────────────────────────────────────────
+    def start(self):
+        with self._lock:
+            if self.enabled:
+                return
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            if TRACEMALLOC_EVERY > 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_DEPTH)
+            self._stop.clear()
+            self._window_start = time.monotonic()
+            self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self.enabled = True
+            self._thread.start()
+            if not self._atexit:
+                # Flush the last partial window on a clean exit
+                atexit.register(self.stop)
+                self._atexit = True
+        print(f"  [profile] Enabled — writing to {PROFILE_DIR}")
+
+    def stop(self):
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            self._stop.set()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+        self._flush()
+        self._heap_prev = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        print("  [profile] Disabled")
+
+    def toggle(self):
+        self.stop() if self.enabled else self.start()
+
+    def install_signal_handler(self, signum=getattr(signal, "SIGUSR1", None)):
+        """
+        Toggle profiling on ``signum`` (main thread only).  Not for gunicorn
+        workers, which use SIGUSR1 to reopen their logs.
+        """
+        if signum is None:
+            return
+
+        # The handler must not block the interrupted loop, so hand off
+        def _handler(sig, frame):
+            threading.Thread(target=self.toggle, daemon=True).start()
+
+        signal.signal(signum, _handler)
+
+    # ── hooks ───────────────────────────────────────────────────────
+    def stage(self, name: str):
+        """Context manager attributing the enclosed work to ``name``."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def tick(self):
+        """
+        Mark one unit of work (a frame or a request).  Every
+        TRACEMALLOC_EVERY ticks the heap snapshot is taken on the calling
+        thread, which can take a few hundred ms on a Pi.
+        """
+        if not self.enabled:
+            return
+        self._ticks += 1
+        if TRACEMALLOC_EVERY > 0 and self._ticks % TRACEMALLOC_EVERY == 0:
+            with self.stage("tracemalloc"):
+                self._heap_diff()
+
+    def _record(self, name: str, elapsed: float, mem: int | None):
+        with self._lock:
+            st = self._stages.setdefault(name, [0, 0.0, 0.0, 0])
+            st[0] += 1
+            st[1] += elapsed
+            st[2] = max(st[2], elapsed)
+            if mem is not None:
+                st[3] += mem
+
+    # ── sampling ────────────────────────────────────────────────────
+    def _sample_loop(self):
+        own = threading.get_ident()
+        interval = PROFILE_INTERVAL_MS / 1000
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            stacks = []
+            for tid, frame in frames.items():
+                if tid == own:
+                    continue
+                # On an event-loop thread the sample belongs to whichever task is running
+                loop = self._loops.get(tid)
+                task = asyncio.current_task(loop) if loop is not None else None
+                stage = self._current.get(task if task is not None else tid)
+                stacks.append(self._fold(frame, stage))
+            del frames
+            with self._lock:
+                self._samples.update(stacks)
+            if time.monotonic() - self._window_start >= PROFILE_WINDOW:
+                self._flush()
+
+    @staticmethod
+    def _fold(frame, stage: str | None) -> str:
+        parts = []
+        while frame is not None and len(parts) < PROFILE_MAX_DEPTH:
+            code = frame.f_code
+            parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        parts.append(f"stage:{stage or 'idle'}")
+        return ";".join(reversed(parts))
+
+    # ── output ──────────────────────────────────────────────────────
+    def _flush(self):
+        with self._lock:
+            samples, self._samples = self._samples, Counter()
+            stages, self._stages = self._stages, {}
+            started, self._window_start = self._window_start, time.monotonic()
+        if not samples and not stages:
+            return
+
+        base = os.path.join(PROFILE_DIR, f"profile-{os.getpid()}-{_stamp()}")
+        with open(base + ".folded", "w") as f:
+            for stack, n in samples.most_common():
+                f.write(f"{stack} {n}\n")
+
+        total = sum(samples.values()) or 1
+        per_stage = Counter()
+        for stack, n in samples.items():
+            per_stage[stack.split(";", 1)[0][len("stage:"):]] += n
+
+        lines = [
+            f"window {time.monotonic() - started:.1f}s, {sum(samples.values())} samples "
+            f"every {PROFILE_INTERVAL_MS:g}ms, {_format_rss()}",
+            "",
+            f"{'stage':<16}{'calls':>8}{'mean ms':>10}{'max ms':>10}{'samples':>10}{'alloc KiB':>12}",
+        ]
+        for name in sorted(set(stages) | set(per_stage), key=lambda s: -per_stage[s]):
+            count, total_s, max_s, mem = stages.get(name, [0, 0.0, 0.0, 0])
+            mean_ms = total_s / count * 1000 if count else 0.0
+            lines.append(
+                f"{name:<16}{count:>8}{mean_ms:>10.1f}{max_s * 1000:>10.1f}"
+                f"{per_stage[name] / total:>10.1%}{mem / 1024:>12.1f}"
+            )
+        with open(base + ".txt", "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+        _rotate("profile-", ".folded")
+        _rotate("profile-", ".txt")
+
+    def _heap_diff(self):
+        if not tracemalloc.is_tracing():  # stopped by a concurrent toggle
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        prev, self._heap_prev = self._heap_prev, snapshot
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"tick {self._ticks}, traced {current / 1024:.0f} KiB (peak {peak / 1024:.0f} KiB), {_format_rss()}",
+        ]
+        if prev is None:
+            lines.append("baseline snapshot — growth is reported from the next one")
+        else:
+            lines.append(f"top {TRACEMALLOC_TOP} growth since tick {self._ticks - TRACEMALLOC_EVERY}:")
+            for stat in snapshot.compare_to(prev, "traceback")[:TRACEMALLOC_TOP]:
+                lines.append("")
+                lines.append(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), "
+                             f"now {stat.size / 1024:.1f} KiB")
+                lines.extend(f"    {line}" for line in stat.traceback.format(limit=TRACEMALLOC_DEPTH))
+
+        path = os.path.join(PROFILE_DIR, f"heap-{os.getpid()}-{_stamp()}.txt")
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        _rotate("heap-", ".txt")
+
+    def status(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "dir": PROFILE_DIR,
+            "ticks": self._ticks,
+            "tracemalloc": tracemalloc.is_tracing(),
+        }
+
+
+def _stamp() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+
+
+def _format_rss() -> str:
+    rss = process_memory()["rss_kb"]
+    return f"RSS {rss / 1024:.1f} MiB" if rss is not None else "RSS unavailable"
+
+
+def _rotate(prefix: str, suffix: str):
+    """Keep only the newest PROFILE_KEEP files of one kind for this process."""
+    prefix = f"{prefix}{os.getpid()}-"
+    try:
+        names = sorted(n for n in os.listdir(PROFILE_DIR) if n.startswith(prefix) and n.endswith(suffix))
+    except OSError:
+        return
+    if PROFILE_KEEP <= 0:
+        return
+    for name in names[:-PROFILE_KEEP]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, name))
+        except OSError:
+            pass
+
+
+# ── Singleton ─────────────────────────────────────────────────────
+_profiler: Profiler | None = None
+
+
+def get_profiler() -> Profiler:
+    """Return the process-wide profiler, starting it if PROFILE=1."""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+        if PROFILE:
+            _profiler.start()
+    return _profiler
+
+
+class ProfileMiddleware:
+    """
+    Pure ASGI middleware attributing each request to an ``http <route>``
+    stage and ticking once per request.  When profiling is off it only
+    checks the flag and hands the request on untouched.
+    """
+
+    def __init__(self, app, profiler: Profiler | None = None):
+        self.app = app
+        self.prof = profiler or get_profiler()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.prof.enabled:
+            return await self.app(scope, receive, send)
+        with self.prof.stage(f"http {scope['path']}"):
+            await self.app(scope, receive, send)
+        self.prof.tick()
+
+
+def install_fastapi(app):
+    """
+    Add ProfileMiddleware to ``app``.  It is always installed because
+    profiling can be switched on at run time (POST /api/system/profile).
+    Sync route handlers run in the threadpool, outside the request's stage;
+    their samples are still attributed by call stack.
+    """
+    app.add_middleware(ProfileMiddleware)
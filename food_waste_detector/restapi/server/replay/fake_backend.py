@@ -0,0 +1,161 @@
+"""
+Local stand-in for the TrashTrack backend.
+
+Serves just the two endpoints the session daemon talks to:
+
+    GET  /api/sessions/active
+    POST /api/sessions/:session_id/detections
+
+Latency and failures can be injected per request so the daemon can be
+driven under realistic (or hostile) network conditions without a real
+backend or database.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_DETECTIONS_RE = re.compile(r"^/api/sessions/([^/]+)/detections$")
+
+
+class FakeBackend:
+    """Threaded HTTP server with configurable latency / failure injection."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        session_id: str = "replay-session",
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        poll_latency_ms: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.session_id = session_id
+        self.active = True
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.poll_latency_ms = poll_latency_ms
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.polls = 0
+        self.posts = 0
+        self.failures_injected = 0
+        self.results_received = 0
+
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                backend._handle_get(self)
+
+            def do_POST(self):
+                backend._handle_post(self)
+
+            def log_message(self, *_args):
+                pass  # keep harness output readable
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # ── injection ───────────────────────────────────────────────────
+    def _delay(self, base_ms: float):
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0
+        delay = (base_ms + jitter) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            fail = self.failure_rate > 0 and self._random.random() < self.failure_rate
+            if fail:
+                self.failures_injected += 1
+            return fail
+
+    # ── handlers ────────────────────────────────────────────────────
+    def _send(self, handler, status: int, body: dict):
+        data = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _handle_get(self, handler):
+        if handler.path.split("?")[0] != "/api/sessions/active":
+            self._send(handler, 404, {"error": "Not found"})
+            return
+        with self._lock:
+            self.polls += 1
+        self._delay(self.poll_latency_ms)
+        if not self.active:
+            self._send(handler, 200, {"active": False, "session": None})
+            return
+        self._send(handler, 200, {
+            "active": True,
+            "session": {"session_id": self.session_id, "device_id": "replay"},
+        })
+
+    def _handle_post(self, handler):
+        match = _DETECTIONS_RE.match(handler.path)
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+        if not match:
+            self._send(handler, 404, {"error": "Not found"})
+            return
+        if match.group(1) != self.session_id:
+            self._send(handler, 404, {"error": "Session not found"})
+            return
+
+        self._delay(self.latency_ms)
+        if self._should_fail():
+            self._send(handler, 503, {"error": "Injected failure"})
+            return
+
+        try:
+            results = json.loads(raw or b"{}").get("results") or []
+        except ValueError:
+            self._send(handler, 400, {"error": "Invalid JSON body"})
+            return
+
+        with self._lock:
+            self.posts += 1
+            self.results_received += len(results)
+            total = self.results_received
+        self._send(handler, 201, {
+            "status": "accepted",
+            "session_id": self.session_id,
+            "new_detections": len(results),
+            "total_detections": total,
+        })
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "polls": self.polls,
+                "posts": self.posts,
+                "results_received": self.results_received,
+                "failures_injected": self.failures_injected,
+            }
@@ -0,0 +1,57 @@
+"""
+Reduced-resolution image decoding for the classifier.
+
+The classifier only ever sees a 224×224 input, yet camera stills and
+uploads are 1920×1080 (or larger) JPEGs.  libjpeg can decode at 1/2, 1/4
+or 1/8 scale straight from the DCT coefficients, which skips most of the
+IDCT and colour-conversion work and never materialises the full-size
+frame.  ``decode_image`` / ``read_image`` pick the smallest such scale that
+still leaves both sides at least ``DECODE_MIN_SIZE`` px (a 1920×1080 still
+decodes to 480×270), and apply the EXIF orientation tag so phone uploads
+are upright.
+
+Non-JPEG input (PNG etc.) is decoded at full size.  Set DECODE_REDUCED=0
+to always decode at full size.
+"""
+
+import io
+import os
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+DECODE_REDUCED = os.environ.get("DECODE_REDUCED", "1") == "1"
+# Smallest side the decoded frame may have: the model input (224), raised
+# if a consumer needs more detail (the quality gate scores at ≤320 px wide)
+DECODE_MIN_SIZE = int(os.environ.get("DECODE_MIN_SIZE", "224"))
+
+
+def _to_bgr(image: Image.Image, min_size: int) -> np.ndarray:
+    if DECODE_REDUCED and image.format == "JPEG":
+        # draft() keeps the result ≥ the requested size on both axes
+        image.draft("RGB", (min_size, min_size))
+    image = ImageOps.exif_transpose(image)
+    rgb = np.asarray(image.convert("RGB"))
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+
+def decode_image(data: bytes, min_size: int = DECODE_MIN_SIZE) -> np.ndarray:
+    """
+    Decode encoded image bytes to an upright BGR frame, reduced in size
+    where the format allows.  Raises on unreadable input.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        return _to_bgr(image, min_size)
+
+
+def read_image(path: str, min_size: int = DECODE_MIN_SIZE) -> np.ndarray | None:
+    """
+    Like cv2.imread: an upright BGR frame from ``path``, or None if the
+    file is missing or unreadable.
+    """
+    try:
+        with Image.open(path) as image:
+            return _to_bgr(image, min_size)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
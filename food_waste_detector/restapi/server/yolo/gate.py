@@ -0,0 +1,198 @@
+"""
+Cheap "nothing vs food" gate run before the full classifier (cascade mode).
+
+Most frames in a session show an empty bin.  With CASCADE=1 every frame is
+first scored by a gate, and only frames the gate does not call empty go on
+to the full 224×224 classifier.  Two gates are available (GATE_MODE):
+
+  background  (default) no model at all: the frame, shrunk to a
+              GATE_BG_SIZE px grayscale thumbnail, is compared with a
+              reference of the empty bin.  A mean absolute difference below
+              GATE_MAX_DIFF means nothing has changed, so the bin is empty.
+              The reference is learned from frames the full classifier
+              calls "nothing" — top-1 with P ≥ GATE_LEARN_THRESHOLD, for
+              GATE_LEARN_FRAMES frames in a row — as a running average, so it
+              follows slow lighting changes; or loaded from
+              GATE_REFERENCE_PATH.  Until it has a reference every frame
+              passes.  Costs ~0.1 ms.
+  model       a small invoke.  GATE_MODEL_PATH points at a dedicated gate
+              model whose output index 0 is "nothing" (the classifier's label
+              order or a 2-class [nothing, food] head).  Without it the
+              classifier itself runs at GATE_SIZE×GATE_SIZE — the network
+              ends in global pooling, so it accepts smaller inputs, but a
+              128 px invoke still costs about half a full one on the CPUs
+              tried so far.
+
+A frame is skipped when the gate's P(nothing) ≥ GATE_NOTHING_THRESHOLD (the
+background gate answers 0 or 1).  Keep the threshold high: a skipped food frame
+is lost waste, a passed empty frame only costs one full invoke.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from ai_edge_litert.interpreter import Interpreter
+
+from server.yolo.quantization import dequantize, input_transform
+
+CASCADE = os.environ.get("CASCADE", "0") == "1"
+GATE_MODE = os.environ.get("GATE_MODE", "background")  # background | model
+GATE_NOTHING_THRESHOLD = float(os.environ.get("GATE_NOTHING_THRESHOLD", "0.90"))
+# background gate
+GATE_BG_SIZE = int(os.environ.get("GATE_BG_SIZE", "32"))  # px, thumbnail side
+GATE_MAX_DIFF = float(os.environ.get("GATE_MAX_DIFF", "6"))  # mean |Δgray|, 0–255
+GATE_BG_ALPHA = float(os.environ.get("GATE_BG_ALPHA", "0.2"))  # reference update weight
+GATE_REFERENCE_PATH = os.environ.get("GATE_REFERENCE_PATH", "")  # image of the empty bin
+# The classifier rarely gives an empty bin 90 %, so learning uses its own
+# acceptance level, made safe by requiring a run of empty frames
+GATE_LEARN_THRESHOLD = float(os.environ.get("GATE_LEARN_THRESHOLD", "0.60"))
+GATE_LEARN_FRAMES = int(os.environ.get("GATE_LEARN_FRAMES", "3"))  # consecutive "nothing" frames
+# model gate
+GATE_MODEL_PATH = os.environ.get("GATE_MODEL_PATH", "")
+GATE_SIZE = int(os.environ.get("GATE_SIZE", "128"))  # px, when gating with the classifier itself
+
+
+class CascadeGate(ABC):
+    """Base class: ``score`` returns (n, classes) probabilities, column 0 = P(nothing)."""
+
+    description = ""
+
+    def __init__(self, threshold: float = GATE_NOTHING_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.skipped = 0
+
+    @abstractmethod
+    def score(self, rgb_batch: np.ndarray) -> np.ndarray:
+        """(n, classes) probabilities for an (n, h, w, 3) uint8 RGB batch."""
+
+    def observe(self, rgb: np.ndarray, probs: np.ndarray):
+        """Called with every frame the gate passed and the full classifier's probabilities."""
+
+    def record(self, frames: int, skipped: int):
+        with self._lock:
+            self.frames += frames
+            self.skipped += skipped
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "gate": self.description,
+                "frames": self.frames,
+                "skipped": self.skipped,
+                "skip_rate": round(self.skipped / self.frames, 4) if self.frames else 0.0,
+                "threshold": self.threshold,
+            }
+
+
+class BackgroundGate(CascadeGate):
+    """Empty while the frame still looks like the learned empty-bin reference."""
+
+    def __init__(self, size: int = GATE_BG_SIZE, max_diff: float = GATE_MAX_DIFF,
+                 learn_threshold: float = GATE_LEARN_THRESHOLD, learn_frames: int = GATE_LEARN_FRAMES, **kw):
+        super().__init__(**kw)
+        self.size = size
+        self.max_diff = max_diff
+        self.learn_threshold = learn_threshold
+        self.learn_frames = max(1, learn_frames)
+        self.empty_streak = 0
+        self.learned = 0
+        self.reference: np.ndarray | None = None
+        self.description = f"background diff at {size}×{size}, Δ < {max_diff:g} is empty"
+        if GATE_REFERENCE_PATH:
+            from server.yolo.decode import read_image
+            frame = read_image(GATE_REFERENCE_PATH)
+            if frame is None:
+                print(f"WARNING: could not read GATE_REFERENCE_PATH {GATE_REFERENCE_PATH}")
+            else:
+                self.reference = self._thumb(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+    def _thumb(self, rgb: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        small = cv2.resize(gray, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0).astype(np.float32)
+
+    def score(self, rgb_batch: np.ndarray) -> np.ndarray:
+        probs = np.zeros((len(rgb_batch), 2), dtype=np.float32)
+        reference = self.reference
+        if reference is not None:
+            for i, rgb in enumerate(rgb_batch):
+                diff = float(np.mean(np.abs(self._thumb(rgb) - reference)))
+                probs[i, 0] = 1.0 if diff < self.max_diff else 0.0
+        probs[:, 1] = 1.0 - probs[:, 0]
+        return probs
+
+    def observe(self, rgb: np.ndarray, probs: np.ndarray):
+        if np.argmax(probs) != 0 or probs[0] < self.learn_threshold:
+            self.empty_streak = 0
+            return
+        self.empty_streak += 1
+        if self.empty_streak >= self.learn_frames:
+            self.learn(rgb)  # a confirmed empty bin
+
+    def learn(self, rgb: np.ndarray):
+        """Fold ``rgb`` into the empty-bin reference."""
+        thumb = self._thumb(rgb)
+        with self._lock:
+            if self.reference is None:
+                self.reference = thumb
+            else:
+                self.reference = (1 - GATE_BG_ALPHA) * self.reference + GATE_BG_ALPHA * thumb
+            self.learned += 1
+
+    def stats(self) -> dict:
+        return {**super().stats(), "reference": self.reference is not None, "learned": self.learned}
+
+
+class ModelGate(CascadeGate):
+    """A small invoke: a dedicated gate model, or the classifier at GATE_SIZE."""
+
+    def __init__(self, classifier_path: str, **kw):
+        super().__init__(**kw)
+        path = GATE_MODEL_PATH or classifier_path
+        self._invoke_lock = threading.Lock()
+        self.interpreter = Interpreter(model_path=path)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self._prepare, _ = input_transform(self.input_details[0])
+
+        if not GATE_MODEL_PATH:
+            self._resize(1, GATE_SIZE, GATE_SIZE)
+        self.size = tuple(int(d) for d in self.input_details[0]["shape"][1:3])
+        source = os.path.basename(path) if GATE_MODEL_PATH else "classifier"
+        self.description = f"{source} at {self.size[1]}×{self.size[0]}"
+
+    def _resize(self, n: int, h: int, w: int):
+        self.interpreter.resize_tensor_input(self.input_details[0]["index"], [n, h, w, 3])
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+    def score(self, rgb_batch: np.ndarray) -> np.ndarray:
+        h, w = self.size
+        small = np.stack([cv2.resize(rgb, (w, h), interpolation=cv2.INTER_AREA) for rgb in rgb_batch])
+        with self._invoke_lock:
+            if self.input_details[0]["shape"][0] != len(small):
+                self._resize(len(small), h, w)
+            self.interpreter.set_tensor(self.input_details[0]["index"], self._prepare(small))
+            self.interpreter.invoke()
+            output = self.output_details[0]
+            return dequantize(output, self.interpreter.get_tensor(output["index"]).copy())
+
+
+def make_gate(classifier_path: str) -> CascadeGate:
+    """Build the gate selected by GATE_MODE."""
+    if GATE_MODE == "model":
+        gate = ModelGate(classifier_path)
+    elif GATE_MODE == "background":
+        gate = BackgroundGate()
+    else:
+        raise ValueError(f"Unknown GATE_MODE {GATE_MODE!r} (use 'background' or 'model')")
+    print(f"Cascade gate ready: {gate.description}, skip if P(nothing) ≥ {gate.threshold:.0%}")
+    return gate
@@ -0,0 +1,85 @@
+"""
+Model file lookup and shared, read-only model mapping.
+
+TFLite maps the flatbuffer read-only when an Interpreter is built from a
+path, so the model weights live in the page cache and are shared by every
+worker process that loads the same file.  This module keeps that path
+resolution in one place and adds an optional preload step that maps and
+faults in the file *before* gunicorn forks its workers, so each worker
+starts on warm, shared pages instead of reading the file again.
+"""
+
+import hashlib
+import mmap
+import os
+
+MODEL_FILENAME = os.environ.get("MODEL_FILENAME", "model_unquant.tflite")
+
+# Pages faulted in by preload_model(), keyed by real path.  Kept open for
+# the lifetime of the process so forked workers inherit the mapping.
+_mapped: dict[str, mmap.mmap] = {}
+
+
+def find_model_path(filename: str = MODEL_FILENAME) -> str | None:
+    """Return the real path of the model file, or None if it is missing."""
+    env_path = os.environ.get("MODEL_PATH")
+    candidates = [env_path] if env_path else []
+    candidates += [
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", filename),
+        os.path.join(os.path.dirname(__file__), filename),
+        filename,
+    ]
+    for p in candidates:
+        if os.path.exists(p):
+            return os.path.realpath(p)
+    return None
+
+
+def map_model(path: str) -> mmap.mmap:
+    """
+    Map the model file read-only and fault its pages into the page cache.
+
+    Repeated calls for the same path return the same mapping.
+    """
+    path = os.path.realpath(path)
+    mapped = _mapped.get(path)
+    if mapped is not None:
+        return mapped
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_WILLNEED"):
+        mapped.madvise(mmap.MADV_WILLNEED)
+    # Touch one byte per page so the file is resident before workers fork
+    page = mmap.PAGESIZE
+    for offset in range(0, len(mapped), page):
+        mapped[offset]
+
+    _mapped[path] = mapped
+    return mapped
+
+
+def preload_model() -> str | None:
+    """
+    Map the model file ahead of forking.
+
+    Call from the master process (e.g. with ``gunicorn --preload``) so that
+    every worker shares the same resident page-cache pages.
+    """
+    path = find_model_path()
+    if path is None:
+        print(f"WARNING: {MODEL_FILENAME} not found — skipping preload")
+        return None
+    mapped = map_model(path)
+    print(f"Preloaded model {path} ({len(mapped) / 1024:.0f} KiB, shared mapping)")
+    return path
+
+
+def model_digest(path: str) -> str:
+    """Short content hash of the model file, used as its version tag."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
@@ -0,0 +1,374 @@
+"""
+Append-only on-device log of every classification, for threshold tuning
+and drift analysis.
+
+Each classified frame becomes one fixed-width record in a memory-mapped
+NumPy array (``.npy``, readable with ``np.load(path, mmap_mode="r")``):
+
+  t           float64   unix time of the prediction
+  session     uint16    index into the day's session table (0 = none)
+  gate        uint8     0 no cascade, 1 gate passed, 2 gate skipped the model
+  latency_ms  float32   per-frame classification time
+  probs       float32   full softmax vector, LABELS order
+
+31 bytes a record with 4 classes: a month at one frame per second is about
+80 MB.  One file per local day (``predictions-YYYY-MM-DD.npy``), created
+with room for ``PREDICTION_LOG_DAY_ROWS`` records; a day that fills it
+continues in ``…-YYYY-MM-DD.1.npy``.  Unused records are zero, so the
+fill level is found again after a restart without a separate counter.
+Session ids live in ``predictions-YYYY-MM-DD.sessions.json``.  Files older
+than ``PREDICTION_LOG_DAYS`` are deleted on rotation.
+
+An append is a single record assignment into the mapped page under a lock
+(a few µs); the page cache writes it back, so a crashed process loses
+nothing already appended.  Only one process writes to a directory — it
+holds an flock on ``writer.lock``; other processes (e.g. extra gunicorn
+workers) leave logging off and can still query.
+
+Off unless ``PREDICTION_LOG=1``.
+"""
+
+import atexit
+import csv
+import fcntl
+import glob
+import io
+import json
+import os
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+PREDICTION_LOG = os.environ.get("PREDICTION_LOG", "0") == "1"
+PREDICTION_LOG_DIR = os.environ.get(
+    "PREDICTION_LOG_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "prediction_log"),
+)
+PREDICTION_LOG_DAYS = int(os.environ.get("PREDICTION_LOG_DAYS", "31"))  # days kept
+PREDICTION_LOG_DAY_ROWS = int(os.environ.get("PREDICTION_LOG_DAY_ROWS", "172800"))  # records per file
+
+GATE_NONE, GATE_PASSED, GATE_SKIPPED = 0, 1, 2
+GATE_NAMES = {GATE_NONE: "none", GATE_PASSED: "passed", GATE_SKIPPED: "skipped"}
+
+_FILE_RE = re.compile(r"^predictions-(\d{4}-\d{2}-\d{2})(?:\.(\d+))?\.npy$")
+
+
+def record_dtype(n_classes: int) -> np.dtype:
+    """Packed record layout for ``n_classes`` probabilities."""
+    return np.dtype([
+        ("t", "<f8"),
+        ("session", "<u2"),
+        ("gate", "u1"),
+        ("latency_ms", "<f4"),
+        ("probs", "<f4", (n_classes,)),
+    ])
+
+
+def _day_files(directory: str) -> dict[str, list[str]]:
+    """Day (YYYY-MM-DD) → its record files, in append order."""
+    days: dict[str, list[tuple[int, str]]] = {}
+    for path in glob.glob(os.path.join(directory, "predictions-*.npy")):
+        m = _FILE_RE.match(os.path.basename(path))
+        if m:
+            days.setdefault(m.group(1), []).append((int(m.group(2) or 0), path))
+    return {day: [p for _, p in sorted(parts)] for day, parts in sorted(days.items())}
+
+
+def _sessions_path(directory: str, day: str) -> str:
+    return os.path.join(directory, f"predictions-{day}.sessions.json")
+
+
+def _load_sessions(directory: str, day: str) -> list[str]:
+    try:
+        with open(_sessions_path(directory, day)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return [""]
+
+
+def _filled(rows: np.ndarray) -> int:
+    """Number of records written: unused records are all zero (t == 0)."""
+    empty = np.flatnonzero(rows["t"] == 0)
+    return int(empty[0]) if len(empty) else len(rows)
+
+
+class PredictionLog:
+    """Writer side: one open day file, appended to under a lock."""
+
+    def __init__(self, n_classes: int, directory: str = PREDICTION_LOG_DIR):
+        self.n_classes = n_classes
+        self.directory = directory
+        self.dtype = record_dtype(n_classes)
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._rows: np.ndarray | None = None
+        self._path: str | None = None
+        self._n = 0
+        self._day: str | None = None
+        self._day_end = 0.0
+        self._sessions: list[str] = [""]
+        self._session_id = ""
+        self._session_idx = 0
+        self.appended = 0
+
+    # ── lifecycle ───────────────────────────────────────────────────
+    def start(self) -> bool:
+        """Take the directory's writer lock and start logging; False if another process holds it."""
+        if self.enabled:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, "writer.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            print(f"  [predlog] {self.directory} is being written by another process — logging off here")
+            return False
+        self._lock_file = lock_file
+        self.enabled = True
+        print(f"  [predlog] Logging predictions to {self.directory}")
+        return True
+
+    def close(self):
+        with self._lock:
+            self.enabled = False
+            if self._rows is not None:
+                self._rows.flush()
+                self._rows = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+    # ── writing ─────────────────────────────────────────────────────
+    def set_session(self, session_id: str | None):
+        """Tag the following records with ``session_id`` (None clears it)."""
+        with self._lock:
+            self._session_id = session_id or ""
+            if self._rows is not None:
+                self._session_idx = self._session_index(self._session_id)
+
+    def append(self, probs: np.ndarray, latency_ms: float, gate: int = GATE_NONE, t: float | None = None):
+        """Record one prediction."""
+        if not self.enabled:
+            return
+        t = time.time() if t is None else t
+        with self._lock:
+            if t >= self._day_end or self._n >= len(self._rows):
+                self._open_for(t)
+            self._rows[self._n] = (t, self._session_idx, gate, latency_ms, probs)
+            self._n += 1
+            self.appended += 1
+
+    def _session_index(self, session_id: str) -> int:
+        if not session_id:
+            return 0
+        try:
+            return self._sessions.index(session_id)
+        except ValueError:
+            pass
+        if len(self._sessions) > np.iinfo(np.uint16).max:
+            return 0
+        self._sessions.append(session_id)
+        tmp = _sessions_path(self.directory, self._day) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._sessions, f)
+        os.replace(tmp, _sessions_path(self.directory, self._day))
+        return len(self._sessions) - 1
+
+    def _open_for(self, t: float):
+        """Open (or create) the file that takes a record at time ``t``."""
+        if self._rows is not None:
+            self._rows.flush()
+
+        day_start = datetime.fromtimestamp(t).replace(hour=0, minute=0, second=0, microsecond=0)
+        day = day_start.date().isoformat()
+        if day != self._day:
+            self._day = day
+            self._day_end = (day_start + timedelta(days=1)).timestamp()
+            self._sessions = _load_sessions(self.directory, day)
+            self._prune(day_start.date())
+
+        parts = _day_files(self.directory).get(day, [])
+        rows = None
+        if parts:
+            rows = np.load(parts[-1], mmap_mode="r+")
+            if rows.dtype != self.dtype:
+                print(f"  [predlog] {parts[-1]} has another record layout — starting a new part")
+                rows = None
+            else:
+                self._n = _filled(rows)
+                if self._n >= len(rows):
+                    rows = None
+        if rows is None:
+            suffix = f".{len(parts)}" if parts else ""
+            path = os.path.join(self.directory, f"predictions-{day}{suffix}.npy")
+            rows = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=(PREDICTION_LOG_DAY_ROWS,))
+            self._n = 0
+            parts.append(path)
+        self._rows = rows
+        self._path = parts[-1]
+        self._session_idx = self._session_index(self._session_id)
+
+    def _prune(self, today: date):
+        oldest = (today - timedelta(days=PREDICTION_LOG_DAYS - 1)).isoformat()
+        for day, paths in _day_files(self.directory).items():
+            if day < oldest:
+                for path in paths + [_sessions_path(self.directory, day)]:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                print(f"  [predlog] Removed {day} (older than {PREDICTION_LOG_DAYS} days)")
+
+    def stats(self) -> dict:
+        files = [p for paths in _day_files(self.directory).values() for p in paths]
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "current_file": self._path,
+            "records_in_file": self._n,
+            "appended": self.appended,
+            "files": len(files),
+            # Preallocated files are sparse; report the blocks actually used
+            "disk_bytes": sum(os.stat(p).st_blocks * 512 for p in files),
+        }
+
+
+# ── Reading ───────────────────────────────────────────────────────
+_CSV_CHUNK = 64 * 1024  # characters per yielded CSV chunk
+
+
+def _to_epoch(value, name: str) -> float | None:
+    """Unix seconds for ``value``; ValueError unless it is a representable local time."""
+    if value is None:
+        return None
+    try:
+        t = float(value) if isinstance(value, (int, float)) else datetime.fromisoformat(value).timestamp()
+        date.fromtimestamp(t)
+    except (OverflowError, OSError, ValueError) as e:
+        raise ValueError(f"{name} is not a valid time: {value!r}") from e
+    return t
+
+
+def query_arrays(start=None, end=None, label: int | None = None, min_conf: float = 0.0,
+                 max_conf: float = 1.0, session_id: str | None = None,
+                 directory: str = PREDICTION_LOG_DIR):
+    """
+    Iterate ``(records, sessions)`` per file for records with ``start ≤ t < end``
+    (unix seconds or ISO 8601), top-1 class ``label`` and top-1 confidence
+    in ``[min_conf, max_conf]``.  ``records`` is a structured array (a copy),
+    ``sessions`` the file's session table.  Works from any process.
+
+    The range is checked before anything is read: a bad ``start`` / ``end``
+    raises ValueError here, not halfway through the iteration.
+    """
+    start, end = _to_epoch(start, "start"), _to_epoch(end, "end")
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end")
+    return _iter_arrays(start, end, label, min_conf, max_conf, session_id, directory)
+
+
+def _iter_arrays(start, end, label, min_conf, max_conf, session_id, directory):
+    first_day = date.fromtimestamp(start).isoformat() if start is not None else None
+    last_day = date.fromtimestamp(end).isoformat() if end is not None else None
+
+    for day, paths in _day_files(directory).items():
+        if (first_day and day < first_day) or (last_day and day > last_day):
+            continue
+        sessions = _load_sessions(directory, day)
+        if session_id is not None and session_id not in sessions:
+            continue
+        for path in paths:
+            rows = np.load(path, mmap_mode="r")
+            rows = rows[:_filled(rows)]
+            if not len(rows):
+                continue
+            # A mask rather than a bisect: the Pi has no RTC, so t can step back
+            probs = rows["probs"]
+            conf = probs.max(axis=1)
+            mask = (conf >= min_conf) & (conf <= max_conf)
+            if start is not None:
+                mask &= rows["t"] >= start
+            if end is not None:
+                mask &= rows["t"] < end
+            if label is not None:
+                mask &= probs.argmax(axis=1) == label
+            if session_id is not None:
+                mask &= rows["session"] == sessions.index(session_id)
+            selected = rows[mask]
+            if len(selected):
+                yield np.array(selected), sessions
+
+
+def _as_dicts(records: np.ndarray, sessions: list[str], labels: list[str]):
+    for r in records:
+        probs = r["probs"]
+        best = int(np.argmax(probs))
+        idx = int(r["session"])
+        yield {
+            "time": datetime.fromtimestamp(float(r["t"])).isoformat(timespec="milliseconds"),
+            "session_id": sessions[idx] if idx < len(sessions) else "",
+            "label": labels[best] if best < len(labels) else str(best),
+            "confidence": round(float(probs[best]), 4),
+            "probabilities": {
+                (labels[i] if i < len(labels) else str(i)): round(float(p), 4) for i, p in enumerate(probs)
+            },
+            "latency_ms": round(float(r["latency_ms"]), 2),
+            "gate": GATE_NAMES.get(int(r["gate"]), str(int(r["gate"]))),
+        }
+
+
+def query(labels: list[str], limit: int | None = None, **filters) -> list[dict]:
+    """``query_arrays`` as JSON-ready dicts, oldest first, at most ``limit``."""
+    out = []
+    for records, sessions in query_arrays(**filters):
+        for row in _as_dicts(records, sessions, labels):
+            out.append(row)
+            if limit is not None and len(out) >= limit:
+                return out
+    return out
+
+
+def iter_csv(labels: list[str], **filters):
+    """
+    Matching records as CSV text (one column per class), in chunks of about
+    64 KiB, read file by file so an export never holds more than one day
+    file's matches.  Filters are validated before the first chunk.
+    """
+    return _csv_chunks(query_arrays(**filters), labels)
+
+
+def _csv_chunks(batches, labels: list[str]):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["time", "session_id", "label", "confidence", "latency_ms", "gate", *labels])
+    for records, sessions in batches:
+        for row in _as_dicts(records, sessions, labels):
+            writer.writerow([
+                row["time"], row["session_id"], row["label"], row["confidence"],
+                row["latency_ms"], row["gate"], *row["probabilities"].values(),
+            ])
+            if buf.tell() >= _CSV_CHUNK:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+    yield buf.getvalue()
+
+
+# ── Singleton ─────────────────────────────────────────────────────
+_log: PredictionLog | None = None
+
+
+def get_prediction_log(n_classes: int) -> PredictionLog:
+    """Return the process-wide log, started if PREDICTION_LOG=1."""
+    global _log
+    if _log is None:
+        _log = PredictionLog(n_classes)
+        if PREDICTION_LOG:
+            _log.start()
+        atexit.register(_log.close)
+    return _log
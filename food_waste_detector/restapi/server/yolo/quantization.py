@@ -0,0 +1,75 @@
+"""
+Input and output conversion for float and full-integer quantized models.
+
+The Teachable Machine float model takes float32 RGB in [-1, 1].  A
+full-integer model (see quantize_model.py) takes uint8 or int8 and stores
+``real = scale * (q - zero_point)`` in its tensor details, so the
+preprocessing is derived from the interpreter rather than configured:
+
+  float32        x / 127.5 - 1
+  uint8 / int8   a 256-entry lookup table from the uint8 pixel to the
+                 quantized value of x / 127.5 - 1.  When the table is within
+                 one quantization step of the identity (uint8, scale ≈
+                 1/127.5, zero point 127 or 128 — what the converter picks
+                 for [-1, 1] calibration data) the frame is passed through
+                 untouched, with no copy at all.
+
+Quantized outputs are dequantized back to float32 probabilities.
+"""
+
+import cv2
+import numpy as np
+
+# Real input range the classifier was trained on: pixel / 127.5 - 1
+_PIXEL_SCALE = 1 / 127.5
+_PIXEL_OFFSET = -1.0
+
+
+def _quantization(detail: dict) -> tuple[float, int]:
+    scale, zero_point = detail.get("quantization", (0.0, 0))
+    return float(scale), int(zero_point)
+
+
+def normalise_float(rgb: np.ndarray) -> np.ndarray:
+    """uint8 RGB → float32 in [-1, 1]."""
+    return (rgb.astype(np.float32) * _PIXEL_SCALE) + _PIXEL_OFFSET
+
+
+def input_transform(detail: dict):
+    """
+    Return ``(fn, description)`` where ``fn`` maps an (n, h, w, 3) uint8 RGB
+    batch to what the input tensor described by ``detail`` expects.
+    """
+    dtype = np.dtype(detail["dtype"])
+    if dtype == np.float32:
+        return normalise_float, "float32 [-1, 1]"
+    if dtype not in (np.uint8, np.int8):
+        raise ValueError(f"Unsupported model input type {dtype}")
+
+    scale, zero_point = _quantization(detail)
+    if scale == 0.0:
+        raise ValueError(f"{dtype} model input has no quantization parameters")
+
+    info = np.iinfo(dtype)
+    pixels = np.arange(256, dtype=np.float64)
+    lut = np.clip(np.round((pixels * _PIXEL_SCALE + _PIXEL_OFFSET) / scale + zero_point), info.min, info.max)
+    lut = lut.astype(dtype)
+
+    if dtype == np.uint8 and np.abs(lut.astype(np.int16) - np.arange(256)).max() <= 1:
+        return (lambda rgb: rgb), f"uint8 passthrough (scale {scale:.6f}, zero point {zero_point})"
+
+    def apply(rgb: np.ndarray) -> np.ndarray:
+        # cv2.LUT wants 2-D/3-D images: fold the batch into the rows
+        return cv2.LUT(rgb.reshape(-1, *rgb.shape[-2:]), lut).reshape(rgb.shape)
+
+    return apply, f"{dtype} lookup (scale {scale:.6f}, zero point {zero_point})"
+
+
+def dequantize(detail: dict, values: np.ndarray) -> np.ndarray:
+    """Output tensor → float32, applying the tensor's quantization if it has one."""
+    if values.dtype == np.float32:
+        return values
+    scale, zero_point = _quantization(detail)
+    if scale == 0.0:
+        return values.astype(np.float32)
+    return (values.astype(np.float32) - zero_point) * scale
@@ -0,0 +1,171 @@
+"""
+Content-addressed cache of classification results.
+
+Tablets re-upload the same photo on retries and when a report is reopened.
+Results are keyed by a hash of the uploaded bytes plus the model version,
+so an exact repeat is answered without decoding or invoking the model.
+
+Optionally, a 64-bit difference hash (dHash) of the decoded image is kept
+per entry so that re-encoded / re-compressed copies of the same photo can
+be matched by Hamming distance.  That lookup only happens after an exact
+miss, when the image has to be decoded for inference anyway.
+
+The cache is bounded by entry count (LRU eviction) and entries expire after
+a TTL.  Changing the model version drops every entry.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+DETECT_CACHE_SIZE = int(os.environ.get("DETECT_CACHE_SIZE", "256"))
+DETECT_CACHE_TTL = float(os.environ.get("DETECT_CACHE_TTL", "600"))  # seconds
+# Max Hamming distance (out of 64 bits) for a near-duplicate match; -1 disables
+DETECT_CACHE_PHASH_DISTANCE = int(os.environ.get("DETECT_CACHE_PHASH_DISTANCE", "-1"))
+
+
+def content_key(data: bytes, model_version: str | None) -> str:
+    """Hash of the uploaded bytes, scoped to the model that produced the result."""
+    h = hashlib.sha256()
+    h.update((model_version or "").encode())
+    h.update(b"\0")
+    h.update(data)
+    return h.hexdigest()
+
+
+def perceptual_hash(frame: np.ndarray) -> int:
+    """
+    64-bit dHash of a BGR or grayscale frame.
+
+    Each bit records whether a pixel is brighter than its right neighbour on
+    a 9×8 grayscale thumbnail, which survives re-compression and resizing.
+    """
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    thumb = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (thumb[:, 1:] > thumb[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "phash")
+
+    def __init__(self, value, expires_at: float, phash: int | None):
+        self.value = value
+        self.expires_at = expires_at
+        self.phash = phash
+
+
+class ResultCache:
+    """Thread-safe LRU + TTL cache of classification results."""
+
+    def __init__(
+        self,
+        max_entries: int = DETECT_CACHE_SIZE,
+        ttl: float = DETECT_CACHE_TTL,
+        phash_distance: int = DETECT_CACHE_PHASH_DISTANCE,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.phash_distance = phash_distance
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._model_version: str | None = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def near_duplicates_enabled(self) -> bool:
+        return self.phash_distance >= 0
+
+    # ── internals (lock held) ───────────────────────────────────────
+    def _check_version(self, model_version: str | None):
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_version = model_version
+
+    def _live(self, key: str, now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    # ── public API ──────────────────────────────────────────────────
+    def get(self, key: str, model_version: str | None):
+        """Exact lookup.  Returns the cached value or None."""
+        with self._lock:
+            self._check_version(model_version)
+            entry = self._live(key, time.monotonic())
+            if entry is not None:
+                self.hits += 1
+                return entry.value
+            # With near-duplicate matching on, get_similar() counts the miss
+            if not self.near_duplicates_enabled:
+                self.misses += 1
+            return None
+
+    def get_similar(self, phash: int, model_version: str | None):
+        """Near-duplicate lookup by dHash.  Call after an exact miss."""
+        with self._lock:
+            self._check_version(model_version)
+            now = time.monotonic()
+            best_key, best_dist = None, self.phash_distance + 1
+            for key, entry in list(self._entries.items()):
+                if entry.expires_at <= now:
+                    del self._entries[key]
+                    continue
+                if entry.phash is None:
+                    continue
+                dist = (entry.phash ^ phash).bit_count()
+                if dist < best_dist:
+                    best_key, best_dist = key, dist
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.near_hits += 1
+            return self._entries[best_key].value
+
+    def put(self, key: str, model_version: str | None, value, phash: int | None = None):
+        with self._lock:
+            self._check_version(model_version)
+            self._entries[key] = _Entry(value, time.monotonic() + self.ttl, phash)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl,
+                "model_version": self._model_version,
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round((self.hits + self.near_hits) / lookups, 4) if lookups else 0.0,
+                "near_duplicates": self.near_duplicates_enabled,
+                "phash_distance": self.phash_distance,
+            }
@@ -0,0 +1,158 @@
+"""
+Wire format for model-sized frames sent by devices that preprocess locally.
+
+A request body is a C-ordered uint8 RGB buffer, either one frame of shape
+(h, w, 3) or a batch of shape (n, h, w, 3), where h × w is the model input
+(224 × 224 → 150 528 bytes per frame):
+
+  X-Tensor-Shape    "224,224,3" or "4,224,224,3"
+  Content-Encoding  identity (default), gzip, or zstd (needs ``zstandard``)
+
+``encode_tensor`` builds such a request on the device side and
+``decode_tensor`` validates and unpacks it on the server.  The shape header
+fixes the decoded size before the body is read: ``max_body_size`` bounds
+the upload itself (raw size, plus the few bytes gzip / zstd add to
+incompressible data), and decompression stops one byte past the declared
+size, so neither a large body nor a small compressed one can make the
+server buffer more than about one batch.
+"""
+
+import io
+import os
+import zlib
+
+import numpy as np
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+TENSOR_MAX_BATCH = int(os.environ.get("TENSOR_MAX_BATCH", "16"))
+ENCODINGS = ("identity", "gzip", "zstd")
+
+
+class TensorDecodeError(ValueError):
+    """Request is not a valid tensor; ``status`` is the HTTP status to return."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_shape(header: str | None) -> tuple[int, ...]:
+    if not header:
+        raise TensorDecodeError("X-Tensor-Shape header is required, e.g. '224,224,3'")
+    try:
+        shape = tuple(int(d) for d in header.replace("x", ",").split(","))
+    except ValueError:
+        raise TensorDecodeError(f"Malformed X-Tensor-Shape {header!r}")
+    if len(shape) not in (3, 4) or any(d <= 0 for d in shape):
+        raise TensorDecodeError(f"X-Tensor-Shape must be h,w,3 or n,h,w,3, got {header!r}")
+    return shape
+
+
+def expected_size(shape_header: str | None, input_size: tuple[int, int]) -> tuple[tuple[int, ...], bool, int]:
+    """
+    Check the shape header against the model's (h, w) input and
+    TENSOR_MAX_BATCH; returns ``(shape, batched, size)`` with ``size`` the
+    decoded byte count.
+    """
+    shape = parse_shape(shape_header)
+    batched = len(shape) == 4
+    n = shape[0] if batched else 1
+    frame_shape = shape[1:] if batched else shape
+
+    h, w = input_size
+    if frame_shape != (h, w, 3):
+        raise TensorDecodeError(f"Frames must be {h},{w},3 (model input), got {','.join(map(str, frame_shape))}")
+    if n > TENSOR_MAX_BATCH:
+        raise TensorDecodeError(f"Batch of {n} exceeds TENSOR_MAX_BATCH ({TENSOR_MAX_BATCH})", status=413)
+    return shape, batched, n * h * w * 3
+
+
+def _normalise_encoding(encoding: str | None) -> str:
+    encoding = (encoding or "").strip().lower() or "identity"
+    if encoding not in ENCODINGS:
+        raise TensorDecodeError(f"Unsupported Content-Encoding {encoding!r}; use one of {ENCODINGS}", status=415)
+    if encoding == "zstd" and not ZSTD_AVAILABLE:
+        raise TensorDecodeError("zstd bodies need the zstandard package on the server", status=415)
+    return encoding
+
+
+def max_body_size(size: int, encoding: str | None) -> int:
+    """Largest body accepted for ``size`` decoded bytes in ``encoding``."""
+    if _normalise_encoding(encoding) == "identity":
+        return size
+    # Stored / raw blocks add a few bytes per 64–128 KiB, plus the frame header
+    return size + size // 1024 + 1024
+
+
+def _decompress(body: bytes, encoding: str, size: int) -> bytes:
+    if encoding == "identity":
+        return body
+    if encoding == "gzip":
+        d = zlib.decompressobj(wbits=47)  # gzip or zlib header
+        try:
+            out = d.decompress(body, size + 1)
+        except zlib.error as e:
+            raise TensorDecodeError(f"Invalid gzip body: {e}")
+        return out
+    if encoding == "zstd":
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(body)) as reader:
+                chunks, total = [], 0
+                while total <= size:
+                    chunk = reader.read(size + 1 - total)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    total += len(chunk)
+            return b"".join(chunks)
+        except zstandard.ZstdError as e:
+            raise TensorDecodeError(f"Invalid zstd body: {e}")
+    raise TensorDecodeError(f"Unsupported Content-Encoding {encoding!r}; use one of {ENCODINGS}", status=415)
+
+
+def decode_tensor(body: bytes, shape_header: str | None, encoding: str | None,
+                  input_size: tuple[int, int]) -> tuple[np.ndarray, bool]:
+    """
+    Validate a request against the model's (h, w) input and return
+    ``(batch, batched)``: a read-only (n, h, w, 3) uint8 array and whether
+    the client sent a batch shape.
+    """
+    shape, batched, size = expected_size(shape_header, input_size)
+    encoding = _normalise_encoding(encoding)
+    if len(body) > max_body_size(size, encoding):
+        raise TensorDecodeError(f"Body of {len(body)} bytes is too large for shape {shape}", status=413)
+    data = _decompress(body, encoding, size)
+    if len(data) != size:
+        raise TensorDecodeError(f"Body is {len(data)} bytes after decoding, expected {size} for shape {shape}")
+    h, w = input_size
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, h, w, 3), batched
+
+
+def encode_tensor(rgb: np.ndarray, encoding: str = "gzip", level: int | None = None) -> tuple[bytes, dict]:
+    """
+    Device side: pack a (h, w, 3) or (n, h, w, 3) uint8 RGB array.
+    Returns ``(body, headers)`` ready to POST to /api/detect/tensor.
+    """
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    raw = rgb.tobytes()
+    if encoding == "gzip":
+        body = zlib.compress(raw, 6 if level is None else level, wbits=31)
+    elif encoding == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("zstd encoding needs the zstandard package")
+        body = zstandard.ZstdCompressor(level=3 if level is None else level).compress(raw)
+    elif encoding == "identity":
+        body = raw
+    else:
+        raise ValueError(f"Unsupported encoding {encoding!r}; use one of {ENCODINGS}")
+    headers = {
+        "Content-Type": "application/octet-stream",
+        "Content-Encoding": encoding,
+        "X-Tensor-Shape": ",".join(str(d) for d in rgb.shape),
+    }
+    return body, headers
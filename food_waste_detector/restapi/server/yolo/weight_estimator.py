@@ -1,14 +1,31 @@
 """
-Fixed-weight lookup for Teachable Machine food classifier.
+Weight estimation for the Teachable Machine food classifier.
 
-The model classifies images into three categories with known physical weights:
+Each category has a known whole-item weight:
   - Pizza:     120 g  (±5 g)
   - Muffin:     90 g  (±5 g)
   - Croissant:  69 g  (±2 g)
 
-No pixel-area estimation is needed — each detection maps to a fixed weight.
+These fixed weights are what gets reported unless calibration curves
+measured on site are supplied through ``WEIGHT_CALIBRATION_PATH``.  With
+curves, the visible food area is segmented on the model-sized input frame
+and converted to grams, so a half-eaten item weighs roughly half as much as
+a whole one.  The fixed weights remain the fallback when no frame is given,
+the category has no curve, or the segmentation finds too little food to
+trust.  The segmented area is reported either way.
+
+Segmentation works on the 224×224 RGB frame the classifier already
+produced: a pixel counts as food if it is saturated, not dark, and differs
+from the background colour (the median of the frame border).  This costs
+well under a millisecond per frame.
 """
 
+import json
+import os
+
+import cv2
+import numpy as np
+
 # ── Fixed weights in kg ─────────────────────────────────────────────
 FIXED_WEIGHT_KG: dict[str, float] = {
     "pizza":     0.120,
@@ -17,6 +34,48 @@ FIXED_WEIGHT_KG: dict[str, float] = {
     "nothing":   0.0,
 }
 
+# ── Area → weight calibration ───────────────────────────────────────
+# JSON file of {"pizza": [[area_fraction, grams], ...], ...}, measured on
+# site by weighing items and noting the fraction of the frame they cover.
+# np.interp is used between points and clamps beyond the last one, so an
+# item can never weigh more than its final calibration point.  There are no
+# built-in curves: the area/weight relation depends on the camera height and
+# the bin, so without this file the fixed weights are used.
+WEIGHT_CALIBRATION_PATH = os.environ.get("WEIGHT_CALIBRATION_PATH", "")
+# Below this fraction the mask is treated as a segmentation miss
+MIN_AREA_FRACTION = float(os.environ.get("MIN_AREA_FRACTION", "0.005"))
+
+SEG_MIN_SATURATION = 60
+SEG_MIN_VALUE = 50
+SEG_MIN_BG_DISTANCE = 25
+_OPEN_KERNEL = np.ones((3, 3), np.uint8)
+
+
+def _load_calibration(path: str = WEIGHT_CALIBRATION_PATH) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    if not path:
+        return {}
+    curves = {}
+    try:
+        with open(path) as f:
+            table = json.load(f)
+        for category, points in table.items():
+            pts = sorted((float(a), float(g)) for a, g in points)
+            if not pts or not np.isfinite(pts).all():
+                print(f"WARNING: {path}: {category!r} needs finite [area_fraction, grams] points "
+                      f"— using its fixed weight")
+                continue
+            curves[category.lower()] = (
+                np.array([a for a, _ in pts]),
+                np.array([g for _, g in pts]) / 1000.0,  # grams → kg
+            )
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        print(f"WARNING: could not read {path} ({e}) — using the fixed weights")
+        return {}
+    return curves
+
+
+CALIBRATION = _load_calibration()
+
 
 def is_food(category: str) -> bool:
     """Return True if the category is a recognised food item."""
@@ -24,15 +83,65 @@ def is_food(category: str) -> bool:
     return cat in FIXED_WEIGHT_KG and cat != "nothing"
 
 
-def estimate_weight(detected_objects: list[dict], **_kwargs) -> list[dict]:
+def segment_food(frame_rgb: np.ndarray) -> np.ndarray:
+    """
+    Return a uint8 {0, 1} mask of food pixels in a small RGB frame.
     """
-    Assign fixed weight_kg to each detected object.
+    hsv = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2HSV)
 
-    Mutates and returns the same list with 'weight_kg' added.
+    border = np.concatenate([frame_rgb[0], frame_rgb[-1], frame_rgb[:, 0], frame_rgb[:, -1]])
+    bg = np.median(border, axis=0)
+    scalar = np.array([[bg[0]], [bg[1]], [bg[2]], [0.0]])
+    bg_distance = cv2.cvtColor(cv2.absdiff(frame_rgb, scalar), cv2.COLOR_RGB2GRAY)
+
+    mask = (
+        (hsv[..., 1] >= SEG_MIN_SATURATION)
+        & (hsv[..., 2] >= SEG_MIN_VALUE)
+        & (bg_distance >= SEG_MIN_BG_DISTANCE)
+    )
+    # Drop isolated speckle (texture on the bin walls, sensor noise)
+    return cv2.morphologyEx(mask.view(np.uint8), cv2.MORPH_OPEN, _OPEN_KERNEL)
+
+
+def area_to_weight_kg(category: str, area_fraction: float) -> float | None:
+    """Weight in kg from the calibration curve, or None if there is no curve."""
+    curve = CALIBRATION.get(category.lower())
+    if curve is None:
+        return None
+    return float(np.interp(area_fraction, *curve))
+
+
+def estimate_weight(detected_objects: list[dict], frame: np.ndarray | None = None,
+                    **_kwargs) -> list[dict]:
     """
+    Assign weight_kg to each detected object.
+
+    With ``frame`` (the classifier's model-sized RGB input) the weight comes
+    from the segmented food area and ``area_px`` / ``area_fraction`` are
+    added too; otherwise the fixed per-category weight is used.
+    ``weight_source`` records which one was applied.
+
+    Mutates and returns the same list.
+    """
+    area_px = None
+    if frame is not None and detected_objects:
+        area_px = int(np.count_nonzero(segment_food(frame)))
+        area_fraction = area_px / (frame.shape[0] * frame.shape[1])
+
     for obj in detected_objects:
         category = obj.get("label_name", "").lower()
-        obj["weight_kg"] = FIXED_WEIGHT_KG.get(category, 0.0)
+        weight = None
+        if area_px is not None:
+            obj["area_px"] = area_px
+            obj["area_fraction"] = round(area_fraction, 4)
+            if area_fraction >= MIN_AREA_FRACTION:
+                weight = area_to_weight_kg(category, area_fraction)
+        if weight is None:
+            obj["weight_kg"] = FIXED_WEIGHT_KG.get(category, 0.0)
+            obj["weight_source"] = "fixed"
+        else:
+            obj["weight_kg"] = weight
+            obj["weight_source"] = "area"
     return detected_objects
 
 
@@ -8,14 +8,26 @@ The model classifies the full frame into one of three food categories:
 
 Input : [1, 224, 224, 3]  float32  (RGB, normalised to [-1, 1])
 Output: [1, 3]            float32  (softmax probabilities)
+
+A full-integer quantized variant (uint8 in/out, see quantize_model.py) is
+loaded the same way; the preprocessing and output dequantization follow the
+interpreter's tensor types (server/yolo/quantization.py).
 """
 
 import cv2
 import numpy as np
 import os
+import threading
+import time
 
 from ai_edge_litert.interpreter import Interpreter
 
+from server.memory import format_memory
+from server.yolo.gate import CASCADE, CascadeGate, make_gate
+from server.yolo.model_store import MODEL_FILENAME, find_model_path, model_digest
+from server.yolo.prediction_log import GATE_NONE, GATE_PASSED, GATE_SKIPPED, get_prediction_log
+from server.yolo.quantization import dequantize, input_transform
+
 
 # Class labels in the same order the Teachable Machine model was trained
 LABELS = ["nothing", "pizza", "muffin", "croissant"]
@@ -23,47 +35,153 @@ LABELS = ["nothing", "pizza", "muffin", "croissant"]
 # Minimum confidence required to count as a valid detection
 CONFIDENCE_THRESHOLD = float(os.environ.get("CONFIDENCE_THRESHOLD", "0.60"))
 
+# Invokes after which an interpreter batch larger than anything since
+# requested is shrunk back (the batch otherwise only grows, see _invoke);
+# 1 resizes to every batch exactly
+INVOKE_SHRINK_CALLS = int(os.environ.get("INVOKE_SHRINK_CALLS", "64"))
+
 
 class FoodClassifier:
     """Drop-in replacement for the old YOLOModel class."""
 
-    def __init__(self):
+    def __init__(self, cascade: bool = CASCADE, model_path: str | None = None):
         self.model = None          # set to non-None when ready
         self.interpreter = None
         self.input_details = None
         self.output_details = None
-        self._load_model()
+        self.model_version = None  # content hash of the loaded model file
+        self.model_path = None
+        # uint8 RGB batch → input tensor, chosen from the input dtype on load
+        self._prepare = None
+        self.input_format = None
+        self._lock = threading.Lock()  # the interpreter is not thread-safe
+        # Interpreter batch bookkeeping (see _invoke)
+        self.reallocations = 0     # resize_tensor_input + allocate_tensors calls
+        self.padded_frames = 0     # padding frames invoked to keep the allocated batch
+        self._peak_batch = 0       # largest batch since the last shrink check
+        self._peak_calls = 0
+        # Model-sized RGB frames from the last predict / predict_batch call,
+        # reused downstream (e.g. area-based weight estimation)
+        self.last_inputs: list[np.ndarray] = []
+        self.gate: CascadeGate | None = None  # cascade mode, see server/yolo/gate.py
+        # Every prediction's softmax vector, when PREDICTION_LOG=1
+        self.prediction_log = get_prediction_log(len(LABELS))
+        self._load_model(cascade, model_path)
 
     # ── model loading ───────────────────────────────────────────────
-    def _load_model(self):
-        model_paths = [
-            os.path.join(os.path.dirname(__file__), "..", "..", "..", "model_unquant.tflite"),
-            os.path.join(os.path.dirname(__file__), "model_unquant.tflite"),
-            "model_unquant.tflite",
-        ]
-        model_path = None
-        for p in model_paths:
-            if os.path.exists(p):
-                model_path = os.path.realpath(p)
-                break
-
-        if model_path is None:
-            print("ERROR: model_unquant.tflite not found!")
+    def _load_model(self, cascade: bool, model_path: str | None):
+        model_path = model_path or find_model_path()
+        if model_path is None or not os.path.exists(model_path):
+            print(f"ERROR: {model_path or MODEL_FILENAME} not found!")
             return
 
         try:
             print(f"Loading TFLite model from {model_path} …")
+            # Loading by path lets TFLite mmap the flatbuffer read-only, so the
+            # weights stay in the shared page cache rather than a heap copy.
             self.interpreter = Interpreter(model_path=model_path)
             self.interpreter.allocate_tensors()
             self.input_details = self.interpreter.get_input_details()
             self.output_details = self.interpreter.get_output_details()
+            self._prepare, self.input_format = input_transform(self.input_details[0])
             self.model = True  # flag used by callers to check readiness
+            self.model_path = model_path
+            self.model_version = model_digest(model_path)
             h, w = self.input_details[0]["shape"][1:3]
-            print(f"Model loaded!  Input: {w}×{h}  Classes: {LABELS}")
+            print(f"Model loaded!  Input: {w}×{h} {self.input_format}  Classes: {LABELS}")
+            print(f"  [memory] {format_memory()}")
         except Exception as e:
             print(f"Error loading model: {e}")
+            return
+
+        if cascade:
+            try:
+                self.gate = make_gate(model_path)
+            except Exception as e:
+                print(f"WARNING: cascade gate failed to load ({e}) — running the full classifier only")
+
+    @property
+    def last_input(self) -> np.ndarray | None:
+        """Model-sized RGB frame from the last predict() call."""
+        return self.last_inputs[0] if self.last_inputs else None
+
+    @property
+    def input_size(self) -> tuple[int, int]:
+        """(height, width) of the model input."""
+        h, w = self.input_details[0]["shape"][1:3]
+        return int(h), int(w)
 
     # ── inference ───────────────────────────────────────────────────
+    def _resize_rgb(self, frame) -> np.ndarray:
+        """Resize to the model input and convert BGR→RGB → (h, w, 3) uint8."""
+        h, w = self.input_details[0]["shape"][1:3]
+        img = cv2.resize(frame, (w, h))
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    def _invoke(self, rgb_batch: np.ndarray) -> np.ndarray:
+        """Run one invoke on an (n, h, w, 3) uint8 RGB batch and return (n, classes) probs.
+
+        Resizing the interpreter means a fresh allocate_tensors(), so the
+        allocated batch only grows: a smaller batch (e.g. the cascade's passed subset) is padded up to it
+        and the padding's output dropped.  It is shrunk back to the largest
+        recent batch at most once every INVOKE_SHRINK_CALLS invokes, so one
+        big request does not pad every later call.
+        """
+        batch = self._prepare(rgb_batch)
+        n = len(batch)
+        with self._lock:
+            self._peak_batch = max(self._peak_batch, n)
+            self._peak_calls += 1
+            allocated = int(self.input_details[0]["shape"][0])
+            if n > allocated:
+                self._allocate(n)
+            elif self._peak_calls >= INVOKE_SHRINK_CALLS:
+                if self._peak_batch < allocated:
+                    self._allocate(self._peak_batch)
+                self._peak_batch = self._peak_calls = 0
+
+            allocated = int(self.input_details[0]["shape"][0])
+            if n < allocated:
+                pad = np.zeros((allocated - n,) + batch.shape[1:], dtype=batch.dtype)
+                batch = np.concatenate([batch, pad])
+                self.padded_frames += allocated - n
+            self.interpreter.set_tensor(self.input_details[0]["index"], batch)
+            self.interpreter.invoke()
+            output = self.output_details[0]
+            return dequantize(output, self.interpreter.get_tensor(output["index"])[:n].copy())
+
+    def _allocate(self, batch_size: int):
+        """Resize the interpreter input to ``batch_size`` frames (caller holds the lock)."""
+        shape = list(self.input_details[0]["shape"])
+        shape[0] = batch_size
+        self.interpreter.resize_tensor_input(self.input_details[0]["index"], shape)
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self.reallocations += 1
+
+    def _decide(self, probs: np.ndarray) -> list[dict]:
+        """Turn one softmax vector into the detected_objects list."""
+        best_idx = int(np.argmax(probs))
+        best_conf = float(probs[best_idx])
+        label = LABELS[best_idx]
+
+        # Log all probabilities
+        prob_str = ", ".join(f"{LABELS[i]}: {probs[i]:.2%}" for i in range(len(LABELS)))
+        print(f"  [{prob_str}]")
+
+        if best_conf < CONFIDENCE_THRESHOLD:
+            print(f"  Below threshold ({best_conf:.2%} < {CONFIDENCE_THRESHOLD:.0%}) — skipping")
+            return []
+
+        print(f"  → {label} ({best_conf:.1%})")
+        return [{
+            "label": best_idx,
+            "label_name": label,
+            "confidence": best_conf,
+            "count": 1,
+        }]
+
     def predict(self, frame):
         """
         Classify a BGR frame (OpenCV format).
@@ -80,43 +198,105 @@ class FoodClassifier:
 
         try:
             print("Predicting…")
-            h, w = self.input_details[0]["shape"][1:3]
+            rgb = self._resize_rgb(frame)
+            return self._classify_rgb(np.expand_dims(rgb, axis=0))[0]   # (1, 224, 224, 3)
+
+        except Exception as e:
+            print(f"Error predicting: {e}")
+            return None, None
 
-            # Preprocess: resize, BGR→RGB, normalise to [-1, 1]
-            img = cv2.resize(frame, (w, h))
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            img = (img.astype(np.float32) / 127.5) - 1.0
-            img = np.expand_dims(img, axis=0)   # (1, 224, 224, 3)
+    def predict_batch(self, frames: list) -> list[tuple]:
+        """
+        Classify several BGR frames with a single batched invoke.
 
-            self.interpreter.set_tensor(self.input_details[0]["index"], img)
-            self.interpreter.invoke()
-            probs = self.interpreter.get_tensor(self.output_details[0]["index"])[0]
+        Returns one ``(detected_objects, raw_probs)`` pair per frame, in
+        order — the same shape as predict().  On failure every pair is
+        ``(None, None)``.
+        """
+        if self.interpreter is None or not frames:
+            return [(None, None)] * len(frames)
 
-            best_idx = int(np.argmax(probs))
-            best_conf = float(probs[best_idx])
-            label = LABELS[best_idx]
+        try:
+            print(f"Predicting batch of {len(frames)}…")
+            return self._classify_rgb(np.stack([self._resize_rgb(f) for f in frames]))
 
-            # Log all probabilities
-            prob_str = ", ".join(f"{LABELS[i]}: {probs[i]:.2%}" for i in range(len(LABELS)))
-            print(f"  [{prob_str}]")
+        except Exception as e:
+            print(f"Error predicting batch: {e}")
+            return [(None, None)] * len(frames)
 
-            if best_conf < CONFIDENCE_THRESHOLD:
-                print(f"  Below threshold ({best_conf:.2%} < {CONFIDENCE_THRESHOLD:.0%}) — skipping")
-                return [], probs
+    def predict_tensors(self, rgb_batch: np.ndarray) -> list[tuple]:
+        """
+        Classify frames that are already model-sized RGB uint8, shape
+        ``(n, h, w, 3)`` — no decode, resize or colour conversion.  Same
+        return value as predict_batch().
+        """
+        if self.interpreter is None or len(rgb_batch) == 0:
+            return [(None, None)] * len(rgb_batch)
 
-            detected_objects = [{
-                "label": best_idx,
-                "label_name": label,
-                "confidence": best_conf,
-                "count": 1,
-            }]
-            print(f"  → {label} ({best_conf:.1%})")
-            return detected_objects, probs
+        try:
+            print(f"Predicting {len(rgb_batch)} preprocessed tensor(s)…")
+            return self._classify_rgb(rgb_batch)
 
         except Exception as e:
-            print(f"Error predicting: {e}")
-            return None, None
+            print(f"Error predicting tensors: {e}")
+            return [(None, None)] * len(rgb_batch)
+
+    def _classify_rgb(self, rgb_batch: np.ndarray) -> list[tuple]:
+        self.last_inputs = list(rgb_batch)
+        t0 = time.perf_counter()
+        if self.gate is None:
+            probs = list(self._invoke(rgb_batch))
+            gates = [GATE_NONE] * len(probs)
+        else:
+            probs, gates = self._cascade(rgb_batch)
+        latency_ms = (time.perf_counter() - t0) * 1000 / len(probs)
+
+        results = []
+        for p, g in zip(probs, gates):
+            self.prediction_log.append(p, latency_ms, g)
+            results.append((self._decide(p), p))
+        return results
+
+    def _cascade(self, rgb_batch: np.ndarray) -> tuple[list, list]:
+        """Only frames the gate does not call empty pay the full invoke."""
+        gate_probs = self.gate.score(rgb_batch)
+        passed = gate_probs[:, 0] < self.gate.threshold
+        self.gate.record(len(rgb_batch), int(np.count_nonzero(~passed)))
+        full = iter(self._invoke(rgb_batch[passed]) if passed.any() else ())
+
+        probs, gates = [], []
+        for rgb, ok, g in zip(rgb_batch, passed, gate_probs):
+            if ok:
+                p = next(full)
+                self.gate.observe(rgb, p)
+            else:
+                print(f"  [gate] nothing ({g[0]:.1%}) — full classifier skipped")
+                p = self._gate_to_labels(g)
+            probs.append(p)
+            gates.append(GATE_PASSED if ok else GATE_SKIPPED)
+        return probs, gates
+
+    @staticmethod
+    def _gate_to_labels(gate_probs: np.ndarray) -> np.ndarray:
+        """Gate output as a LABELS-sized vector (a 2-class gate spreads P(food))."""
+        if len(gate_probs) == len(LABELS):
+            return gate_probs
+        probs = np.full(len(LABELS), (1.0 - gate_probs[0]) / (len(LABELS) - 1), dtype=np.float32)
+        probs[0] = gate_probs[0]
+        return probs
 
 
 # Backward-compatible alias so existing imports keep working
 YOLOModel = FoodClassifier
+
+
+# Singleton instance shared by every route module in a worker
+_classifier: FoodClassifier | None = None
+
+
+def get_classifier() -> FoodClassifier:
+    """Get or create the singleton classifier instance."""
+    global _classifier
+    if _classifier is None:
+        _classifier = FoodClassifier()
+    return _classifier
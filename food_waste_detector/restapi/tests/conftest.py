@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Same as the scripts: import server modules from the restapi directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
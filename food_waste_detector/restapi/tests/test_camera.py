@@ -0,0 +1,104 @@
+"""Single-flight, shared capture in CameraService, against a fake device."""
+
+import asyncio
+import io
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from server.camera.camera import CameraService, CapturedFrame
+
+
+class FakeCamera:
+    """Stands in for Picamera2: a slow capture_array() that counts its calls."""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def capture_array(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("camera wedged")
+        frame = np.zeros((8, 8, 3), np.uint8)
+        frame[..., 2] = 255  # RGB888 → [B, G, R]: pure red
+        return frame
+
+    def stop(self):
+        pass
+
+
+def service(**kw):
+    svc = CameraService()
+    svc.camera = FakeCamera(**kw)
+    svc._started = True
+    return svc
+
+
+def gather(svc, n, max_age_ms=500):
+    async def run():
+        return await asyncio.gather(*(svc.capture_frame(max_age_ms) for _ in range(n)))
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_share_one_capture():
+    svc = service()
+    frames = gather(svc, 20)
+    assert svc.camera.calls == 1
+    assert all(f is frames[0] for f in frames)
+    assert svc.captures == 1 and svc.shared == 19
+
+
+def test_fresh_frame_is_reused_and_max_age_zero_forces_a_capture():
+    svc = service(delay=0)
+    first = gather(svc, 1)[0]
+    again = gather(svc, 1, max_age_ms=10_000)[0]
+    assert again is first and svc.camera.calls == 1
+    forced = gather(svc, 1, max_age_ms=0)[0]
+    assert forced is not first and forced.seq == first.seq + 1
+    assert svc.camera.calls == 2
+
+
+def test_failed_capture_returns_none_and_does_not_stick():
+    svc = service(delay=0, fail=True)
+    assert gather(svc, 3) == [None, None, None]
+    assert svc._inflight is None
+    svc.camera.fail = False
+    assert gather(svc, 1)[0] is not None
+
+
+def test_derive_runs_once_per_key():
+    frame = CapturedFrame(np.zeros((4, 4, 3), np.uint8), time.monotonic(), 1)
+    calls = []
+    start = threading.Barrier(8)
+
+    def slow(f):
+        calls.append(1)
+        time.sleep(0.05)
+        return "result"
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(frame.derive("k", slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["result"] * 8 and len(calls) == 1
+
+
+def test_jpeg_is_encoded_in_rgb_order():
+    svc = service(delay=0)
+    frame = gather(svc, 1)[0]
+    r, g, b = Image.open(io.BytesIO(frame.jpeg())).convert("RGB").getpixel((4, 4))
+    assert r > 200 and g < 50 and b < 50
+    assert frame.jpeg() is frame.jpeg()
+    assert svc.capture_image().getpixel((4, 4)) == (255, 0, 0)
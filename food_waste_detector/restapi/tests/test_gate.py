@@ -0,0 +1,73 @@
+"""Cascade gate: the abstract base and the background gate's learning rule."""
+
+import numpy as np
+import pytest
+
+from server.yolo.gate import BackgroundGate, CascadeGate
+
+EMPTY = np.array([0.785, 0.1, 0.1, 0.015], np.float32)  # an empty bin, as the classifier scores it
+FOOD = np.array([0.05, 0.9, 0.04, 0.01], np.float32)
+UNSURE = np.array([0.5, 0.49, 0.01, 0.0], np.float32)   # top-1 nothing, below the learn threshold
+
+
+def bin_frame(level=120, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.clip(level + rng.normal(0, 2, (224, 224, 3)), 0, 255).astype(np.uint8)
+
+
+def tray_frame():
+    frame = bin_frame()
+    frame[60:170, 50:180] = (240, 220, 60)
+    return frame
+
+
+def make(**kw):
+    kw.setdefault("learn_threshold", 0.6)
+    kw.setdefault("learn_frames", 3)
+    return BackgroundGate(**kw)
+
+
+def test_base_gate_is_abstract():
+    with pytest.raises(TypeError):
+        CascadeGate()
+
+    class NoScore(CascadeGate):
+        pass
+
+    with pytest.raises(TypeError):
+        NoScore()
+
+
+def test_without_a_reference_every_frame_passes():
+    gate = make()
+    assert gate.reference is None
+    assert gate.score(np.stack([bin_frame(), tray_frame()]))[:, 0].tolist() == [0.0, 0.0]
+
+
+def test_learns_after_consecutive_empty_frames_below_the_skip_threshold():
+    gate = make()
+    for seed in range(2):
+        gate.observe(bin_frame(seed=seed), EMPTY)
+    assert gate.reference is None
+    gate.observe(bin_frame(seed=2), EMPTY)
+    assert gate.reference is not None and gate.learned == 1
+
+    p = gate.score(np.stack([bin_frame(seed=9), tray_frame()]))
+    assert p[:, 0].tolist() == [1.0, 0.0]
+    assert p[0, 0] >= gate.threshold > p[1, 0]
+
+
+def test_food_or_unsure_frames_break_the_streak():
+    gate = make()
+    for probs in (EMPTY, EMPTY, FOOD, EMPTY, EMPTY, UNSURE, EMPTY, EMPTY):
+        gate.observe(bin_frame(), probs)
+    assert gate.reference is None and gate.learned == 0
+
+
+def test_reference_follows_slow_lighting_changes():
+    gate = make(learn_frames=1)
+    gate.observe(bin_frame(120), EMPTY)
+    for _ in range(20):
+        gate.observe(bin_frame(150), EMPTY)
+    assert gate.score(bin_frame(150)[None])[0, 0] == 1.0
+    assert gate.stats()["learned"] == 21
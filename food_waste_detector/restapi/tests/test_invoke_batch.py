@@ -0,0 +1,46 @@
+"""Interpreter batch: grows only, pads smaller batches, shrinks back after a quiet window."""
+
+import numpy as np
+import pytest
+
+from server.yolo import yolo
+from server.yolo.yolo import FoodClassifier
+
+
+@pytest.fixture(scope="module")
+def model():
+    model = FoodClassifier(cascade=False)
+    if model.model is None:
+        pytest.skip("model not available")
+    return model
+
+
+def frames(n, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, size=(n, 224, 224, 3), dtype=np.uint8)
+
+
+def test_smaller_batches_are_padded_not_reallocated(model):
+    rgb = frames(3)
+    single = np.stack([model._invoke(rgb[i:i + 1])[0] for i in range(3)])
+    before = model.reallocations
+    batched = model._invoke(rgb)
+    assert model.reallocations == before + 1
+
+    padded = model.padded_frames
+    for n in (1, 2, 3, 1, 2):
+        assert np.allclose(model._invoke(rgb[:n]), single[:n], atol=1e-5)
+    assert model.reallocations == before + 1
+    assert model.padded_frames == padded + 2 + 1 + 0 + 2 + 1
+    assert np.allclose(batched, single, atol=1e-5)
+
+
+def test_batch_shrinks_back_after_the_window(model, monkeypatch):
+    monkeypatch.setattr(yolo, "INVOKE_SHRINK_CALLS", 3)
+    model._peak_batch = model._peak_calls = 0
+    model._invoke(frames(4))
+    model._invoke(frames(1))
+    model._invoke(frames(2))                        # third call: peak is still 4
+    assert model.input_details[0]["shape"][0] == 4
+    for _ in range(3):
+        model._invoke(frames(1))
+    assert model.input_details[0]["shape"][0] == 1
@@ -0,0 +1,123 @@
+"""Prediction log: appends, rotation, restart recovery, queries and the HTTP route."""
+
+import csv
+import io
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.api import predictions
+from server.yolo import prediction_log as plog
+from server.yolo.prediction_log import GATE_PASSED, PredictionLog, iter_csv, query, query_arrays
+
+LABELS = ["nothing", "pizza", "salad", "soup"]
+DAY1 = datetime(2026, 10, 1, 12, 0).timestamp()
+DAY2 = datetime(2026, 10, 2, 12, 0).timestamp()
+
+
+def probs(top: int, conf: float) -> np.ndarray:
+    p = np.full(len(LABELS), (1 - conf) / (len(LABELS) - 1), np.float32)
+    p[top] = conf
+    return p
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = PredictionLog(len(LABELS), directory=str(tmp_path))
+    assert log.start()
+    yield log
+    log.close()
+
+
+def fill(log):
+    log.set_session("s1")
+    log.append(probs(1, 0.9), 4.0, t=DAY1)
+    log.append(probs(2, 0.5), 5.0, gate=GATE_PASSED, t=DAY1 + 1)
+    log.set_session(None)
+    log.append(probs(0, 0.8), 3.0, t=DAY1 + 2)
+    log.append(probs(1, 0.6), 4.5, t=DAY2)
+
+
+def test_records_round_trip_with_filters(log):
+    fill(log)
+    d = log.directory
+    assert len(query(LABELS, directory=d)) == 4
+    assert [r["label"] for r in query(LABELS, label=1, directory=d)] == ["pizza", "pizza"]
+    assert [r["confidence"] for r in query(LABELS, min_conf=0.55, max_conf=0.85, directory=d)] == [0.8, 0.6]
+
+    s1 = query(LABELS, session_id="s1", directory=d)
+    assert [r["session_id"] for r in s1] == ["s1", "s1"]
+    assert s1[1]["gate"] == "passed" and s1[1]["latency_ms"] == 5.0
+
+    day1 = query(LABELS, start=DAY1, end=DAY2, directory=d)
+    assert len(day1) == 3
+    assert len(query(LABELS, start="2026-10-02T00:00:00", directory=d)) == 1
+    assert len(query(LABELS, limit=2, directory=d)) == 2
+
+
+def test_one_file_per_day_and_a_new_part_when_full(tmp_path, monkeypatch):
+    monkeypatch.setattr(plog, "PREDICTION_LOG_DAY_ROWS", 2)
+    log = PredictionLog(len(LABELS), directory=str(tmp_path))
+    log.start()
+    try:
+        fill(log)
+    finally:
+        log.close()
+    names = sorted(p.name for p in tmp_path.glob("predictions-*.npy"))
+    assert names == ["predictions-2026-10-01.1.npy", "predictions-2026-10-01.npy", "predictions-2026-10-02.npy"]
+    assert [r["confidence"] for r in query(LABELS, directory=str(tmp_path))] == [0.9, 0.5, 0.8, 0.6]
+
+
+def test_restart_continues_after_the_last_record(tmp_path):
+    log = PredictionLog(len(LABELS), directory=str(tmp_path))
+    log.start()
+    log.append(probs(1, 0.9), 4.0, t=DAY1)
+    log.close()
+
+    log = PredictionLog(len(LABELS), directory=str(tmp_path))
+    log.start()
+    log.append(probs(2, 0.7), 4.0, t=DAY1 + 5)
+    log.close()
+    assert [r["label"] for r in query(LABELS, directory=str(tmp_path))] == ["pizza", "salad"]
+
+
+def test_second_writer_is_refused(log):
+    other = PredictionLog(len(LABELS), directory=log.directory)
+    assert not other.start()
+    assert not other.enabled
+
+
+@pytest.mark.parametrize("bad", [
+    {"start": 1e30},
+    {"end": float("nan")},
+    {"start": "yesterday"},
+    {"start": DAY2, "end": DAY1},
+])
+def test_bad_ranges_raise_before_reading(bad, tmp_path):
+    with pytest.raises(ValueError):
+        query_arrays(directory=str(tmp_path), **bad)
+    with pytest.raises(ValueError):
+        iter_csv(LABELS, directory=str(tmp_path), **bad)
+
+
+def test_csv_streams_in_chunks(log, monkeypatch):
+    fill(log)
+    monkeypatch.setattr(plog, "_CSV_CHUNK", 100)
+    chunks = list(iter_csv(LABELS, directory=log.directory))
+    assert len(chunks) > 1
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[0][:3] == ["time", "session_id", "label"] and rows[0][6:] == LABELS
+    assert [r[2] for r in rows[1:]] == ["pizza", "salad", "nothing", "pizza"]
+
+
+def test_route_rejects_out_of_range_times():
+    app = FastAPI()
+    app.include_router(predictions.router, prefix="/api")
+    client = TestClient(app)
+    for params in ({"start": "1e30"}, {"end": "1e30", "format": "csv"}, {"start": "nan"}):
+        response = client.get("/api/predictions", params=params)
+        assert response.status_code == 400, params
+        assert "not a valid time" in response.json()["error"]
@@ -0,0 +1,84 @@
+"""Stage attribution in the profiler, for threads and overlapping asyncio tasks."""
+
+import asyncio
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from server.profiling import Profiler, ProfileMiddleware, _stage_var
+
+
+def enabled_profiler():
+    """A profiler that records stages without its sampling thread or files."""
+    prof = Profiler()
+    prof.enabled = True
+    return prof
+
+
+def test_nested_stages_unwind_on_a_thread():
+    prof = enabled_profiler()
+    tid = threading.get_ident()
+    with prof.stage("outer"):
+        with prof.stage("inner"):
+            assert prof._current[tid] == "inner"
+        assert prof._current[tid] == "outer"
+    assert tid not in prof._current
+    assert prof._stages["outer"][0] == 1 and prof._stages["inner"][0] == 1
+
+
+def test_overlapping_tasks_keep_their_own_stage():
+    prof = enabled_profiler()
+    seen = {}
+
+    async def main():
+        a_in, b_in, a_checked = asyncio.Event(), asyncio.Event(), asyncio.Event()
+
+        async def request_a():
+            with prof.stage("http /a"):
+                a_in.set()
+                await b_in.wait()  # /b has entered its stage meanwhile
+                seen["a"] = (_stage_var.get(), prof._current.get(asyncio.current_task()))
+                a_checked.set()
+
+        async def request_b():
+            await a_in.wait()
+            with prof.stage("http /b"):
+                b_in.set()
+                await a_checked.wait()  # /a is still inside its stage
+                seen["b"] = (_stage_var.get(), prof._current.get(asyncio.current_task()))
+
+        await asyncio.gather(request_a(), request_b())
+
+    asyncio.run(main())
+    assert seen == {"a": ("http /a", "http /a"), "b": ("http /b", "http /b")}
+    assert prof._stages["http /a"][0] == 1 and prof._stages["http /b"][0] == 1
+    assert prof._current == {}
+
+
+def make_app(prof):
+    app = FastAPI()
+    app.add_middleware(ProfileMiddleware, profiler=prof)
+
+    @app.get("/ping")
+    async def ping():
+        return {"stage": _stage_var.get()}
+
+    return app
+
+
+def test_middleware_passes_through_when_disabled():
+    prof = Profiler()
+    client = TestClient(make_app(prof))
+    assert client.get("/ping").json() == {"stage": None}
+    assert prof._stages == {} and prof._ticks == 0
+
+
+def test_middleware_records_a_stage_and_tick_per_request():
+    prof = enabled_profiler()
+    client = TestClient(make_app(prof))
+    assert client.get("/ping").json() == {"stage": "http /ping"}
+    client.get("/ping")
+    assert prof._stages["http /ping"][0] == 2
+    assert prof._ticks == 2
+    assert prof._current == {}
@@ -0,0 +1,70 @@
+"""Frame-quality scoring on synthetic frames."""
+
+import cv2
+import numpy as np
+
+from server.camera.quality import score_frame, select_best
+
+
+def textured(seed=0, size=(240, 320)):
+    """A mid-grey frame with sharp-edged blocks of random brightness."""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(60, 200, size=(size[0] // 16, size[1] // 16), dtype=np.uint8)
+    gray = cv2.resize(blocks, (size[1], size[0]), interpolation=cv2.INTER_NEAREST)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def flat(level=120, size=(240, 320)):
+    return np.full((*size, 3), level, np.uint8)
+
+
+def test_sharp_textured_frame_passes():
+    q = score_frame(textured())
+    assert q.ok and not q.blurred
+    assert q.texture > 8
+
+
+def test_blurred_textured_frame_is_rejected():
+    q = score_frame(cv2.GaussianBlur(textured(), (0, 0), 8))
+    assert not q.ok and q.blurred
+    assert q.reason.startswith("blurred")
+
+
+def test_flat_frame_is_not_called_blurred():
+    # An empty bin: almost no gray-level spread, so Laplacian variance says nothing
+    ramp = np.linspace(110, 130, 320).astype(np.uint8)
+    frame = np.repeat(np.tile(ramp, (240, 1))[..., None], 3, axis=2)
+    q = score_frame(frame)
+    assert q.sharpness < 15
+    assert q.ok and not q.blurred
+
+
+def test_flat_frame_is_still_judged_on_exposure():
+    q = score_frame(flat(5))
+    assert not q.ok and not q.blurred
+    assert q.reason.startswith("underexposed")
+    q = score_frame(flat(250))
+    assert not q.ok and q.reason.startswith("overexposed")
+
+
+def test_clipped_frame_is_rejected():
+    frame = textured()
+    frame[:, : frame.shape[1] // 2] = 0
+    frame[:, frame.shape[1] // 2 : frame.shape[1] * 3 // 4] = 255
+    q = score_frame(frame)
+    assert not q.ok and q.reason.startswith("clipped")
+
+
+def test_large_frames_are_downscaled_before_scoring():
+    small = score_frame(textured(size=(240, 320)))
+    large = score_frame(cv2.resize(textured(size=(240, 320)), (1280, 960), interpolation=cv2.INTER_NEAREST))
+    assert abs(small.brightness - large.brightness) < 1
+
+
+def test_select_best_prefers_passing_then_sharpest():
+    sharp = textured()
+    soft = cv2.GaussianBlur(sharp, (0, 0), 1.0)
+    blurred = cv2.GaussianBlur(sharp, (0, 0), 8)
+    idx, q = select_best([blurred, soft, sharp])
+    assert idx == 2 and q.ok
+    assert select_best([]) == (None, None)
@@ -0,0 +1,107 @@
+"""Result cache: keys, TTL, LRU eviction, model-version invalidation, near duplicates."""
+
+import types
+
+import cv2
+import numpy as np
+import pytest
+
+from server.yolo import result_cache as rc
+from server.yolo.result_cache import ResultCache, content_key, perceptual_hash
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(rc, "time", types.SimpleNamespace(monotonic=c))
+    return c
+
+
+def photo(seed=0):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    return cv2.resize(small, (320, 240), interpolation=cv2.INTER_CUBIC)
+
+
+def test_content_key_depends_on_bytes_and_model_version():
+    assert content_key(b"jpeg", "v1") == content_key(b"jpeg", "v1")
+    assert content_key(b"jpeg", "v1") != content_key(b"jpeg!", "v1")
+    assert content_key(b"jpeg", "v1") != content_key(b"jpeg", "v2")
+
+
+def test_exact_hit_and_miss(clock):
+    cache = ResultCache(max_entries=4, ttl=60)
+    assert cache.get("a", "v1") is None
+    cache.put("a", "v1", {"label": "pizza"})
+    assert cache.get("a", "v1") == {"label": "pizza"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = ResultCache(max_entries=4, ttl=60)
+    cache.put("a", "v1", 1)
+    clock.now += 59.9
+    assert cache.get("a", "v1") == 1
+    clock.now += 0.1
+    assert cache.get("a", "v1") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2, ttl=60)
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    cache.get("a", "v1")       # a is now the most recent
+    cache.put("c", "v1", 3)    # evicts b
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == 1 and cache.get("c", "v1") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_new_model_version_drops_every_entry(clock):
+    cache = ResultCache(max_entries=4, ttl=60)
+    cache.put("a", "v1", 1)
+    cache.put("b", "v1", 2)
+    assert cache.get("a", "v2") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["invalidations"] == 1
+    # Switching back does not resurrect the old entries
+    assert cache.get("b", "v1") is None
+
+
+def test_perceptual_hash_survives_recompression():
+    frame = photo()
+    ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 40])
+    recompressed = cv2.imdecode(jpeg, cv2.IMREAD_COLOR)
+    assert (perceptual_hash(frame) ^ perceptual_hash(recompressed)).bit_count() <= 4
+    assert (perceptual_hash(frame) ^ perceptual_hash(photo(1))).bit_count() > 10
+    assert perceptual_hash(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)) == perceptual_hash(frame)
+
+
+def test_near_duplicate_lookup(clock):
+    cache = ResultCache(max_entries=4, ttl=60, phash_distance=4)
+    assert cache.near_duplicates_enabled
+    h = perceptual_hash(photo())
+    cache.put("a", "v1", "pizza", phash=h)
+    cache.put("b", "v1", "no-hash")
+
+    assert cache.get("other-bytes", "v1") is None     # miss counted by get_similar
+    assert cache.get_similar(h ^ 0b111, "v1") == "pizza"
+    assert cache.get_similar(h ^ 0b11111, "v1") is None
+    stats = cache.stats()
+    assert (stats["near_hits"], stats["misses"]) == (1, 1)
+
+    clock.now += 60
+    assert cache.get_similar(h, "v1") is None
+
+
+def test_near_duplicates_off_by_default():
+    assert not ResultCache(phash_distance=-1).near_duplicates_enabled
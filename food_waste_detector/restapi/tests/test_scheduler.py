@@ -0,0 +1,144 @@
+"""AdaptiveScheduler decisions, driven by simulated sensor files."""
+
+import pytest
+
+from server.daemon import scheduler as sched
+from server.daemon.scheduler import AdaptiveScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sensors(tmp_path, monkeypatch):
+    """Writable stand-ins for the thermal zone and /proc/loadavg (cool, idle)."""
+    monkeypatch.setattr(sched.os, "cpu_count", lambda: 4)
+    thermal = tmp_path / "temp"
+    loadavg = tmp_path / "loadavg"
+    thermal.write_text("45000\n")
+    loadavg.write_text("0.20 0.10 0.05 1/100 1234\n")
+    return thermal, loadavg
+
+
+def make(sensors, clock=None, **kw):
+    thermal, loadavg = sensors
+    kw.setdefault("min_interval", 0.5)
+    kw.setdefault("max_interval", 8.0)
+    kw.setdefault("backoff", 2.0)
+    kw.setdefault("quiet_frames", 3)
+    kw.setdefault("temp_limit_c", 75.0)
+    kw.setdefault("load_limit", 1.0)
+    return AdaptiveScheduler(
+        1.0, thermal_path=str(thermal), loadavg_path=str(loadavg), clock=clock or FakeClock(), **kw
+    )
+
+
+def test_activity_drops_to_minimum(sensors):
+    s = make(sensors)
+    assert s.record(True) == 0.5
+    assert s.quiet_streak == 0
+
+
+def test_quiet_frames_hold_then_back_off_to_maximum(sensors):
+    s = make(sensors)
+    assert s.record(False) == 1.0  # quiet x1, holding
+    assert s.record(False) == 1.0  # quiet x2, holding
+    assert s.record(False) == 2.0  # quiet x3 → backoff
+    assert s.record(False) == 4.0
+    assert s.record(False) == 8.0
+    assert s.record(False) == 8.0  # capped at max_interval
+
+
+def test_activity_resets_quiet_streak(sensors):
+    s = make(sensors)
+    for _ in range(4):
+        s.record(False)
+    assert s.interval == 4.0
+    assert s.record(True) == 0.5
+    assert s.record(False) == 0.5  # the streak starts over, so it holds
+
+
+def test_min_interval_defaults_to_base_interval(sensors):
+    thermal, loadavg = sensors
+    s = AdaptiveScheduler(1.0, min_interval=None, thermal_path=str(thermal), loadavg_path=str(loadavg))
+    assert s.min_interval == 1.0
+    assert s.record(True) == 1.0
+
+
+def test_hot_soc_throttles(sensors):
+    thermal, _ = sensors
+    thermal.write_text("80000\n")
+    s = make(sensors)
+    assert s.record(True) == 2.0  # activity, but at least double the base interval
+    assert s.throttled
+    assert s.temp_c == 80.0
+
+
+def test_high_load_throttles(sensors):
+    _, loadavg = sensors
+    loadavg.write_text("6.00 3.00 1.00 1/100 1234\n")  # 1.5 per core on 4 CPUs
+    s = make(sensors)
+    assert s.record(True) == 2.0
+    assert s.throttled
+    assert s.load == pytest.approx(1.5)
+
+
+def test_throttle_doubles_current_backed_off_interval(sensors):
+    thermal, _ = sensors
+    clock = FakeClock()
+    s = make(sensors, clock=clock)
+    for _ in range(4):
+        s.record(False)
+    assert s.interval == 4.0
+    thermal.write_text("90000\n")
+    clock.now += sched.SENSOR_REFRESH
+    assert s.record(False) == 8.0  # 4 → backoff 8, throttle 16, capped at 8
+    assert s.throttled
+
+
+def test_sensors_are_reread_only_after_refresh_period(sensors):
+    thermal, _ = sensors
+    clock = FakeClock()
+    s = make(sensors, clock=clock)
+    s.record(True)
+    thermal.write_text("90000\n")
+    clock.now += sched.SENSOR_REFRESH / 2
+    assert s.record(True) == 0.5  # cached reading, still cool
+    clock.now += sched.SENSOR_REFRESH
+    assert s.record(True) == 2.0
+
+
+def test_missing_sensors_do_not_throttle(tmp_path):
+    s = AdaptiveScheduler(
+        1.0, min_interval=0.5, thermal_path=str(tmp_path / "none"), loadavg_path=str(tmp_path / "none")
+    )
+    assert s.record(True) == 0.5
+    assert s.temp_c is None and s.load is None
+    assert not s.throttled
+
+
+def test_cooling_down_clears_throttle(sensors):
+    thermal, _ = sensors
+    thermal.write_text("80000\n")
+    clock = FakeClock()
+    s = make(sensors, clock=clock)
+    s.record(True)
+    assert s.throttled
+    thermal.write_text("60000\n")
+    clock.now += sched.SENSOR_REFRESH
+    assert s.record(True) == 0.5
+    assert not s.throttled
+
+
+def test_reset_returns_to_base_rate(sensors):
+    s = make(sensors)
+    for _ in range(5):
+        s.record(False)
+    s.reset()
+    assert s.interval == 1.0
+    assert s.quiet_streak == 0
@@ -0,0 +1,151 @@
+"""Supervisor deadlines, restarts, reset hooks, cool-downs and recovery accounting."""
+
+import threading
+import types
+
+import pytest
+
+from server.daemon import supervisor as sup_mod
+from server.daemon.supervisor import Supervisor
+
+DEADLINE = 0.05
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Drive the supervisor's bookkeeping clock by hand (deadlines stay real)."""
+    c = FakeClock()
+    monkeypatch.setattr(sup_mod, "time", types.SimpleNamespace(monotonic=c))
+    return c
+
+
+@pytest.fixture
+def release():
+    """Event that un-wedges every hung call at the end of the test."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def make(name="camera", **kw):
+    sup = Supervisor(enabled=True)
+    sup.register(name, DEADLINE, **kw)
+    return sup
+
+
+def test_disabled_supervisor_runs_inline():
+    sup = Supervisor(enabled=False)
+    assert sup.call("anything", threading.current_thread) is threading.current_thread()
+
+
+def test_on_time_call_returns_result_and_propagates_errors():
+    sup = make()
+    assert sup.call("camera", lambda x: x * 2, 21) == 42
+
+    def boom():
+        raise ValueError("bad frame")
+
+    with pytest.raises(ValueError):
+        sup.call("camera", boom)
+    stats = sup.stats()["camera"]
+    assert stats["calls"] == 2 and stats["stalls"] == 0
+
+
+def test_deadline_miss_returns_default_and_replaces_worker(clock, release):
+    sup = make()
+    component = sup.components["camera"]
+    old_worker = component.worker
+
+    assert sup.call("camera", release.wait, default="late") == "late"
+    assert component.stalls == 1 and component.stalled_since == 100.0
+    assert component.worker is not old_worker
+    # The fresh worker serves calls while the old one is still stuck
+    assert sup.call("camera", lambda: "ok") == "ok"
+
+
+def test_reset_hook_runs_on_the_fresh_worker(clock, release):
+    ran_on = []
+    sup = make(reset=lambda: ran_on.append(threading.current_thread()))
+    hung_on = []
+
+    def hang():
+        hung_on.append(threading.current_thread())
+        release.wait()
+
+    sup.call("camera", hang)
+    assert len(ran_on) == 1 and ran_on[0] is not hung_on[0]
+    assert ran_on[0].name == "supervised-camera"
+    assert sup.components["camera"].reset_failures == 0
+
+
+def test_failing_or_hanging_reset_is_counted(clock, release):
+    def bad_reset():
+        raise OSError("no such device")
+
+    sup = make(reset=bad_reset)
+    sup.call("camera", release.wait)
+    assert sup.components["camera"].reset_failures == 1
+
+    sup = make(reset=release.wait, reset_deadline=DEADLINE)
+    component = sup.components["camera"]
+    sup.call("camera", release.wait)
+    assert component.reset_failures == 1
+    # The worker stuck in the reset was replaced as well
+    assert sup.call("camera", lambda: "ok") == "ok"
+
+
+def test_cooldown_doubles_per_consecutive_stall_up_to_the_cap(clock, release, monkeypatch):
+    monkeypatch.setattr(sup_mod, "SUPERVISOR_MAX_COOLDOWN", 3 * DEADLINE)
+    sup = make()
+    component = sup.components["camera"]
+
+    sup.call("camera", release.wait)
+    assert component.cooldown_until <= clock.now  # first stall: no cool-down
+
+    cooldowns = []
+    for _ in range(4):
+        clock.now = max(clock.now, component.cooldown_until) + 1
+        sup.call("camera", release.wait)
+        cooldowns.append(component.cooldown_until - clock.now)
+    assert cooldowns == pytest.approx([DEADLINE, 2 * DEADLINE, 3 * DEADLINE, 3 * DEADLINE])
+
+
+def test_calls_during_cooldown_are_skipped(clock, release):
+    sup = make()
+    component = sup.components["camera"]
+    sup.call("camera", release.wait)
+    sup.call("camera", release.wait)
+    calls = component.calls
+
+    assert sup.call("camera", lambda: "ok", default="skipped") == "skipped"
+    assert component.skipped == 1 and component.calls == calls
+
+    clock.now = component.cooldown_until
+    assert sup.call("camera", lambda: "ok", default="skipped") == "ok"
+
+
+def test_recovery_time_runs_from_first_stall_to_next_on_time_call(clock, release):
+    sup = make()
+    component = sup.components["camera"]
+
+    sup.call("camera", release.wait)
+    clock.now += 4.0
+    sup.call("camera", release.wait)  # second stall keeps the first start time
+    assert component.stalled_since == 100.0
+
+    clock.now = component.cooldown_until + 2.0
+    sup.call("camera", lambda: None)
+    assert component.recoveries == [pytest.approx(clock.now - 100.0)]
+    assert component.stalled_since is None and component.consecutive == 0
+
+    stats = sup.stats()["camera"]
+    assert stats["recoveries"] == 1 and not stats["stalled"]
+    assert "recovery p50" in sup.report()
@@ -0,0 +1,122 @@
+"""Tensor wire format: round trips, validation and bounded reads / decompression."""
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes.api import tensor
+from server.yolo import tensor_codec
+from server.yolo.tensor_codec import (
+    ZSTD_AVAILABLE, TensorDecodeError, decode_tensor, encode_tensor, expected_size, max_body_size,
+)
+from server.yolo.yolo import get_classifier
+
+SIZE = (8, 6)  # (h, w) stand-in for the model input
+FRAME = 8 * 6 * 3
+
+ENCODINGS = ["identity", "gzip"] + (["zstd"] if ZSTD_AVAILABLE else [])
+
+
+def frames(*shape):
+    return np.random.default_rng(0).integers(0, 256, size=shape, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_single_frame_round_trip(encoding):
+    rgb = frames(8, 6, 3)
+    body, headers = encode_tensor(rgb, encoding)
+    batch, batched = decode_tensor(body, headers["X-Tensor-Shape"], headers["Content-Encoding"], SIZE)
+    assert not batched and batch.shape == (1, 8, 6, 3)
+    assert np.array_equal(batch[0], rgb)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_batch_round_trip(encoding):
+    rgb = frames(3, 8, 6, 3)
+    body, headers = encode_tensor(rgb, encoding)
+    batch, batched = decode_tensor(body, headers["X-Tensor-Shape"], headers["Content-Encoding"], SIZE)
+    assert batched and np.array_equal(batch, rgb)
+
+
+@pytest.mark.parametrize("header, status", [
+    (None, 400),
+    ("8,6", 400),
+    ("8,x,3", 400),
+    ("6,8,3", 400),        # not the model input
+    ("8,6,4", 400),
+    ("0,8,6,3", 400),
+    ("17,8,6,3", 413),     # over TENSOR_MAX_BATCH
+])
+def test_shape_is_checked_before_the_body(header, status):
+    with pytest.raises(TensorDecodeError) as e:
+        expected_size(header, SIZE)
+    assert e.value.status == status
+
+
+def test_expected_size_and_body_limits():
+    assert expected_size("2,8,6,3", SIZE) == ((2, 8, 6, 3), True, 2 * FRAME)
+    assert max_body_size(FRAME, None) == FRAME
+    assert FRAME < max_body_size(FRAME, "gzip") < 2 * FRAME + 1024
+    with pytest.raises(TensorDecodeError) as e:
+        max_body_size(FRAME, "br")
+    assert e.value.status == 415
+
+
+def test_wrong_decoded_size_is_rejected():
+    with pytest.raises(TensorDecodeError, match="expected"):
+        decode_tensor(b"\0" * (FRAME - 1), "8,6,3", "identity", SIZE)
+    with pytest.raises(TensorDecodeError) as e:
+        decode_tensor(b"\0" * (FRAME + 1), "8,6,3", "identity", SIZE)
+    assert e.value.status == 413
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS[1:])
+def test_compression_bomb_stops_at_the_declared_size(encoding, monkeypatch):
+    bomb, _ = encode_tensor(np.zeros((64, 8, 6, 3), np.uint8), encoding)
+    assert len(bomb) < FRAME
+    seen = []
+    real = tensor_codec._decompress
+    monkeypatch.setattr(tensor_codec, "_decompress", lambda *a: seen.append(real(*a)) or seen[-1])
+    with pytest.raises(TensorDecodeError, match="expected"):
+        decode_tensor(bomb, "8,6,3", encoding, SIZE)
+    assert len(seen[0]) == FRAME + 1
+
+
+def test_corrupt_gzip_is_a_400():
+    with pytest.raises(TensorDecodeError) as e:
+        decode_tensor(b"not gzip at all", "8,6,3", "gzip", SIZE)
+    assert e.value.status == 400
+
+
+@pytest.fixture(scope="module")
+def client():
+    if get_classifier().model is None:
+        pytest.skip("model not available")
+    app = FastAPI()
+    app.include_router(tensor.router, prefix="/api")
+    return TestClient(app)
+
+
+def test_route_classifies_a_tensor(client):
+    h, w = get_classifier().input_size
+    body, headers = encode_tensor(frames(2, h, w, 3), "gzip")
+    response = client.post("/api/detect/tensor", content=body, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 2
+
+
+def test_route_refuses_oversized_bodies_before_decoding(client):
+    h, w = get_classifier().input_size
+    raw = b"\0" * (h * w * 3 + 1)
+    headers = {"X-Tensor-Shape": f"{h},{w},3", "Content-Encoding": "identity"}
+    response = client.post("/api/detect/tensor", content=raw, headers=headers)
+    assert response.status_code == 413
+
+    # Chunked upload without a Content-Length is cut off while streaming
+    def chunks():
+        for _ in range(64):
+            yield b"\0" * (h * w)
+
+    response = client.post("/api/detect/tensor", content=chunks(), headers=headers)
+    assert response.status_code == 413
@@ -0,0 +1,75 @@
+"""Weight estimation: fixed weights by default, area curves only when calibrated."""
+
+import json
+
+import numpy as np
+import pytest
+
+from server.yolo import weight_estimator as we
+from server.yolo.weight_estimator import _load_calibration, estimate_weight
+
+
+def plate(fraction: float) -> np.ndarray:
+    """A grey 224×224 frame with a saturated orange square covering ``fraction`` of it."""
+    frame = np.full((224, 224, 3), 128, np.uint8)
+    side = int(round(224 * fraction ** 0.5))
+    frame[:side, :side] = (230, 120, 20)
+    frame[0, :] = frame[-1, :] = frame[:, 0] = frame[:, -1] = 128  # keep the border as background
+    return frame
+
+
+def objects(label="pizza"):
+    return [{"label_name": label}]
+
+
+@pytest.fixture
+def calibration(tmp_path, monkeypatch):
+    path = tmp_path / "curves.json"
+    path.write_text(json.dumps({"Pizza": [[0.0, 0.0], [0.5, 100.0]]}))
+    monkeypatch.setattr(we, "CALIBRATION", _load_calibration(str(path)))
+
+
+def test_fixed_weights_without_calibration(monkeypatch):
+    monkeypatch.setattr(we, "CALIBRATION", _load_calibration(""))
+    obj = estimate_weight(objects(), frame=plate(0.25))[0]
+    assert obj["weight_kg"] == 0.120 and obj["weight_source"] == "fixed"
+    assert obj["area_fraction"] > 0.2  # the area is still reported
+
+
+def test_fixed_weight_without_a_frame(calibration):
+    obj = estimate_weight(objects("croissant"))[0]
+    assert obj["weight_kg"] == 0.069 and "area_px" not in obj
+
+
+def test_area_weight_with_calibration(calibration):
+    obj = estimate_weight(objects(), frame=plate(0.25))[0]
+    assert obj["weight_source"] == "area"
+    assert obj["weight_kg"] == pytest.approx(obj["area_fraction"] / 0.5 * 0.100, rel=0.01)
+
+
+def test_categories_without_a_curve_and_tiny_areas_fall_back(calibration):
+    assert estimate_weight(objects("muffin"), frame=plate(0.25))[0]["weight_source"] == "fixed"
+    assert estimate_weight(objects(), frame=plate(0.0))[0]["weight_source"] == "fixed"
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    "[1, 2]",
+    '{"pizza": [[0.1]]}',
+    '{"pizza": []}',
+    '{"pizza": [[0.0, 0.0], [0.5, NaN]]}',
+])
+def test_unreadable_calibration_means_fixed_weights(tmp_path, content):
+    path = tmp_path / "curves.json"
+    path.write_text(content)
+    assert _load_calibration(str(path)) == {}
+    assert _load_calibration(str(tmp_path / "missing.json")) == {}
+
+
+def test_bad_curve_only_drops_its_own_category(tmp_path, monkeypatch):
+    path = tmp_path / "curves.json"
+    path.write_text(json.dumps({"pizza": [], "muffin": [[0.0, 0.0], [0.4, 90.0]]}))
+    monkeypatch.setattr(we, "CALIBRATION", _load_calibration(str(path)))
+    assert set(we.CALIBRATION) == {"muffin"}
+    assert estimate_weight(objects("pizza"), frame=plate(0.25))[0]["weight_kg"] == 0.120
+    assert estimate_weight(objects("muffin"), frame=plate(0.25))[0]["weight_source"] == "area"